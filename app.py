@@ -1,4 +1,4 @@
-import os, sys, urllib, json, random, re, time, datetime, subprocess, tempfile, time, secrets, io, base64
+import os, sys, urllib, json, random, re, time, datetime, subprocess, tempfile, time, secrets, io, base64, hashlib
 import boto3, redis, qrcode
 from botocore.exceptions import ClientError
 from botocore.client import Config
@@ -10,6 +10,8 @@ from passlib.apps import custom_app_context as pwd_context
 from datetime import datetime
 from unidecode import unidecode
 from functools import wraps
+from collections import OrderedDict
+import threading
 from influxdb_client import InfluxDBClient, Point, WritePrecision
 from influxdb_client.client.write_api import SYNCHRONOUS
 from flask_mobility import Mobility
@@ -82,10 +84,10 @@ def generate_stream(shouthash,shouttype):
         if shouttype == 'video':
             ext = '.mp4'
         object_data = botoclient.get_object(Bucket=app.config['S3_BUCKET'], Key=shouthash + ext)
-        data = object_data['Body'].read(1024)
-        while data:
+        # 256 KB chunks: 1 KB reads spent more time in Python than on the wire
+        for data in object_data['Body'].iter_chunks(256 * 1024):
             yield data
-            data = object_data['Body'].read(1024)
+        object_data['Body'].close()
     except:
          data = None
 
@@ -222,6 +224,50 @@ def random_qr(url='https://' + app.config['VHOST_WEBSITE']):
     img = qr.make_image()
     return img
 
+# Rendered QR PNGs, least recently used first. The URL comes from the client and
+# longer URLs render larger images, so the cache is bounded by total bytes.
+QR_CACHE_MAX_BYTES = int(app.config.get('QR_CACHE_MAX_BYTES', 4 * 1024 * 1024))
+qr_png_cache = OrderedDict()
+qr_png_cache_bytes = 0
+qr_png_cache_lock = threading.Lock()
+
+def cached_qr_png(url):
+    global qr_png_cache_bytes
+    with qr_png_cache_lock:
+        data = qr_png_cache.get(url)
+        if data is not None:
+            qr_png_cache.move_to_end(url)
+            return data
+
+    img_buf = io.BytesIO()
+    random_qr(url=url).save(img_buf)
+    data = img_buf.getvalue()
+
+    # Never let one huge image flush the whole cache
+    if len(data) > QR_CACHE_MAX_BYTES // 4:
+        return data
+    with qr_png_cache_lock:
+        previous = qr_png_cache.pop(url, None)
+        if previous is not None:
+            qr_png_cache_bytes -= len(previous)
+        qr_png_cache[url] = data
+        qr_png_cache_bytes += len(data)
+        while qr_png_cache_bytes > QR_CACHE_MAX_BYTES:
+            _, evicted = qr_png_cache.popitem(last=False)
+            qr_png_cache_bytes -= len(evicted)
+    return data
+
+def qr_png_response(url):
+    etag = hashlib.sha1(url.encode()).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(cached_qr_png(url), mimetype='image/png')
+    response.set_etag(etag)
+    # The QR image of a given URL never changes
+    response.headers['Cache-Control'] = 'public, max-age=86400, immutable'
+    return response
+
 ############# END FUNCTIONS ####################
 
 @app.route("/favicon.ico")
@@ -230,19 +276,11 @@ def display_favicon():
 
 @app.route('/get_qrimg/<shouttype>/<shouthash>')
 def get_qrimg(shouttype,shouthash):
-    img_buf = io.BytesIO()
-    img = random_qr(url='https://' + app.config['VHOST_WEBSITE'] + '/' + shouttype + '/' + shouthash)
-    img.save(img_buf)
-    img_buf.seek(0)
-    return send_file(img_buf, mimetype='image/png')
+    return qr_png_response('https://' + app.config['VHOST_WEBSITE'] + '/' + shouttype + '/' + shouthash)
 
 @app.route('/buildchat_qrurl/<chathash>')
 def build_qrimg(chathash):
-    img_buf = io.BytesIO()
-    img = random_qr(url='https://' + app.config['VHOST_WEBSITE'] + '/chat/' + chathash)
-    img.save(img_buf)
-    img_buf.seek(0)
-    return send_file(img_buf, mimetype='image/png')
+    return qr_png_response('https://' + app.config['VHOST_WEBSITE'] + '/chat/' + chathash)
 
 
 #@app.route("/profile")
@@ -1,11 +1,38 @@
 """
 Entry point for running backend as a module: python -m backend
+
+    python -m backend                  # API server
+    python -m backend cleanup-worker   # standalone cleanup scheduler
 """
 from backend.app_api import create_app
 import os
+import sys
+
+def run_cleanup_worker():
+    """Run the cleanup scheduler in the foreground until SIGINT/SIGTERM"""
+    from backend.config import Config
+    from backend.services.cleanup_scheduler import cleanup_scheduler
+    import logging
+    import signal
+
+    Config.validate()
+    logging.basicConfig(
+        level=logging.DEBUG if Config.DEBUG else logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    def shutdown(signum, frame):
+        cleanup_scheduler.stop()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    cleanup_scheduler.run_forever()
 
 if __name__ == '__main__':
-    app = create_app()
-    port = int(os.environ.get('PORT', 5000))
-    debug = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
-    app.run(host='0.0.0.0', port=port, debug=debug)
+    if len(sys.argv) > 1 and sys.argv[1] == 'cleanup-worker':
+        run_cleanup_worker()
+    else:
+        app = create_app()
+        port = int(os.environ.get('PORT', 5000))
+        debug = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
+        app.run(host='0.0.0.0', port=port, debug=debug)
@@ -1,5 +1,14 @@
 from flask import Blueprint, jsonify
+from backend.models.db_client import get_pool_stats
 from backend.services.cleanup_service import CleanupService
+from backend.services.url_cache import presigned_url_cache
+from backend.services.burn_queue import burn_deletions
+from backend.services.hit_log_writer import hit_log_writer
+from backend.services.hot_shouts import hot_shouts
+from backend.services.transcoder import media_transcoder
+from backend.services.rate_limiter import rate_limiter
+from backend.services.qr_service import qr_cache
+from backend.services.existence_cache import shout_existence_cache
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 
@@ -24,3 +33,20 @@ def run_cleanup():
             'success': False,
             'error': str(e)
         }), 500
+
+
+@admin_bp.route('/stats', methods=['GET'])
+def get_stats():
+    """Get in-process pool and cache statistics for this worker"""
+    return jsonify({
+        'success': True,
+        'db_pool': get_pool_stats(),
+        'presigned_url_cache': presigned_url_cache.stats(),
+        'burn_deletions': burn_deletions.stats(),
+        'hit_log_writer': hit_log_writer.stats(),
+        'hot_shouts': hot_shouts.stats(),
+        'transcoder': media_transcoder.stats(),
+        'qr_cache': qr_cache.stats(),
+        'rate_limiter': rate_limiter.stats(),
+        'shout_existence_cache': shout_existence_cache.stats()
+    }), 200
@@ -1,11 +1,33 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge
+from backend.config import Config
 from backend.services.chat_service import ChatService
+from backend.services.chat_events import chat_events
 from backend.services.shout_service import ShoutService
 from backend.services.validation import ValidationService
+from datetime import datetime, timezone
 import base64
+import queue
+import json
 
 chat_bp = Blueprint('chat', __name__, url_prefix='/api/chat')
 
+@chat_bp.before_request
+def reject_oversized_upload():
+    """Refuse an upload on its headers alone, before any of the body is read"""
+    if request.endpoint != 'chat.post_chat_message':
+        return None
+
+    options = ValidationService.upload_options(request.args, request.headers)
+    check = ValidationService.validate_upload_request(request.content_length, request.is_json, options)
+    if not check['valid']:
+        return jsonify({'error': check['error']}), check['status']
+
+    # Bodies without a Content-Length are cut off as soon as they pass the cap
+    request.max_content_length = check['value']
+    return None
+
+
 @chat_bp.route('/create', methods=['POST'])
 def create_chat_room():
     """Create a new chat room"""
@@ -48,24 +70,116 @@ def get_chat_room(chat_hash):
 
 @chat_bp.route('/<chat_hash>/messages', methods=['GET'])
 def get_chat_messages(chat_hash):
-    """Get all messages in a chat room"""
+    """Get messages in a chat room (only newer ones with ?since=<created_at,id>&limit=N)"""
     try:
-        messages = ChatService.get_chat_messages(chat_hash)
+        since = None
+        if request.args.get('since'):
+            cursor_validation = ValidationService.validate_message_cursor(request.args['since'])
+            if not cursor_validation['valid']:
+                return jsonify({'error': cursor_validation['error']}), 400
+            since = cursor_validation['value']
+
+        limit = None
+        if request.args.get('limit'):
+            limit_validation = ValidationService.validate_page_limit(request.args['limit'])
+            if not limit_validation['valid']:
+                return jsonify({'error': limit_validation['error']}), 400
+            limit = limit_validation['value']
+
+        messages = ChatService.get_chat_messages(chat_hash, since=since, limit=limit)
+
+        # ETag over the message data (media URLs are re-signed; only their time window counts)
+        etag = ChatService.messages_etag(messages)
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
 
         # Add media URLs to messages
-        for message in messages:
-            if message.get('shouts') and message['shouts'].get('storage_key'):
-                media_url = ShoutService.get_media_url(message['shouts']['storage_key'])
-                message['shouts']['media_url'] = media_url
+        _attach_media_urls(messages)
 
-        return jsonify({
+        if messages:
+            cursor = ChatService.get_message_cursor(messages[-1])
+        else:
+            cursor = request.args.get('since')
+
+        response = jsonify({
             'success': True,
-            'messages': messages
-        }), 200
+            'messages': messages,
+            'cursor': cursor,
+            'has_more': limit is not None and len(messages) == limit
+        })
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response, 200
+
+    except Exception as e:
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+
+@chat_bp.route('/<chat_hash>/events', methods=['GET'])
+def stream_chat_events(chat_hash):
+    """Stream chat messages as Server-Sent Events.
+
+    Sends the backlog after the resume cursor (Last-Event-ID header or
+    ?last_id=), then pushes new messages as they are posted.
+    """
+    try:
+        chat_result = ChatService.get_chat_room(chat_hash)
+        if not chat_result['success']:
+            return jsonify({'error': chat_result['error']}), 404
+
+        last_id = request.headers.get('Last-Event-ID') or request.args.get('last_id')
+        expires_at = chat_result['chat_room']['expires_at']
+
+        # Subscribe before reading the backlog so nothing posted in between is lost
+        subscription = chat_events.subscribe(chat_hash)
 
     except Exception as e:
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
+    def generate():
+        try:
+            sent_ids = set()
+
+            yield 'retry: 3000\n\n'
+
+            backlog = ChatService.get_chat_messages(chat_hash, after_id=last_id)
+            _attach_media_urls(backlog)
+            for message in backlog:
+                sent_ids.add(message['id'])
+                yield _format_sse(message)
+
+            while not subscription.overflowed:
+                if expires_at <= datetime.now(timezone.utc):
+                    yield 'event: expired\ndata: {}\n\n'
+                    return
+
+                try:
+                    message = subscription.queue.get(timeout=Config.CHAT_EVENTS_KEEPALIVE)
+                except queue.Empty:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ': keepalive\n\n'
+                    continue
+
+                if message['id'] in sent_ids:
+                    continue
+                sent_ids.add(message['id'])
+
+                _attach_media_urls([message])
+                yield _format_sse(message)
+
+            # Fell behind: end the stream, the client reconnects with Last-Event-ID
+
+        finally:
+            chat_events.unsubscribe(subscription)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 
 @chat_bp.route('/<chat_hash>/message', methods=['POST'])
 def post_chat_message(chat_hash):
@@ -73,15 +187,14 @@ def post_chat_message(chat_hash):
     try:
         data = request.get_json() if request.is_json else request.form.to_dict()
 
-        # Validate chat room exists
-        chat_result = ChatService.get_chat_room(chat_hash)
-        if not chat_result['success']:
-            return jsonify({'error': 'Chat room not found or expired'}), 404
+        # Get message type (options declared ahead of the body are the defaults)
+        options = ValidationService.upload_options(request.args, request.headers)
+        message_type = data.get('type', options['type'] or 'audio')
+        max_hits = int(data.get('maxhits', options['maxhits'] or 10))  # Chat messages can be viewed more
+        max_time = int(data.get('maxtime', options['maxtime'] or 5))    # But expire quickly
 
-        # Get message type
-        message_type = data.get('type', 'audio')
-        max_hits = int(data.get('maxhits', 10))  # Chat messages can be viewed more
-        max_time = int(data.get('maxtime', 5))    # But expire quickly
+        if options['type'] and message_type != options['type']:
+            return jsonify({'error': 'Type does not match the declared type'}), 400
 
         # Validate type
         type_validation = ValidationService.validate_shout_type(message_type)
@@ -101,9 +214,34 @@ def post_chat_message(chat_hash):
 
         # Handle media
         else:
+            # Validate chat room exists before spending an upload on it
+            chat_result = ChatService.get_chat_room(chat_hash)
+            if not chat_result['success']:
+                return jsonify({'error': 'Chat room not found or expired'}), 404
+
+            import secrets
+            temp_hash = secrets.token_urlsafe(36)
+            file_ext = ValidationService.get_file_extension(message_type)
+
             if 'data' in request.files:
+                # Stored under the extension of what was actually uploaded
+                head = ValidationService.peek(request.files['data'].stream)
+                content_validation = ValidationService.validate_media_content(head, message_type)
+                if not content_validation['valid']:
+                    return jsonify({'error': content_validation['error']}), 400
+                file_ext = ValidationService.get_file_extension(message_type, head=head)
+
+                # Stream the file to storage; the size cap is enforced while streaming
                 file = request.files['data']
-                file_data = file.read()
+                upload_result = ShoutService.upload_media_stream(
+                    file.stream,
+                    temp_hash,
+                    file_ext,
+                    max_size=ValidationService.MAX_FILE_SIZES[message_type]
+                )
+                if upload_result.get('too_large'):
+                    size_validation = ValidationService.validate_file_size(upload_result['size'], message_type)
+                    return jsonify({'error': size_validation['error']}), 400
             elif 'data' in data and isinstance(data['data'], str):
                 try:
                     if 'data:image/' in data['data']:
@@ -113,26 +251,29 @@ def post_chat_message(chat_hash):
                         return jsonify({'error': 'Invalid data format'}), 400
                 except Exception as e:
                     return jsonify({'error': f'Failed to decode data: {str(e)}'}), 400
-            else:
-                return jsonify({'error': 'No file data provided'}), 400
 
-            # Validate and upload
-            size_validation = ValidationService.validate_file_size(len(file_data), message_type)
-            if not size_validation['valid']:
-                return jsonify({'error': size_validation['error']}), 400
+                # Validate and upload
+                size_validation = ValidationService.validate_file_size(len(file_data), message_type)
+                if not size_validation['valid']:
+                    return jsonify({'error': size_validation['error']}), 400
 
-            import secrets
-            temp_hash = secrets.token_urlsafe(36)
-            file_ext = ValidationService.get_file_extension(message_type)
+                content_validation = ValidationService.validate_media_content(file_data[:64], message_type)
+                if not content_validation['valid']:
+                    return jsonify({'error': content_validation['error']}), 400
+                file_ext = ValidationService.get_file_extension(message_type, head=file_data[:64])
+
+                upload_result = ShoutService.upload_media(file_data, temp_hash, file_ext)
+            else:
+                return jsonify({'error': 'No file data provided'}), 400
 
-            upload_result = ShoutService.upload_media(file_data, temp_hash, file_ext)
             if not upload_result['success']:
                 return jsonify({'error': upload_result['error']}), 500
 
             storage_key = upload_result['storage_key']
 
-        # Create shout for the message
-        shout_result = ShoutService.create_shout(
+        # Create the shout and its chat message in one round trip
+        message_result = ChatService.post_message(
+            chat_hash,
             shout_type=message_type,
             max_hits=max_hits,
             max_time_minutes=max_time,
@@ -140,28 +281,35 @@ def post_chat_message(chat_hash):
             storage_key=storage_key
         )
 
-        if not shout_result['success']:
-            return jsonify({'error': 'Failed to create message'}), 500
-
-        # Get shout ID
-        from backend.models.supabase_client import get_supabase_client
-        supabase = get_supabase_client()
-        shout_data = supabase.table('shouts').select('id').eq('hash', shout_result['hash']).single().execute()
-
-        if not shout_data.data:
-            return jsonify({'error': 'Failed to retrieve message'}), 500
-
-        # Add message to chat
-        message_result = ChatService.add_message_to_chat(chat_hash, shout_data.data['id'])
-
         if message_result['success']:
             return jsonify({
                 'success': True,
                 'message': message_result['message'],
-                'shout_hash': shout_result['hash']
+                'shout_hash': message_result['shout_hash']
             }), 201
-        else:
-            return jsonify({'error': message_result['error']}), 500
 
+        # Don't leave an orphaned upload behind
+        if storage_key:
+            ShoutService.delete_media(storage_key)
+
+        if message_result.get('not_found'):
+            return jsonify({'error': 'Chat room not found or expired'}), 404
+        return jsonify({'error': 'Failed to create message'}), 500
+
+    except RequestEntityTooLarge:
+        # A body without a Content-Length ran past the cap: the app's 413 handler answers
+        raise
     except Exception as e:
         return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+
+def _attach_media_urls(messages):
+    """Add presigned media URLs to chat messages"""
+    for message in messages:
+        if message.get('shouts') and message['shouts'].get('storage_key'):
+            message['shouts']['media_url'] = ShoutService.get_media_url(message['shouts']['storage_key'])
+
+
+def _format_sse(message):
+    """Format a chat message as an SSE 'message' event"""
+    return f"id: {message['id']}\nevent: message\ndata: {json.dumps(message, default=str)}\n\n"
@@ -0,0 +1,31 @@
+from flask import Blueprint, Response, request, jsonify
+from backend.config import Config
+from backend.services.media_service import MediaService
+
+media_bp = Blueprint('media', __name__, url_prefix='/api/media')
+
+@media_bp.route('/<storage_key>', methods=['GET'])
+def stream_media(storage_key):
+    """Stream media behind a signed link (honors Range; ?expires=<ts>&sig=<signature>)"""
+    if not MediaService.verify(storage_key, request.args.get('expires'), request.args.get('sig')):
+        return jsonify({'error': 'Invalid or expired media link'}), 403
+
+    try:
+        # nginx fetches the object (and serves the range) itself
+        if Config.MEDIA_ACCEL_REDIRECT_PREFIX:
+            return Response(status=200, headers=MediaService.accel_redirect_headers(storage_key))
+
+        result = MediaService.open(storage_key, request.headers.get('Range'), request.headers.get('If-Range'))
+        if not result['success']:
+            response = jsonify({'error': result['error']})
+            response.headers.extend(result.get('headers', {}))
+            return response, result['status']
+
+        body = result['body']
+        response = Response(MediaService.iter_body(body), status=result['status'], headers=result['headers'])
+        # HEAD requests never iterate the body, so close it with the response
+        response.call_on_close(body.close)
+        return response
+
+    except Exception as e:
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
@@ -0,0 +1,29 @@
+from flask import Blueprint, Response, g, request
+from backend.metrics import observe_pool, observe_request, render
+from backend.models.db_client import get_pool_stats
+import time
+
+# Registering this blueprint also installs the request timing hooks
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.before_app_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@metrics_bp.after_app_request
+def record_request(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        # Route templates, not raw paths, keep label cardinality bounded
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        observe_request(request.method, endpoint, response.status_code, time.perf_counter() - start)
+    return response
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics (of every worker, in multiprocess mode)"""
+    observe_pool(get_pool_stats())
+    data, content_type = render()
+    return Response(data, content_type=content_type)
@@ -0,0 +1,25 @@
+from flask import Blueprint, jsonify, request
+from backend.services.rate_limiter import rate_limiter
+import math
+
+# Registering this blueprint installs the limit check in front of every route
+rate_limit_bp = Blueprint('rate_limit', __name__)
+
+@rate_limit_bp.before_app_request
+def enforce_rate_limit():
+    if request.method == 'OPTIONS':
+        return None
+
+    route_class = rate_limiter.route_class(request.blueprint, request.endpoint)
+    if route_class is None:
+        return None
+
+    client_ip = rate_limiter.client_ip(request.remote_addr, request.headers.get('X-Forwarded-For'))
+    wait = rate_limiter.check(route_class, client_ip)
+    if wait > 0:
+        retry_after = math.ceil(wait)
+        response = jsonify({'error': 'Too many requests', 'retry_after': retry_after})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(retry_after)
+        return response
+    return None
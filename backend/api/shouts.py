@@ -1,20 +1,41 @@
 from flask import Blueprint, request, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge
 from backend.services.shout_service import ShoutService
 from backend.services.validation import ValidationService
 import base64
 
 shouts_bp = Blueprint('shouts', __name__, url_prefix='/api/shouts')
 
+@shouts_bp.before_request
+def reject_oversized_upload():
+    """Refuse an upload on its headers alone, before any of the body is read"""
+    if request.endpoint != 'shouts.create_shout':
+        return None
+
+    options = ValidationService.upload_options(request.args, request.headers)
+    check = ValidationService.validate_upload_request(request.content_length, request.is_json, options)
+    if not check['valid']:
+        return jsonify({'error': check['error']}), check['status']
+
+    # Bodies without a Content-Length are cut off as soon as they pass the cap
+    request.max_content_length = check['value']
+    return None
+
+
 @shouts_bp.route('/create', methods=['POST'])
 def create_shout():
     """Create a new shout"""
     try:
         data = request.get_json() if request.is_json else request.form.to_dict()
 
-        # Validate required fields
-        shout_type = data.get('type')
-        max_hits = data.get('maxhits', 1)
-        max_time = data.get('maxtime', 240)
+        # Validate required fields (options declared ahead of the body are the defaults)
+        options = ValidationService.upload_options(request.args, request.headers)
+        shout_type = data.get('type') or options['type']
+        max_hits = data.get('maxhits', options['maxhits'] or 1)
+        max_time = data.get('maxtime', options['maxtime'] or 240)
+
+        if options['type'] and shout_type != options['type']:
+            return jsonify({'error': 'Type does not match the declared type'}), 400
 
         # Validate type
         type_validation = ValidationService.validate_shout_type(shout_type)
@@ -47,10 +68,31 @@ def create_shout():
 
         # Handle media upload
         else:
+            # Generate temporary hash for upload
+            import secrets
+            temp_hash = secrets.token_urlsafe(36)
+            file_ext = ValidationService.get_file_extension(shout_type)
+
             # Check if file is in request
             if 'data' in request.files:
+                # Stored under the extension of what was actually uploaded
+                head = ValidationService.peek(request.files['data'].stream)
+                content_validation = ValidationService.validate_media_content(head, shout_type)
+                if not content_validation['valid']:
+                    return jsonify({'error': content_validation['error']}), 400
+                file_ext = ValidationService.get_file_extension(shout_type, head=head)
+
+                # Stream the file to storage; the size cap is enforced while streaming
                 file = request.files['data']
-                file_data = file.read()
+                upload_result = ShoutService.upload_media_stream(
+                    file.stream,
+                    temp_hash,
+                    file_ext,
+                    max_size=ValidationService.MAX_FILE_SIZES[shout_type]
+                )
+                if upload_result.get('too_large'):
+                    size_validation = ValidationService.validate_file_size(upload_result['size'], shout_type)
+                    return jsonify({'error': size_validation['error']}), 400
             elif 'data' in data and isinstance(data['data'], str):
                 # Handle base64 encoded data (for photos from canvas)
                 try:
@@ -62,21 +104,22 @@ def create_shout():
                         return jsonify({'error': 'Invalid data format'}), 400
                 except Exception as e:
                     return jsonify({'error': f'Failed to decode data: {str(e)}'}), 400
-            else:
-                return jsonify({'error': 'No file data provided'}), 400
 
-            # Validate file size
-            size_validation = ValidationService.validate_file_size(len(file_data), shout_type)
-            if not size_validation['valid']:
-                return jsonify({'error': size_validation['error']}), 400
+                # Validate file size
+                size_validation = ValidationService.validate_file_size(len(file_data), shout_type)
+                if not size_validation['valid']:
+                    return jsonify({'error': size_validation['error']}), 400
 
-            # Generate temporary hash for upload
-            import secrets
-            temp_hash = secrets.token_urlsafe(36)
-            file_ext = ValidationService.get_file_extension(shout_type)
+                content_validation = ValidationService.validate_media_content(file_data[:64], shout_type)
+                if not content_validation['valid']:
+                    return jsonify({'error': content_validation['error']}), 400
+                file_ext = ValidationService.get_file_extension(shout_type, head=file_data[:64])
+
+                # Upload to storage
+                upload_result = ShoutService.upload_media(file_data, temp_hash, file_ext)
+            else:
+                return jsonify({'error': 'No file data provided'}), 400
 
-            # Upload to storage
-            upload_result = ShoutService.upload_media(file_data, temp_hash, file_ext)
             if not upload_result['success']:
                 return jsonify({'error': upload_result['error']}), 500
 
@@ -100,6 +143,143 @@ def create_shout():
         else:
             return jsonify({'error': result['error']}), 500
 
+    except RequestEntityTooLarge:
+        # A body without a Content-Length ran past the cap: the app's 413 handler answers
+        raise
+    except Exception as e:
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+
+@shouts_bp.route('/upload-url', methods=['POST'])
+def create_upload_url():
+    """Issue a presigned S3 POST policy so the browser uploads media directly"""
+    try:
+        data = request.get_json() if request.is_json else request.form.to_dict()
+
+        shout_type = data.get('type')
+
+        # Validate type (text shouts have no media to upload)
+        type_validation = ValidationService.validate_shout_type(shout_type)
+        if not type_validation['valid']:
+            return jsonify({'error': type_validation['error']}), 400
+        if shout_type == 'text':
+            return jsonify({'error': 'Text shouts do not need an upload URL'}), 400
+
+        # Reserve a hash for the object; the shout row is created on finalize
+        import secrets
+        reserved_hash = secrets.token_urlsafe(36)
+        file_ext = ValidationService.get_file_extension(shout_type)
+
+        result = ShoutService.create_upload_url(
+            reserved_hash,
+            file_ext,
+            ValidationService.CONTENT_TYPE_PREFIXES[shout_type],
+            ValidationService.MAX_FILE_SIZES[shout_type]
+        )
+
+        if result['success']:
+            return jsonify({
+                'success': True,
+                'storage_key': result['storage_key'],
+                'upload': {
+                    'url': result['url'],
+                    'fields': result['fields']
+                },
+                'max_size': ValidationService.MAX_FILE_SIZES[shout_type],
+                'expires_in': result['expires_in']
+            }), 200
+        else:
+            return jsonify({'error': result['error']}), 500
+
+    except Exception as e:
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+
+@shouts_bp.route('/finalize', methods=['POST'])
+def finalize_shout():
+    """Create a shout for media the browser uploaded directly to S3"""
+    try:
+        data = request.get_json() if request.is_json else request.form.to_dict()
+
+        shout_type = data.get('type')
+        storage_key = data.get('storage_key')
+        max_hits = data.get('maxhits', 1)
+        max_time = data.get('maxtime', 240)
+
+        # Validate type
+        type_validation = ValidationService.validate_shout_type(shout_type)
+        if not type_validation['valid']:
+            return jsonify({'error': type_validation['error']}), 400
+        if shout_type == 'text':
+            return jsonify({'error': 'Text shouts have no upload to finalize'}), 400
+
+        # Validate max_hits
+        hits_validation = ValidationService.validate_max_hits(max_hits)
+        if not hits_validation['valid']:
+            return jsonify({'error': hits_validation['error']}), 400
+        max_hits = hits_validation['value']
+
+        # Validate max_time
+        time_validation = ValidationService.validate_max_time(max_time)
+        if not time_validation['valid']:
+            return jsonify({'error': time_validation['error']}), 400
+        max_time = time_validation['value']
+
+        # Only keys issued by /upload-url, and only once (enforced again by create_shout)
+        key_validation = ValidationService.validate_storage_key(storage_key, shout_type)
+        if not key_validation['valid']:
+            return jsonify({'error': key_validation['error']}), 400
+        if ShoutService.storage_key_in_use(storage_key):
+            return jsonify({'error': 'Upload already finalized'}), 409
+
+        # Check the uploaded object
+        head_result = ShoutService.head_media(storage_key)
+        if not head_result['success']:
+            return jsonify({'error': head_result['error']}), 404
+
+        size_validation = ValidationService.validate_file_size(head_result['size'], shout_type)
+        mime_validation = ValidationService.validate_content_type(head_result['content_type'], shout_type)
+        for validation in (size_validation, mime_validation):
+            if not validation['valid']:
+                ShoutService.delete_media(storage_key)
+                return jsonify({'error': validation['error']}), 400
+
+        # Check the uploaded bytes; keep them under the extension they really have
+        read_result = ShoutService.read_media_head(storage_key)
+        if not read_result['success']:
+            return jsonify({'error': read_result['error']}), 404
+
+        content_validation = ValidationService.validate_media_content(read_result['head'], shout_type)
+        if not content_validation['valid']:
+            ShoutService.delete_media(storage_key)
+            return jsonify({'error': content_validation['error']}), 400
+
+        media_key = storage_key.rsplit('.', 1)[0] + ValidationService.get_file_extension(shout_type, head=read_result['head'])
+        if media_key != storage_key:
+            copy_result = ShoutService.copy_media(storage_key, media_key)
+            if not copy_result['success']:
+                return jsonify({'error': copy_result['error']}), 500
+
+        # Create shout
+        result = ShoutService.create_shout(
+            shout_type=shout_type,
+            max_hits=max_hits,
+            max_time_minutes=max_time,
+            storage_key=media_key,
+            upload_key=storage_key
+        )
+
+        if result['success']:
+            return jsonify({
+                'success': True,
+                'hash': result['hash'],
+                'url': f"/stream/{shout_type}/{result['hash']}"
+            }), 201
+        elif result.get('conflict'):
+            return jsonify({'error': result['error']}), 409
+        else:
+            return jsonify({'error': result['error']}), 500
+
     except Exception as e:
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
@@ -137,7 +317,12 @@ def get_shout(shout_hash):
 
             # Get media URL if needed
             if shout.get('storage_key'):
-                media_url = ShoutService.get_media_url(shout['storage_key'])
+                # Last view: sign a one-off URL that expires before the object is deleted
+                media_url = ShoutService.get_media_url(
+                    shout['storage_key'],
+                    expires_in=ShoutService.view_url_expiry(result['burned']),
+                    use_cache=not result['burned']
+                )
                 shout['media_url'] = media_url
 
             return jsonify({
@@ -145,10 +330,11 @@ def get_shout(shout_hash):
                 'shout': shout
             }), 200
         else:
+            # 'unavailable': the view can't be counted safely right now
             return jsonify({
                 'valid': False,
                 'reason': result.get('reason', 'unknown')
-            }), 404
+            }), 503 if result.get('reason') == 'unavailable' else 404
 
     except Exception as e:
         return jsonify({'error': f'Server error: {str(e)}'}), 500
@@ -1,38 +1,43 @@
-from flask import Blueprint, send_file, jsonify
-import qrcode
-import io
+from flask import Blueprint, Response, request, jsonify
+from backend.config import Config
+from backend.services.qr_service import QrService, QR_FORMATS
+from backend.services.validation import ValidationService
 
 utils_bp = Blueprint('utils', __name__, url_prefix='/api/utils')
 
+# Longer URLs don't fit a scannable QR code anyway
+MAX_QR_URL_LENGTH = 2048
+
+def qr_response(data: bytes, fmt: str, etag: str) -> Response:
+    """QR image (or 304 when data is None) with immutable caching headers"""
+    response = Response(data or b'', status=200 if data is not None else 304, mimetype=QR_FORMATS[fmt])
+    response.set_etag(etag)
+    # The image for a given URL never changes
+    response.headers['Cache-Control'] = f'public, max-age={Config.QR_CACHE_MAX_AGE}, immutable'
+    return response
+
+
 @utils_bp.route('/qr', methods=['GET'])
 def generate_qr():
-    """Generate QR code for a URL"""
-    from flask import request
-
+    """Generate QR code for a URL (?format=png|png-compact|svg&size=<box size>)"""
     url = request.args.get('url', '')
 
     if not url:
         return jsonify({'error': 'URL parameter required'}), 400
+    if len(url) > MAX_QR_URL_LENGTH:
+        return jsonify({'error': f'URL must be at most {MAX_QR_URL_LENGTH} characters'}), 400
+
+    options = ValidationService.validate_qr_options(request.args.get('format'), request.args.get('size'), QR_FORMATS)
+    if not options['valid']:
+        return jsonify({'error': options['error']}), 400
+    fmt, box_size = options['value']
 
     try:
-        # Generate QR code
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4
-        )
-        qr.add_data(url)
-        qr.make(fit=True)
-
-        img = qr.make_image(fill_color="black", back_color="white")
-
-        # Convert to bytes
-        img_buffer = io.BytesIO()
-        img.save(img_buffer, format='PNG')
-        img_buffer.seek(0)
-
-        return send_file(img_buffer, mimetype='image/png')
+        etag = QrService.etag(url, fmt, box_size)
+        if request.if_none_match.contains(etag):
+            return qr_response(None, fmt, etag)
+
+        return qr_response(QrService.get_qr(url, fmt, box_size), fmt, etag)
 
     except Exception as e:
         return jsonify({'error': f'Failed to generate QR code: {str(e)}'}), 500
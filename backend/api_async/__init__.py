@@ -0,0 +1 @@
+# Async (ASGI) API package
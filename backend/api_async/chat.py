@@ -0,0 +1,303 @@
+from quart import Blueprint, Response, request, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge
+from backend.config import Config
+from backend.services.async_chat_service import AsyncChatService
+from backend.services.async_chat_events import async_chat_events
+from backend.services.async_shout_service import AsyncShoutService
+from backend.services.chat_service import ChatService
+from backend.services.validation import ValidationService
+from datetime import datetime, timezone
+import asyncio
+import base64
+import secrets
+import json
+
+chat_bp = Blueprint('chat', __name__, url_prefix='/api/chat')
+
+@chat_bp.before_request
+async def reject_oversized_upload():
+    """Refuse an upload on its headers alone, before any of the body is read"""
+    if request.endpoint != 'chat.post_chat_message':
+        return None
+
+    options = ValidationService.upload_options(request.args, request.headers)
+    check = ValidationService.validate_upload_request(request.content_length, request.is_json, options)
+    if not check['valid']:
+        return jsonify({'error': check['error']}), check['status']
+
+    # Quart sized the body buffer's cap on arrival; lower it for the rest of the body
+    # (bodies without a Content-Length are cut off as soon as they pass it)
+    request.max_content_length = check['value']
+    if hasattr(request.body, '_max_content_length'):
+        # Private in Quart; without it the app-wide cap still applies to chunked bodies
+        request.body._max_content_length = check['value']
+    return None
+
+
+@chat_bp.route('/create', methods=['POST'])
+async def create_chat_room():
+    """Create a new chat room"""
+    try:
+        result = await AsyncChatService.create_chat_room()
+
+        if result['success']:
+            return jsonify({
+                'success': True,
+                'hash': result['hash'],
+                'chat_room': result['chat_room']
+            }), 201
+        else:
+            return jsonify({'error': result['error']}), 500
+
+    except Exception as e:
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+
+@chat_bp.route('/<chat_hash>', methods=['GET'])
+async def get_chat_room(chat_hash):
+    """Get chat room details"""
+    try:
+        result = await AsyncChatService.get_chat_room(chat_hash)
+
+        if result['success']:
+            return jsonify({'success': True, 'chat_room': result['chat_room']}), 200
+        else:
+            return jsonify({'success': False, 'error': result['error']}), 404
+
+    except Exception as e:
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+
+@chat_bp.route('/<chat_hash>/messages', methods=['GET'])
+async def get_chat_messages(chat_hash):
+    """Get messages in a chat room (only newer ones with ?since=<created_at,id>&limit=N)"""
+    try:
+        since = None
+        if request.args.get('since'):
+            cursor_validation = ValidationService.validate_message_cursor(request.args['since'])
+            if not cursor_validation['valid']:
+                return jsonify({'error': cursor_validation['error']}), 400
+            since = cursor_validation['value']
+
+        limit = None
+        if request.args.get('limit'):
+            limit_validation = ValidationService.validate_page_limit(request.args['limit'])
+            if not limit_validation['valid']:
+                return jsonify({'error': limit_validation['error']}), 400
+            limit = limit_validation['value']
+
+        messages = await AsyncChatService.get_chat_messages(chat_hash, since=since, limit=limit)
+
+        # ETag over the message data (media URLs are re-signed; only their time window counts)
+        etag = ChatService.messages_etag(messages)
+        if request.if_none_match.contains(etag):
+            response = Response('', status=304)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+        await _attach_media_urls(messages)
+
+        if messages:
+            cursor = ChatService.get_message_cursor(messages[-1])
+        else:
+            cursor = request.args.get('since')
+
+        response = jsonify({
+            'success': True,
+            'messages': messages,
+            'cursor': cursor,
+            'has_more': limit is not None and len(messages) == limit
+        })
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response, 200
+
+    except Exception as e:
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+
+@chat_bp.route('/<chat_hash>/events', methods=['GET'])
+async def stream_chat_events(chat_hash):
+    """Stream chat messages as Server-Sent Events (resume with Last-Event-ID or ?last_id=)"""
+    try:
+        chat_result = await AsyncChatService.get_chat_room(chat_hash)
+        if not chat_result['success']:
+            return jsonify({'error': chat_result['error']}), 404
+
+        last_id = request.headers.get('Last-Event-ID') or request.args.get('last_id')
+        expires_at = chat_result['chat_room']['expires_at']
+
+        # Subscribe before reading the backlog so nothing posted in between is lost
+        subscription = await async_chat_events.subscribe(chat_hash)
+
+    except Exception as e:
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+    async def generate():
+        try:
+            sent_ids = set()
+
+            yield b'retry: 3000\n\n'
+
+            backlog = await AsyncChatService.get_chat_messages(chat_hash, after_id=last_id)
+            await _attach_media_urls(backlog)
+            for message in backlog:
+                sent_ids.add(message['id'])
+                yield _format_sse(message)
+
+            while not subscription.overflowed:
+                if expires_at <= datetime.now(timezone.utc):
+                    yield b'event: expired\ndata: {}\n\n'
+                    return
+
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), Config.CHAT_EVENTS_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield b': keepalive\n\n'
+                    continue
+
+                if message['id'] in sent_ids:
+                    continue
+                sent_ids.add(message['id'])
+
+                await _attach_media_urls([message])
+                yield _format_sse(message)
+
+        finally:
+            async_chat_events.unsubscribe(subscription)
+
+    response = Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    response.timeout = None
+    return response
+
+
+@chat_bp.route('/<chat_hash>/message', methods=['POST'])
+async def post_chat_message(chat_hash):
+    """Post a new message to a chat room"""
+    try:
+        data = (await request.get_json()) if request.is_json else (await request.form).to_dict()
+
+        # Options declared ahead of the body are the defaults
+        options = ValidationService.upload_options(request.args, request.headers)
+        message_type = data.get('type', options['type'] or 'audio')
+        max_hits = int(data.get('maxhits', options['maxhits'] or 10))  # Chat messages can be viewed more
+        max_time = int(data.get('maxtime', options['maxtime'] or 5))    # But expire quickly
+
+        if options['type'] and message_type != options['type']:
+            return jsonify({'error': 'Type does not match the declared type'}), 400
+
+        type_validation = ValidationService.validate_shout_type(message_type)
+        if not type_validation['valid']:
+            return jsonify({'error': type_validation['error']}), 400
+
+        storage_key = None
+        content_text = None
+
+        if message_type == 'text':
+            text = data.get('data', '')
+            text_validation = ValidationService.validate_text_content(text)
+            if not text_validation['valid']:
+                return jsonify({'error': text_validation['error']}), 400
+            content_text = ValidationService.sanitize_text(text_validation['value'])
+
+        else:
+            # Validate chat room exists before spending an upload on it
+            chat_result = await AsyncChatService.get_chat_room(chat_hash)
+            if not chat_result['success']:
+                return jsonify({'error': 'Chat room not found or expired'}), 404
+
+            temp_hash = secrets.token_urlsafe(36)
+            file_ext = ValidationService.get_file_extension(message_type)
+            files = await request.files
+
+            if 'data' in files:
+                # Stored under the extension of what was actually uploaded
+                head = ValidationService.peek(files['data'].stream)
+                content_validation = ValidationService.validate_media_content(head, message_type)
+                if not content_validation['valid']:
+                    return jsonify({'error': content_validation['error']}), 400
+                file_ext = ValidationService.get_file_extension(message_type, head=head)
+
+                upload_result = await AsyncShoutService.upload_media_stream(
+                    files['data'].stream,
+                    temp_hash,
+                    file_ext,
+                    max_size=ValidationService.MAX_FILE_SIZES[message_type]
+                )
+                if upload_result.get('too_large'):
+                    size_validation = ValidationService.validate_file_size(upload_result['size'], message_type)
+                    return jsonify({'error': size_validation['error']}), 400
+            elif 'data' in data and isinstance(data['data'], str):
+                try:
+                    if 'data:image/' in data['data']:
+                        base64_str = data['data'].split(',')[1] if ',' in data['data'] else data['data']
+                        file_data = base64.b64decode(base64_str)
+                    else:
+                        return jsonify({'error': 'Invalid data format'}), 400
+                except Exception as e:
+                    return jsonify({'error': f'Failed to decode data: {str(e)}'}), 400
+
+                size_validation = ValidationService.validate_file_size(len(file_data), message_type)
+                if not size_validation['valid']:
+                    return jsonify({'error': size_validation['error']}), 400
+
+                content_validation = ValidationService.validate_media_content(file_data[:64], message_type)
+                if not content_validation['valid']:
+                    return jsonify({'error': content_validation['error']}), 400
+                file_ext = ValidationService.get_file_extension(message_type, head=file_data[:64])
+
+                upload_result = await AsyncShoutService.upload_media(file_data, temp_hash, file_ext)
+            else:
+                return jsonify({'error': 'No file data provided'}), 400
+
+            if not upload_result['success']:
+                return jsonify({'error': upload_result['error']}), 500
+
+            storage_key = upload_result['storage_key']
+
+        # Create the shout and its chat message in one round trip
+        message_result = await AsyncChatService.post_message(
+            chat_hash,
+            shout_type=message_type,
+            max_hits=max_hits,
+            max_time_minutes=max_time,
+            content_text=content_text,
+            storage_key=storage_key
+        )
+
+        if message_result['success']:
+            return jsonify({
+                'success': True,
+                'message': message_result['message'],
+                'shout_hash': message_result['shout_hash']
+            }), 201
+
+        # Don't leave an orphaned upload behind
+        if storage_key:
+            await AsyncShoutService.delete_media(storage_key)
+
+        if message_result.get('not_found'):
+            return jsonify({'error': 'Chat room not found or expired'}), 404
+        return jsonify({'error': 'Failed to create message'}), 500
+
+    except RequestEntityTooLarge:
+        # A body without a Content-Length ran past the cap: the app's 413 handler answers
+        raise
+    except Exception as e:
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+
+async def _attach_media_urls(messages):
+    """Add presigned media URLs to chat messages"""
+    for message in messages:
+        if message.get('shouts') and message['shouts'].get('storage_key'):
+            message['shouts']['media_url'] = await AsyncShoutService.get_media_url(message['shouts']['storage_key'])
+
+
+def _format_sse(message):
+    """Format a chat message as an SSE 'message' event"""
+    return f"id: {message['id']}\nevent: message\ndata: {json.dumps(message, default=str)}\n\n".encode()
@@ -0,0 +1,35 @@
+from quart import Blueprint, Response, request, jsonify
+from backend.config import Config
+from backend.services.media_service import MediaService
+from backend.services.async_media_service import AsyncMediaService
+
+media_bp = Blueprint('media', __name__, url_prefix='/api/media')
+
+@media_bp.route('/<storage_key>', methods=['GET'])
+async def stream_media(storage_key):
+    """Stream media behind a signed link (honors Range; ?expires=<ts>&sig=<signature>)"""
+    if not MediaService.verify(storage_key, request.args.get('expires'), request.args.get('sig')):
+        return jsonify({'error': 'Invalid or expired media link'}), 403
+
+    try:
+        # nginx fetches the object (and serves the range) itself
+        if Config.MEDIA_ACCEL_REDIRECT_PREFIX:
+            return Response(b'', status=200, headers=await AsyncMediaService.accel_redirect_headers(storage_key))
+
+        result = await AsyncMediaService.open(storage_key, request.headers.get('Range'), request.headers.get('If-Range'))
+        if not result['success']:
+            response = jsonify({'error': result['error']})
+            response.headers.update(result.get('headers', {}))
+            return response, result['status']
+
+        if request.method == 'HEAD':
+            result['body'].close()
+            response = Response(b'', status=result['status'], headers=result['headers'])
+            # An empty body would otherwise reset it to 0
+            response.headers['Content-Length'] = result['headers']['Content-Length']
+            return response
+
+        return Response(AsyncMediaService.iter_body(result['body']), status=result['status'], headers=result['headers'])
+
+    except Exception as e:
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
@@ -0,0 +1,322 @@
+from quart import Blueprint, request, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge
+from backend.services.async_shout_service import AsyncShoutService
+from backend.services.shout_service import ShoutService
+from backend.services.validation import ValidationService
+import base64
+import secrets
+
+shouts_bp = Blueprint('shouts', __name__, url_prefix='/api/shouts')
+
+@shouts_bp.before_request
+async def reject_oversized_upload():
+    """Refuse an upload on its headers alone, before any of the body is read"""
+    if request.endpoint != 'shouts.create_shout':
+        return None
+
+    options = ValidationService.upload_options(request.args, request.headers)
+    check = ValidationService.validate_upload_request(request.content_length, request.is_json, options)
+    if not check['valid']:
+        return jsonify({'error': check['error']}), check['status']
+
+    # Quart sized the body buffer's cap on arrival; lower it for the rest of the body
+    # (bodies without a Content-Length are cut off as soon as they pass it)
+    request.max_content_length = check['value']
+    if hasattr(request.body, '_max_content_length'):
+        # Private in Quart; without it the app-wide cap still applies to chunked bodies
+        request.body._max_content_length = check['value']
+    return None
+
+
+async def _request_data():
+    """JSON body or form fields, like the sync blueprints"""
+    if request.is_json:
+        return await request.get_json()
+    return (await request.form).to_dict()
+
+@shouts_bp.route('/create', methods=['POST'])
+async def create_shout():
+    """Create a new shout"""
+    try:
+        data = await _request_data()
+
+        # Validate required fields (options declared ahead of the body are the defaults)
+        options = ValidationService.upload_options(request.args, request.headers)
+        shout_type = data.get('type') or options['type']
+        max_hits = data.get('maxhits', options['maxhits'] or 1)
+        max_time = data.get('maxtime', options['maxtime'] or 240)
+
+        if options['type'] and shout_type != options['type']:
+            return jsonify({'error': 'Type does not match the declared type'}), 400
+
+        # Validate type
+        type_validation = ValidationService.validate_shout_type(shout_type)
+        if not type_validation['valid']:
+            return jsonify({'error': type_validation['error']}), 400
+
+        # Validate max_hits
+        hits_validation = ValidationService.validate_max_hits(max_hits)
+        if not hits_validation['valid']:
+            return jsonify({'error': hits_validation['error']}), 400
+        max_hits = hits_validation['value']
+
+        # Validate max_time
+        time_validation = ValidationService.validate_max_time(max_time)
+        if not time_validation['valid']:
+            return jsonify({'error': time_validation['error']}), 400
+        max_time = time_validation['value']
+
+        storage_key = None
+        content_text = None
+
+        # Handle text content
+        if shout_type == 'text':
+            text = data.get('data', '')
+            text_validation = ValidationService.validate_text_content(text)
+            if not text_validation['valid']:
+                return jsonify({'error': text_validation['error']}), 400
+
+            content_text = ValidationService.sanitize_text(text_validation['value'])
+
+        # Handle media upload
+        else:
+            temp_hash = secrets.token_urlsafe(36)
+            file_ext = ValidationService.get_file_extension(shout_type)
+            files = await request.files
+
+            if 'data' in files:
+                # Stored under the extension of what was actually uploaded
+                head = ValidationService.peek(files['data'].stream)
+                content_validation = ValidationService.validate_media_content(head, shout_type)
+                if not content_validation['valid']:
+                    return jsonify({'error': content_validation['error']}), 400
+                file_ext = ValidationService.get_file_extension(shout_type, head=head)
+
+                # Stream the file to storage; the size cap is enforced while streaming
+                upload_result = await AsyncShoutService.upload_media_stream(
+                    files['data'].stream,
+                    temp_hash,
+                    file_ext,
+                    max_size=ValidationService.MAX_FILE_SIZES[shout_type]
+                )
+                if upload_result.get('too_large'):
+                    size_validation = ValidationService.validate_file_size(upload_result['size'], shout_type)
+                    return jsonify({'error': size_validation['error']}), 400
+            elif 'data' in data and isinstance(data['data'], str):
+                # Handle base64 encoded data (for photos from canvas)
+                try:
+                    if 'data:image/' in data['data']:
+                        base64_str = data['data'].split(',')[1] if ',' in data['data'] else data['data']
+                        file_data = base64.b64decode(base64_str)
+                    else:
+                        return jsonify({'error': 'Invalid data format'}), 400
+                except Exception as e:
+                    return jsonify({'error': f'Failed to decode data: {str(e)}'}), 400
+
+                size_validation = ValidationService.validate_file_size(len(file_data), shout_type)
+                if not size_validation['valid']:
+                    return jsonify({'error': size_validation['error']}), 400
+
+                content_validation = ValidationService.validate_media_content(file_data[:64], shout_type)
+                if not content_validation['valid']:
+                    return jsonify({'error': content_validation['error']}), 400
+                file_ext = ValidationService.get_file_extension(shout_type, head=file_data[:64])
+
+                upload_result = await AsyncShoutService.upload_media(file_data, temp_hash, file_ext)
+            else:
+                return jsonify({'error': 'No file data provided'}), 400
+
+            if not upload_result['success']:
+                return jsonify({'error': upload_result['error']}), 500
+
+            storage_key = upload_result['storage_key']
+
+        # Create shout
+        result = await AsyncShoutService.create_shout(
+            shout_type=shout_type,
+            max_hits=max_hits,
+            max_time_minutes=max_time,
+            content_text=content_text,
+            storage_key=storage_key
+        )
+
+        if result['success']:
+            return jsonify({
+                'success': True,
+                'hash': result['hash'],
+                'url': f"/stream/{shout_type}/{result['hash']}"
+            }), 201
+        else:
+            return jsonify({'error': result['error']}), 500
+
+    except RequestEntityTooLarge:
+        # A body without a Content-Length ran past the cap: the app's 413 handler answers
+        raise
+    except Exception as e:
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+
+@shouts_bp.route('/upload-url', methods=['POST'])
+async def create_upload_url():
+    """Issue a presigned S3 POST policy so the browser uploads media directly"""
+    try:
+        data = await _request_data()
+
+        shout_type = data.get('type')
+
+        type_validation = ValidationService.validate_shout_type(shout_type)
+        if not type_validation['valid']:
+            return jsonify({'error': type_validation['error']}), 400
+        if shout_type == 'text':
+            return jsonify({'error': 'Text shouts do not need an upload URL'}), 400
+
+        reserved_hash = secrets.token_urlsafe(36)
+        file_ext = ValidationService.get_file_extension(shout_type)
+
+        result = await AsyncShoutService.create_upload_url(
+            reserved_hash,
+            file_ext,
+            ValidationService.CONTENT_TYPE_PREFIXES[shout_type],
+            ValidationService.MAX_FILE_SIZES[shout_type]
+        )
+
+        if result['success']:
+            return jsonify({
+                'success': True,
+                'storage_key': result['storage_key'],
+                'upload': {
+                    'url': result['url'],
+                    'fields': result['fields']
+                },
+                'max_size': ValidationService.MAX_FILE_SIZES[shout_type],
+                'expires_in': result['expires_in']
+            }), 200
+        else:
+            return jsonify({'error': result['error']}), 500
+
+    except Exception as e:
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+
+@shouts_bp.route('/finalize', methods=['POST'])
+async def finalize_shout():
+    """Create a shout for media the browser uploaded directly to S3"""
+    try:
+        data = await _request_data()
+
+        shout_type = data.get('type')
+        storage_key = data.get('storage_key')
+
+        type_validation = ValidationService.validate_shout_type(shout_type)
+        if not type_validation['valid']:
+            return jsonify({'error': type_validation['error']}), 400
+        if shout_type == 'text':
+            return jsonify({'error': 'Text shouts have no upload to finalize'}), 400
+
+        hits_validation = ValidationService.validate_max_hits(data.get('maxhits', 1))
+        if not hits_validation['valid']:
+            return jsonify({'error': hits_validation['error']}), 400
+
+        time_validation = ValidationService.validate_max_time(data.get('maxtime', 240))
+        if not time_validation['valid']:
+            return jsonify({'error': time_validation['error']}), 400
+
+        key_validation = ValidationService.validate_storage_key(storage_key, shout_type)
+        if not key_validation['valid']:
+            return jsonify({'error': key_validation['error']}), 400
+        if await AsyncShoutService.storage_key_in_use(storage_key):
+            return jsonify({'error': 'Upload already finalized'}), 409
+
+        head_result = await AsyncShoutService.head_media(storage_key)
+        if not head_result['success']:
+            return jsonify({'error': head_result['error']}), 404
+
+        size_validation = ValidationService.validate_file_size(head_result['size'], shout_type)
+        mime_validation = ValidationService.validate_content_type(head_result['content_type'], shout_type)
+        for validation in (size_validation, mime_validation):
+            if not validation['valid']:
+                await AsyncShoutService.delete_media(storage_key)
+                return jsonify({'error': validation['error']}), 400
+
+        read_result = await AsyncShoutService.read_media_head(storage_key)
+        if not read_result['success']:
+            return jsonify({'error': read_result['error']}), 404
+
+        content_validation = ValidationService.validate_media_content(read_result['head'], shout_type)
+        if not content_validation['valid']:
+            await AsyncShoutService.delete_media(storage_key)
+            return jsonify({'error': content_validation['error']}), 400
+
+        media_key = storage_key.rsplit('.', 1)[0] + ValidationService.get_file_extension(shout_type, head=read_result['head'])
+        if media_key != storage_key:
+            copy_result = await AsyncShoutService.copy_media(storage_key, media_key)
+            if not copy_result['success']:
+                return jsonify({'error': copy_result['error']}), 500
+
+        result = await AsyncShoutService.create_shout(
+            shout_type=shout_type,
+            max_hits=hits_validation['value'],
+            max_time_minutes=time_validation['value'],
+            storage_key=media_key,
+            upload_key=storage_key
+        )
+
+        if result['success']:
+            return jsonify({
+                'success': True,
+                'hash': result['hash'],
+                'url': f"/stream/{shout_type}/{result['hash']}"
+            }), 201
+        elif result.get('conflict'):
+            return jsonify({'error': result['error']}), 409
+        else:
+            return jsonify({'error': result['error']}), 500
+
+    except Exception as e:
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+
+@shouts_bp.route('/<shout_hash>', methods=['GET'])
+async def get_shout(shout_hash):
+    """Get a shout (increments view count)"""
+    try:
+        user_agent = request.headers.get('User-Agent', 'Unknown')
+        client_ip = request.remote_addr or 'Unknown'
+
+        # Check for preview mode (don't increment)
+        if request.args.get('preview', '0') == '1':
+            if await AsyncShoutService.check_shout_exists(shout_hash):
+                return jsonify({'valid': True, 'preview': True}), 200
+            return jsonify({'valid': False, 'reason': 'not_found'}), 404
+
+        result = await AsyncShoutService.get_shout(shout_hash, client_ip, user_agent)
+
+        if result.get('valid'):
+            shout = result['shout']
+
+            if shout.get('storage_key'):
+                # Last view: sign a one-off URL that expires before the object is deleted
+                shout['media_url'] = await AsyncShoutService.get_media_url(
+                    shout['storage_key'],
+                    expires_in=ShoutService.view_url_expiry(result['burned']),
+                    use_cache=not result['burned']
+                )
+
+            return jsonify({'valid': True, 'shout': shout}), 200
+        else:
+            # 'unavailable': the view can't be counted safely right now
+            status = 503 if result.get('reason') == 'unavailable' else 404
+            return jsonify({'valid': False, 'reason': result.get('reason', 'unknown')}), status
+
+    except Exception as e:
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+
+@shouts_bp.route('/check/<shout_hash>', methods=['GET'])
+async def check_shout(shout_hash):
+    """Check if a shout exists without incrementing view count"""
+    try:
+        exists = await AsyncShoutService.check_shout_exists(shout_hash)
+        return jsonify({'exists': exists}), 200
+    except Exception as e:
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
@@ -0,0 +1,58 @@
+from quart import Blueprint, Response, request, jsonify
+from backend.config import Config
+from backend.api.utils import MAX_QR_URL_LENGTH
+from backend.services.qr_service import QrService, QR_FORMATS, qr_cache
+from backend.services.validation import ValidationService
+import asyncio
+
+utils_bp = Blueprint('utils', __name__, url_prefix='/api/utils')
+
+def qr_response(data, fmt: str, etag: str) -> Response:
+    """QR image (or 304 when data is None) with immutable caching headers"""
+    response = Response(data or b'', status=200 if data is not None else 304, mimetype=QR_FORMATS[fmt])
+    response.set_etag(etag)
+    # The image for a given URL never changes
+    response.headers['Cache-Control'] = f'public, max-age={Config.QR_CACHE_MAX_AGE}, immutable'
+    return response
+
+
+@utils_bp.route('/qr', methods=['GET'])
+async def generate_qr():
+    """Generate QR code for a URL (?format=png|png-compact|svg&size=<box size>)"""
+    url = request.args.get('url', '')
+
+    if not url:
+        return jsonify({'error': 'URL parameter required'}), 400
+    if len(url) > MAX_QR_URL_LENGTH:
+        return jsonify({'error': f'URL must be at most {MAX_QR_URL_LENGTH} characters'}), 400
+
+    options = ValidationService.validate_qr_options(request.args.get('format'), request.args.get('size'), QR_FORMATS)
+    if not options['valid']:
+        return jsonify({'error': options['error']}), 400
+    fmt, box_size = options['value']
+
+    try:
+        etag = QrService.etag(url, fmt, box_size)
+        if request.if_none_match.contains(etag):
+            return qr_response(None, fmt, etag)
+
+        key = (url, fmt, box_size)
+        data = qr_cache.get(key)
+        if data is None:
+            # Rendering is CPU-bound; keep it off the event loop
+            data = await asyncio.to_thread(QrService.render, url, fmt, box_size)
+            qr_cache.put(key, data)
+
+        return qr_response(data, fmt, etag)
+
+    except Exception as e:
+        return jsonify({'error': f'Failed to generate QR code: {str(e)}'}), 500
+
+
+@utils_bp.route('/health', methods=['GET'])
+async def health_check():
+    """Health check endpoint"""
+    return jsonify({
+        'status': 'healthy',
+        'service': 'burnafterit-api'
+    }), 200
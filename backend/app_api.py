@@ -2,10 +2,15 @@ from flask import Flask, jsonify
 from flask_cors import CORS
 from backend.config import Config
 from backend.models.db_client import init_db
+from backend.models.storage_client import init_storage
+from backend.services.cleanup_scheduler import cleanup_scheduler
 from backend.api.shouts import shouts_bp
 from backend.api.chat import chat_bp
 from backend.api.utils import utils_bp
 from backend.api.admin import admin_bp
+from backend.api.media import media_bp
+from backend.api.metrics import metrics_bp
+from backend.api.rate_limit import rate_limit_bp
 import logging
 
 def create_app():
@@ -23,7 +28,8 @@ def create_app():
         r"/api/*": {
             "origins": Config.CORS_ORIGINS,
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"]
+            # X-Shout-*: upload options declared ahead of the body
+            "allow_headers": ["Content-Type", "Authorization", "X-Shout-Type", "X-Shout-Max-Hits", "X-Shout-Max-Time"]
         }
     })
 
@@ -36,11 +42,27 @@ def create_app():
     # Initialize PostgreSQL connection pool
     init_db()
 
+    # Initialize shared S3 client (keeps client construction off the request path)
+    init_storage()
+
+    # Periodic cleanup (only the replica holding the cleanup lock does the work)
+    if Config.CLEANUP_SCHEDULER_ENABLED:
+        cleanup_scheduler.start()
+
     # Register blueprints
     app.register_blueprint(shouts_bp)
     app.register_blueprint(chat_bp)
     app.register_blueprint(utils_bp)
     app.register_blueprint(admin_bp)
+    app.register_blueprint(media_bp)
+
+    # Request latency / status metrics and the /metrics endpoint
+    if Config.METRICS_ENABLED:
+        app.register_blueprint(metrics_bp)
+
+    # Per-client token-bucket limits (after metrics, so refused requests are still counted)
+    if Config.RATELIMIT_ENABLED:
+        app.register_blueprint(rate_limit_bp)
 
     # Root endpoint
     @app.route('/')
@@ -52,7 +74,9 @@ def create_app():
                 'shouts': '/api/shouts',
                 'chat': '/api/chat',
                 'utils': '/api/utils',
-                'health': '/api/utils/health'
+                'media': '/api/media',
+                'health': '/api/utils/health',
+                'metrics': '/metrics'
             }
         })
 
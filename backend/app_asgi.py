@@ -0,0 +1,113 @@
+"""
+ASGI variant of the API (Quart + asyncpg + aioboto3).
+
+Serves the same /api/* endpoints as app_api.create_app, but every request is a
+coroutine, so slow S3 transfers and long-lived SSE streams hold no worker
+thread. Run with:
+
+    hypercorn "backend.app_asgi:create_asgi_app()" --bind 0.0.0.0:5000
+    uvicorn backend.app_asgi:create_asgi_app --factory --port 5000
+"""
+from quart import Quart, jsonify
+from quart_cors import cors
+from backend.config import Config
+from backend.models import async_db_client, async_storage_client
+from backend.services.async_chat_events import async_chat_events
+from backend.services.cleanup_scheduler import cleanup_scheduler
+from backend.api_async.shouts import shouts_bp
+from backend.api_async.chat import chat_bp
+from backend.api_async.utils import utils_bp
+from backend.api_async.admin import admin_bp
+from backend.api_async.media import media_bp
+from backend.api_async.metrics import metrics_bp
+from backend.api_async.rate_limit import rate_limit_bp
+import asyncio
+import logging
+
+def create_asgi_app():
+    """Application factory"""
+
+    # Validate configuration
+    Config.validate()
+
+    # Create Quart app
+    app = Quart(__name__)
+    app.config.from_object(Config)
+
+    # Setup CORS
+    app = cors(
+        app,
+        allow_origin=Config.CORS_ORIGINS,
+        allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+        # X-Shout-*: upload options declared ahead of the body
+        allow_headers=["Content-Type", "Authorization", "X-Shout-Type", "X-Shout-Max-Hits", "X-Shout-Max-Time"]
+    )
+
+    # Setup logging
+    logging.basicConfig(
+        level=logging.DEBUG if Config.DEBUG else logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    # Pools and clients are bound to the server's event loop, so open them on startup
+    @app.before_serving
+    async def startup():
+        await async_db_client.init_db()
+        await async_storage_client.init_storage()
+
+        # Periodic cleanup runs on its own thread with the sync clients
+        if Config.CLEANUP_SCHEDULER_ENABLED:
+            cleanup_scheduler.start()
+
+    @app.after_serving
+    async def shutdown():
+        await asyncio.to_thread(cleanup_scheduler.stop)
+        await async_chat_events.stop()
+        await async_storage_client.close_storage()
+        await async_db_client.close_db()
+
+    # Register blueprints
+    app.register_blueprint(shouts_bp)
+    app.register_blueprint(chat_bp)
+    app.register_blueprint(utils_bp)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(media_bp)
+
+    # Request latency / status metrics and the /metrics endpoint
+    if Config.METRICS_ENABLED:
+        app.register_blueprint(metrics_bp)
+
+    # Per-client token-bucket limits (after metrics, so refused requests are still counted)
+    if Config.RATELIMIT_ENABLED:
+        app.register_blueprint(rate_limit_bp)
+
+    # Root endpoint
+    @app.route('/')
+    async def index():
+        return jsonify({
+            'service': 'BurnAfterIt API',
+            'version': '2.0',
+            'endpoints': {
+                'shouts': '/api/shouts',
+                'chat': '/api/chat',
+                'utils': '/api/utils',
+                'media': '/api/media',
+                'health': '/api/utils/health',
+                'metrics': '/metrics'
+            }
+        })
+
+    # Error handlers
+    @app.errorhandler(404)
+    async def not_found(error):
+        return jsonify({'error': 'Not found'}), 404
+
+    @app.errorhandler(500)
+    async def internal_error(error):
+        return jsonify({'error': 'Internal server error'}), 500
+
+    @app.errorhandler(413)
+    async def request_entity_too_large(error):
+        return jsonify({'error': 'File too large'}), 413
+
+    return app
@@ -17,6 +17,16 @@ class Config:
     POSTGRES_USER = os.environ.get('POSTGRES_USER', 'postgres')
     POSTGRES_PASSWORD = os.environ.get('POSTGRES_PASSWORD', 'postgres')
 
+    # Connection pool (per worker process)
+    DB_POOL_MIN = int(os.environ.get('DB_POOL_MIN', 1))
+    DB_POOL_MAX = int(os.environ.get('DB_POOL_MAX', 20))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 5))        # seconds to wait when exhausted
+    DB_POOL_MAX_AGE = float(os.environ.get('DB_POOL_MAX_AGE', 1800))     # recycle connections older than this
+    DB_POOL_PING_AFTER = float(os.environ.get('DB_POOL_PING_AFTER', 30))  # ping connections idle longer than this
+
+    # Server-side prepared statements for hot queries (disable behind transaction-pooling proxies)
+    DB_PREPARED_STATEMENTS = os.environ.get('DB_PREPARED_STATEMENTS', 'True').lower() == 'true'
+
     @property
     def DATABASE_URL(self):
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
@@ -30,15 +40,126 @@ class Config:
     S3_USE_SSL = os.environ.get('S3_USE_SSL', 'True').lower() == 'true'
     S3_SIGNATURE_VERSION = os.environ.get('S3_SIGNATURE_VERSION', 's3v4')
 
+    # S3 connection pool (shared client per worker process)
+    S3_MAX_POOL_CONNECTIONS = int(os.environ.get('S3_MAX_POOL_CONNECTIONS', 20))
+    S3_CONNECT_TIMEOUT = int(os.environ.get('S3_CONNECT_TIMEOUT', 5))
+    S3_READ_TIMEOUT = int(os.environ.get('S3_READ_TIMEOUT', 60))
+    S3_TCP_KEEPALIVE = os.environ.get('S3_TCP_KEEPALIVE', 'True').lower() == 'true'
+    S3_MAX_ATTEMPTS = int(os.environ.get('S3_MAX_ATTEMPTS', 3))
+    S3_RETRY_MODE = os.environ.get('S3_RETRY_MODE', 'standard')
+
+    # Streaming multipart uploads (memory per upload ~ part size * (concurrency + 1))
+    S3_MULTIPART_PART_SIZE = int(os.environ.get('S3_MULTIPART_PART_SIZE', 8 * 1024 * 1024))
+    S3_MULTIPART_CONCURRENCY = int(os.environ.get('S3_MULTIPART_CONCURRENCY', 3))
+    S3_UPLOAD_THREADS = int(os.environ.get('S3_UPLOAD_THREADS', 8))
+
+    # Presigned URL cache (URLs are reused until REFRESH_MARGIN seconds before expiry)
+    PRESIGNED_URL_CACHE_SIZE = int(os.environ.get('PRESIGNED_URL_CACHE_SIZE', 10000))
+    PRESIGNED_URL_REFRESH_MARGIN = int(os.environ.get('PRESIGNED_URL_REFRESH_MARGIN', 60))
+
+    # Media delivery: 'presigned' hands out S3 URLs, 'proxy' streams through /api/media (private S3).
+    # With proxy delivery SECRET_KEY must be shared by all workers, since it signs the media links.
+    MEDIA_DELIVERY = os.environ.get('MEDIA_DELIVERY', 'presigned')
+    MEDIA_BASE_URL = os.environ.get('MEDIA_BASE_URL', '')  # prefix for proxy links, e.g. https://api.example.com
+    MEDIA_URL_EXPIRY = int(os.environ.get('MEDIA_URL_EXPIRY', 300))  # lifetime of media links handed to viewers
+    MEDIA_STREAM_CHUNK_SIZE = int(os.environ.get('MEDIA_STREAM_CHUNK_SIZE', 256 * 1024))
+    # nginx internal location proxying to S3; when set, nginx streams the bytes instead of Python
+    MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get('MEDIA_ACCEL_REDIRECT_PREFIX', '')
+
+    # Storage cleanup (keys per DeleteObjects call, max 1000; parallel delete calls)
+    CLEANUP_BATCH_SIZE = min(int(os.environ.get('CLEANUP_BATCH_SIZE', 1000)), 1000)
+    CLEANUP_DELETE_WORKERS = int(os.environ.get('CLEANUP_DELETE_WORKERS', 4))
+
+    # Background cleanup (runs on whichever replica holds the cleanup advisory lock)
+    CLEANUP_SCHEDULER_ENABLED = os.environ.get('CLEANUP_SCHEDULER_ENABLED', 'True').lower() == 'true'
+    CLEANUP_INTERVAL = int(os.environ.get('CLEANUP_INTERVAL', 60))
+    CLEANUP_TIME_BUDGET = int(os.environ.get('CLEANUP_TIME_BUDGET', 20))
+    CLEANUP_DB_BATCH_SIZE = int(os.environ.get('CLEANUP_DB_BATCH_SIZE', 1000))
+    # Direct uploads not finalized after this many seconds are deleted (upload URLs expire after 900)
+    PENDING_UPLOAD_TTL = int(os.environ.get('PENDING_UPLOAD_TTL', 3600))
+
+    # Burn-on-read media deletion (delay gives the final viewer time to fetch the media).
+    # The final view's link expires after min(MEDIA_URL_EXPIRY, BURN_DELETE_DELAY), never after the object.
+    BURN_DELETE_DELAY = int(os.environ.get('BURN_DELETE_DELAY', 300))
+    BURN_DELETE_WORKERS = int(os.environ.get('BURN_DELETE_WORKERS', 2))
+    BURN_DELETE_QUEUE_SIZE = int(os.environ.get('BURN_DELETE_QUEUE_SIZE', 1000))
+
+    # Background transcoding of uploaded audio/video (needs an ffmpeg binary on the API workers).
+    # Lossless audio becomes Opus; video gets a bitrate- and height-capped H.264 or VP9 rendition.
+    # A replaced original is deleted TRANSCODE_REPLACED_GRACE seconds later (links already handed out).
+    TRANSCODE_ENABLED = os.environ.get('TRANSCODE_ENABLED', 'False').lower() == 'true'
+    FFMPEG_PATH = os.environ.get('FFMPEG_PATH', 'ffmpeg')
+    TRANSCODE_WORKERS = int(os.environ.get('TRANSCODE_WORKERS', 1))
+    TRANSCODE_QUEUE_SIZE = int(os.environ.get('TRANSCODE_QUEUE_SIZE', 100))
+    TRANSCODE_TIMEOUT = int(os.environ.get('TRANSCODE_TIMEOUT', 300))
+    TRANSCODE_AUDIO_BITRATE = int(os.environ.get('TRANSCODE_AUDIO_BITRATE', 48))              # kbit/s Opus
+    TRANSCODE_AUDIO_CONTAINER = os.environ.get('TRANSCODE_AUDIO_CONTAINER', 'webm')            # 'webm' or 'ogg'
+    TRANSCODE_VIDEO_CODEC = os.environ.get('TRANSCODE_VIDEO_CODEC', 'h264')                    # 'h264' (.mp4) or 'vp9' (.webm)
+    TRANSCODE_VIDEO_MAX_BITRATE = int(os.environ.get('TRANSCODE_VIDEO_MAX_BITRATE', 1500))     # kbit/s
+    TRANSCODE_VIDEO_MAX_HEIGHT = int(os.environ.get('TRANSCODE_VIDEO_MAX_HEIGHT', 720))
+    TRANSCODE_REPLACED_GRACE = int(os.environ.get('TRANSCODE_REPLACED_GRACE', 600))
+
+    # Hit logs (buffered and written with COPY outside the hit transaction)
+    HIT_LOG_BATCH_SIZE = int(os.environ.get('HIT_LOG_BATCH_SIZE', 500))
+    HIT_LOG_FLUSH_INTERVAL = float(os.environ.get('HIT_LOG_FLUSH_INTERVAL', 1.0))
+    HIT_LOG_BUFFER_SIZE = int(os.environ.get('HIT_LOG_BUFFER_SIZE', 10000))
+
+    # Redis (optional; empty disables everything that needs it)
+    REDIS_URL = os.environ.get('REDIS_URL', '')
+    REDIS_MAX_CONNECTIONS = int(os.environ.get('REDIS_MAX_CONNECTIONS', 50))
+    REDIS_SOCKET_TIMEOUT = float(os.environ.get('REDIS_SOCKET_TIMEOUT', 1.0))  # views fall back to Postgres after this
+
+    # Hot-shout tier: views of shouts with at least HOT_SHOUTS_MIN_HITS views are counted in Redis
+    # and written back to Postgres in batches every HOT_SHOUTS_FLUSH_INTERVAL seconds
+    HOT_SHOUTS_ENABLED = os.environ.get('HOT_SHOUTS_ENABLED', 'False').lower() == 'true' and bool(REDIS_URL)
+    HOT_SHOUTS_MIN_HITS = int(os.environ.get('HOT_SHOUTS_MIN_HITS', 10))
+    HOT_SHOUTS_FLUSH_INTERVAL = float(os.environ.get('HOT_SHOUTS_FLUSH_INTERVAL', 1.0))
+    HOT_SHOUTS_FLUSH_BATCH_SIZE = int(os.environ.get('HOT_SHOUTS_FLUSH_BATCH_SIZE', 500))
+
+    # Shout existence checks (previews): TTLs of cached answers and the Bloom filter of live hashes
+    EXISTENCE_CACHE_SIZE = int(os.environ.get('EXISTENCE_CACHE_SIZE', 10000))
+    EXISTENCE_CACHE_TTL = float(os.environ.get('EXISTENCE_CACHE_TTL', 30))
+    EXISTENCE_CACHE_NEGATIVE_TTL = float(os.environ.get('EXISTENCE_CACHE_NEGATIVE_TTL', 300))
+    EXISTENCE_BLOOM_CAPACITY = int(os.environ.get('EXISTENCE_BLOOM_CAPACITY', 1000000))
+    EXISTENCE_BLOOM_ERROR_RATE = float(os.environ.get('EXISTENCE_BLOOM_ERROR_RATE', 0.01))
+    EXISTENCE_BLOOM_REBUILD_INTERVAL = float(os.environ.get('EXISTENCE_BLOOM_REBUILD_INTERVAL', 3600))
+
+    # Rendered QR code cache (bytes per process) and browser/CDN cache lifetime
+    QR_CACHE_MAX_BYTES = int(os.environ.get('QR_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+    QR_CACHE_MAX_AGE = int(os.environ.get('QR_CACHE_MAX_AGE', 86400))
+
+    # Prometheus /metrics (set PROMETHEUS_MULTIPROC_DIR when running several gunicorn workers)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'
+
+    # Chat push delivery (Server-Sent Events)
+    CHAT_EVENTS_KEEPALIVE = int(os.environ.get('CHAT_EVENTS_KEEPALIVE', 15))
+    CHAT_EVENTS_QUEUE_SIZE = int(os.environ.get('CHAT_EVENTS_QUEUE_SIZE', 100))
+
     # CORS
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'http://localhost:5173').split(',')
 
     # Upload limits
     MAX_CONTENT_LENGTH = 100 * 1024 * 1024  # 100MB
 
-    # Rate limiting
-    RATELIMIT_ENABLED = True
-    RATELIMIT_STORAGE_URL = "memory://"
+    # Rate limiting: token buckets per client IP and route class (endpoint or blueprint).
+    # "N/period" allows bursts of N, refilled at N per period (second, minute, hour, day).
+    # Storage is memory:// (per worker process) or a redis:// URL (shared by all workers).
+    RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', 'True').lower() == 'true'
+    RATELIMIT_STORAGE_URL = os.environ.get('RATELIMIT_STORAGE_URL', 'memory://')
+    RATELIMIT_LIMITS = os.environ.get('RATELIMIT_LIMITS', ','.join([
+        'shouts=120/minute',
+        'shouts.create_shout=20/minute',
+        'shouts.create_upload_url=20/minute',
+        'shouts.finalize_shout=20/minute',
+        'chat=300/minute',
+        'chat.create_chat_room=20/minute',
+        'utils.generate_qr=60/minute',
+        'media=600/minute'
+    ]))
+    # Reverse proxies in front of the API (the client IP is read from X-Forwarded-For behind them)
+    RATELIMIT_TRUSTED_PROXIES = int(os.environ.get('RATELIMIT_TRUSTED_PROXIES', 0))
+    RATELIMIT_MEMORY_SHARDS = int(os.environ.get('RATELIMIT_MEMORY_SHARDS', 64))
+    RATELIMIT_MEMORY_MAX_KEYS = int(os.environ.get('RATELIMIT_MEMORY_MAX_KEYS', 100000))
 
     @staticmethod
     def validate():
@@ -54,3 +175,7 @@ class Config:
         storage_missing = [key for key in storage_required if not os.environ.get(key)]
         if storage_missing:
             raise ValueError(f"Missing required S3 storage variables: {', '.join(storage_missing)}")
+
+        # Proxy media links are signed with SECRET_KEY; a per-process random default breaks them across workers
+        if Config.MEDIA_DELIVERY == 'proxy' and not os.environ.get('SECRET_KEY'):
+            raise ValueError("SECRET_KEY must be set when MEDIA_DELIVERY is 'proxy'")
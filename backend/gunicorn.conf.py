@@ -0,0 +1,28 @@
+"""
+gunicorn settings for the Flask API:
+
+    PROMETHEUS_MULTIPROC_DIR=/tmp/burnafterit-metrics \
+        gunicorn -c backend/gunicorn.conf.py "backend.app_api:create_app()"
+
+With PROMETHEUS_MULTIPROC_DIR set, every worker writes its metrics to files
+in that directory and /metrics on any worker reports the sum of all of them.
+"""
+import os
+import shutil
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+def on_starting(server):
+    # Samples of a previous run would be added to this one
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
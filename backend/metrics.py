@@ -0,0 +1,135 @@
+"""
+Prometheus metrics for the API, database, S3 and QR rendering.
+
+Under gunicorn with several workers, set PROMETHEUS_MULTIPROC_DIR to an empty
+directory shared by the workers (wiped before each start): every worker then
+writes its samples there and /metrics aggregates all of them. See
+backend/gunicorn.conf.py.
+"""
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, CONTENT_TYPE_LATEST, generate_latest
+from prometheus_client import multiprocess
+from contextlib import contextmanager
+from typing import Any, Dict, Tuple
+import os
+import time
+
+# Request latency up to the response headers (streamed bodies are not included)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Backend calls are mostly sub-millisecond to tens of milliseconds
+BACKEND_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    'burnafterit_http_request_duration_seconds',
+    'Time to produce the response, by route',
+    ['method', 'endpoint'],
+    buckets=LATENCY_BUCKETS
+)
+HTTP_REQUESTS = Counter(
+    'burnafterit_http_requests_total',
+    'Responses by route and status code',
+    ['method', 'endpoint', 'status']
+)
+DB_POOL_WAIT = Histogram(
+    'burnafterit_db_pool_wait_seconds',
+    'Time spent waiting for a pooled database connection',
+    buckets=BACKEND_BUCKETS
+)
+# Pool saturation, summed over live workers in multiprocess mode
+DB_POOL_IN_USE = Gauge(
+    'burnafterit_db_pool_in_use_connections',
+    'Pooled database connections checked out',
+    multiprocess_mode='livesum'
+)
+DB_POOL_IDLE = Gauge(
+    'burnafterit_db_pool_idle_connections',
+    'Pooled database connections open and idle',
+    multiprocess_mode='livesum'
+)
+DB_POOL_WAITERS = Gauge(
+    'burnafterit_db_pool_waiters',
+    'Callers waiting for a pooled database connection',
+    multiprocess_mode='livesum'
+)
+DB_QUERY_DURATION = Histogram(
+    'burnafterit_db_query_duration_seconds',
+    'Database round trips by statement (prepared name or SQL verb)',
+    ['statement'],
+    buckets=BACKEND_BUCKETS
+)
+S3_REQUEST_DURATION = Histogram(
+    'burnafterit_s3_request_duration_seconds',
+    'S3 API calls by operation, until the response headers (retries included)',
+    ['operation'],
+    buckets=BACKEND_BUCKETS
+)
+S3_ERRORS = Counter(
+    'burnafterit_s3_errors_total',
+    'S3 API calls that failed, by operation',
+    ['operation']
+)
+QR_RENDER_DURATION = Histogram(
+    'burnafterit_qr_render_duration_seconds',
+    'QR code rendering on cache misses, by format',
+    ['format'],
+    buckets=BACKEND_BUCKETS
+)
+RATE_LIMITED = Counter(
+    'burnafterit_rate_limited_total',
+    'Requests refused with 429, by route class',
+    ['route']
+)
+
+def statement_label(query: str) -> str:
+    """Low-cardinality label for an ad-hoc query: its leading SQL keyword"""
+    words = query.split(None, 1)
+    return words[0].lower() if words else 'empty'
+
+@contextmanager
+def time_db(statement: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        DB_QUERY_DURATION.labels(statement=statement).observe(time.perf_counter() - start)
+
+def observe_pool(stats: Dict[str, Any]) -> None:
+    """Set the pool gauges from a pool's stats() (keys it doesn't report are left alone)"""
+    if 'in_use' in stats:
+        DB_POOL_IN_USE.set(stats['in_use'])
+    if 'idle' in stats:
+        DB_POOL_IDLE.set(stats['idle'])
+    if 'waiting' in stats:
+        DB_POOL_WAITERS.set(stats['waiting'])
+
+def observe_request(method: str, endpoint: str, status: int, seconds: float) -> None:
+    HTTP_REQUEST_DURATION.labels(method=method, endpoint=endpoint).observe(seconds)
+    HTTP_REQUESTS.labels(method=method, endpoint=endpoint, status=str(status)).inc()
+
+def instrument_s3_client(client) -> None:
+    """Time every call made through a (sync or async) boto client via its event hooks"""
+    def before_call(context, **kwargs):
+        context['metrics_start'] = time.perf_counter()
+
+    def after_call(event_name, context, http_response=None, exception=None, **kwargs):
+        start = context.pop('metrics_start', None)
+        if start is None:
+            return
+        # after-call.s3.GetObject / after-call-error.s3.GetObject
+        operation = event_name.rsplit('.', 1)[-1]
+        S3_REQUEST_DURATION.labels(operation=operation).observe(time.perf_counter() - start)
+        if exception is not None or (http_response is not None and http_response.status_code >= 400):
+            S3_ERRORS.labels(operation=operation).inc()
+
+    client.meta.events.register('before-call.s3', before_call)
+    client.meta.events.register('after-call.s3', after_call)
+    client.meta.events.register('after-call-error.s3', after_call)
+
+def render() -> Tuple[bytes, str]:
+    """Exposition of this process, or of all workers in multiprocess mode"""
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
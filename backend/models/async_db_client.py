@@ -0,0 +1,108 @@
+import asyncpg
+from backend.config import Config
+from backend.metrics import statement_label, time_db
+from typing import Optional, Dict, Any
+import json
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[asyncpg.Pool] = None
+
+async def _init_connection(conn):
+    """Decode json/jsonb like psycopg2 does"""
+    for type_name in ('json', 'jsonb'):
+        await conn.set_type_codec(
+            type_name,
+            encoder=json.dumps,
+            decoder=json.loads,
+            schema='pg_catalog'
+        )
+
+async def init_db():
+    """Initialize the asyncpg connection pool"""
+    global _pool
+
+    if _pool is None:
+        try:
+            # asyncpg prepares and caches statements per connection on its own
+            _pool = await asyncpg.create_pool(
+                min_size=Config.DB_POOL_MIN,
+                max_size=Config.DB_POOL_MAX,
+                max_inactive_connection_lifetime=Config.DB_POOL_MAX_AGE,
+                statement_cache_size=100 if Config.DB_PREPARED_STATEMENTS else 0,
+                init=_init_connection,
+                host=Config.POSTGRES_HOST,
+                port=Config.POSTGRES_PORT,
+                database=Config.POSTGRES_DB,
+                user=Config.POSTGRES_USER,
+                password=Config.POSTGRES_PASSWORD
+            )
+            logger.info("Async database connection pool initialized")
+        except Exception as e:
+            logger.error(f"Failed to initialize async database pool: {e}")
+            raise
+
+async def close_db():
+    """Close the connection pool"""
+    global _pool
+
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+def _to_dict(record) -> Dict[str, Any]:
+    """Convert a record to a dict shaped like psycopg2's (UUIDs as strings)"""
+    return {
+        key: str(value) if isinstance(value, uuid.UUID) else value
+        for key, value in record.items()
+    }
+
+def get_pool() -> asyncpg.Pool:
+    """Get the pool (init_db must have run at startup)"""
+    if _pool is None:
+        raise RuntimeError("Async database pool is not initialized")
+    return _pool
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Get connection pool gauges for this process"""
+    if _pool is None:
+        return {}
+    return {
+        'max': _pool.get_max_size(),
+        'total': _pool.get_size(),
+        'idle': _pool.get_idle_size(),
+        'in_use': _pool.get_size() - _pool.get_idle_size()
+    }
+
+def acquire():
+    """Acquire a connection; waits up to DB_POOL_TIMEOUT when exhausted"""
+    return get_pool().acquire(timeout=Config.DB_POOL_TIMEOUT)
+
+async def fetch_one(query: str, *params) -> Optional[Dict[str, Any]]:
+    """Run a query ($1..$n placeholders) and return the first row"""
+    async with acquire() as conn:
+        with time_db(statement_label(query)):
+            row = await conn.fetchrow(query, *params)
+        return _to_dict(row) if row is not None else None
+
+async def fetch_all(query: str, *params):
+    """Run a query and return all rows"""
+    async with acquire() as conn:
+        with time_db(statement_label(query)):
+            rows = await conn.fetch(query, *params)
+        return [_to_dict(row) for row in rows]
+
+async def fetch_value(query: str, *params):
+    """Run a query and return the first column of the first row"""
+    async with acquire() as conn:
+        with time_db(statement_label(query)):
+            value = await conn.fetchval(query, *params)
+        return str(value) if isinstance(value, uuid.UUID) else value
+
+async def execute(query: str, *params) -> str:
+    """Run a statement and return its status tag"""
+    async with acquire() as conn:
+        with time_db(statement_label(query)):
+            return await conn.execute(query, *params)
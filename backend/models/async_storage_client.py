@@ -0,0 +1,61 @@
+import aioboto3
+from botocore.client import Config as BotoConfig
+from backend.config import Config
+from backend.metrics import instrument_s3_client
+from contextlib import AsyncExitStack
+import logging
+
+logger = logging.getLogger(__name__)
+
+_exit_stack = None
+_s3_client = None
+
+async def init_storage():
+    """Open the shared async S3 client for this process"""
+    global _exit_stack, _s3_client
+
+    if _s3_client is None:
+        s3_config = BotoConfig(
+            signature_version=Config.S3_SIGNATURE_VERSION,
+            s3={'addressing_style': 'path'} if 'minio' in Config.S3_ENDPOINT_URL.lower() else {},
+            max_pool_connections=Config.S3_MAX_POOL_CONNECTIONS,
+            connect_timeout=Config.S3_CONNECT_TIMEOUT,
+            read_timeout=Config.S3_READ_TIMEOUT,
+            retries={
+                'max_attempts': Config.S3_MAX_ATTEMPTS,
+                'mode': Config.S3_RETRY_MODE
+            }
+        )
+
+        try:
+            session = aioboto3.Session()
+            _exit_stack = AsyncExitStack()
+            _s3_client = await _exit_stack.enter_async_context(session.client(
+                's3',
+                endpoint_url=Config.S3_ENDPOINT_URL,
+                aws_access_key_id=Config.S3_ACCESS_KEY,
+                aws_secret_access_key=Config.S3_SECRET_KEY,
+                region_name=Config.S3_REGION,
+                config=s3_config,
+                use_ssl=Config.S3_USE_SSL
+            ))
+            instrument_s3_client(_s3_client)
+            logger.info("Async S3 client initialized")
+        except Exception as e:
+            logger.error(f"Failed to initialize async S3 client: {e}")
+            raise
+
+async def close_storage():
+    """Close the shared async S3 client"""
+    global _exit_stack, _s3_client
+
+    if _exit_stack is not None:
+        await _exit_stack.aclose()
+    _exit_stack = None
+    _s3_client = None
+
+def get_s3_client():
+    """Get the shared async S3 client (init_storage must have run at startup)"""
+    if _s3_client is None:
+        raise RuntimeError("Async S3 client is not initialized")
+    return _s3_client
@@ -0,0 +1,191 @@
+import psycopg2
+from psycopg2 import pool
+from psycopg2 import extensions
+from collections import deque
+from typing import Dict, Any
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class PoolTimeout(pool.PoolError):
+    """Raised when no connection became available within the pool timeout"""
+
+
+class ConnectionPool:
+    """Thread-safe PostgreSQL connection pool with health checks.
+
+    Unlike psycopg2's SimpleConnectionPool this is safe to share between
+    threads, waits up to `timeout` seconds for a free connection instead of
+    failing instantly, recycles connections older than `max_age` and pings
+    connections that sat idle for more than `ping_after` seconds before
+    handing them out, so a Postgres restart doesn't surface as dead sockets.
+    """
+
+    def __init__(
+        self,
+        minconn: int,
+        maxconn: int,
+        timeout: float = 5.0,
+        max_age: float = 1800.0,
+        ping_after: float = 30.0,
+        **conn_kwargs
+    ):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.max_age = max_age
+        self.ping_after = ping_after
+        self._conn_kwargs = conn_kwargs
+
+        self._cond = threading.Condition()
+        self._idle = deque()        # (conn, created_at, last_used)
+        self._created = {}          # id(conn) -> created_at, for checked-out connections
+        self._total = 0
+        self._waiting = 0
+        self._closed = False
+
+        # Gauges / counters
+        self._wait_count = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._timeouts = 0
+        self._recycled = 0
+        self._failed_pings = 0
+
+        for _ in range(minconn):
+            self._idle.append((self._connect(), time.monotonic(), time.monotonic()))
+            self._total += 1
+
+    def _connect(self):
+        return psycopg2.connect(**self._conn_kwargs)
+
+    @staticmethod
+    def _close(conn) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_alive(self, conn) -> bool:
+        """Cheap liveness probe for a connection that sat idle"""
+        if conn.closed:
+            return False
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        """Check out a connection, waiting up to `timeout` seconds if exhausted"""
+        start = time.monotonic()
+        deadline = start + self.timeout
+
+        with self._cond:
+            if self._closed:
+                raise pool.PoolError("connection pool is closed")
+
+            waited = False
+            while not self._idle and self._total >= self.maxconn:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(f"no connection available within {self.timeout}s")
+                waited = True
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+            if waited:
+                wait_time = time.monotonic() - start
+                self._wait_count += 1
+                self._wait_time_total += wait_time
+                self._wait_time_max = max(self._wait_time_max, wait_time)
+
+            if self._idle:
+                conn, created_at, last_used = self._idle.pop()
+            else:
+                conn, created_at, last_used = None, None, None
+            # Reserve the slot before connecting outside the lock
+            if conn is None:
+                self._total += 1
+
+        now = time.monotonic()
+        try:
+            if conn is not None and now - created_at > self.max_age:
+                with self._cond:
+                    self._recycled += 1
+                self._close(conn)
+                conn = None
+            elif conn is not None and now - last_used > self.ping_after and not self._is_alive(conn):
+                with self._cond:
+                    self._failed_pings += 1
+                self._close(conn)
+                conn = None
+
+            if conn is None:
+                conn = self._connect()
+                created_at = time.monotonic()
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._created[id(conn)] = created_at
+        return conn
+
+    def putconn(self, conn, close: bool = False) -> None:
+        """Return a connection; broken or mid-transaction connections are discarded"""
+        if not close:
+            if conn.closed:
+                close = True
+            elif conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    close = True
+
+        with self._cond:
+            created_at = self._created.pop(id(conn), time.monotonic())
+            if close or self._closed:
+                self._total -= 1
+                self._close(conn)
+            else:
+                self._idle.append((conn, created_at, time.monotonic()))
+            self._cond.notify()
+
+    def closeall(self) -> None:
+        """Close all idle connections and refuse new checkouts"""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _, _ = self._idle.pop()
+                self._close(conn)
+                self._total -= 1
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get pool gauges (in use, idle, waiting) and wait-time counters"""
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                'max': self.maxconn,
+                'total': self._total,
+                'in_use': self._total - idle,
+                'idle': idle,
+                'waiting': self._waiting,
+                'waits': self._wait_count,
+                'wait_time_total_ms': round(self._wait_time_total * 1000, 3),
+                'wait_time_max_ms': round(self._wait_time_max * 1000, 3),
+                'timeouts': self._timeouts,
+                'recycled': self._recycled,
+                'failed_pings': self._failed_pings
+            }
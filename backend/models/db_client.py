@@ -1,44 +1,86 @@
 import psycopg2
-from psycopg2 import pool
 from psycopg2.extras import RealDictCursor
 from backend.config import Config
-from typing import Optional
+from backend.models.connection_pool import ConnectionPool
+from backend.metrics import DB_POOL_WAIT, observe_pool, statement_label, time_db
+from typing import Optional, Dict, Any, Sequence, Tuple
+import threading
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
-_connection_pool: Optional[pool.SimpleConnectionPool] = None
+_connection_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+# Errors meaning the connection itself is gone
+_DISCONNECT_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+# Named hot queries: name -> (PREPARE statement, fallback query with named placeholders)
+_prepared_statements: Dict[str, Tuple[str, str]] = {}
+
+class PreparingConnection(psycopg2.extensions.connection):
+    """Connection that remembers which named statements it has prepared"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
 
 def init_db():
     """Initialize database connection pool"""
     global _connection_pool
 
     if _connection_pool is None:
-        try:
-            _connection_pool = psycopg2.pool.SimpleConnectionPool(
-                minconn=1,
-                maxconn=20,
-                host=Config.POSTGRES_HOST,
-                port=Config.POSTGRES_PORT,
-                database=Config.POSTGRES_DB,
-                user=Config.POSTGRES_USER,
-                password=Config.POSTGRES_PASSWORD
-            )
-            logger.info("Database connection pool initialized")
-        except Exception as e:
-            logger.error(f"Failed to initialize database pool: {e}")
-            raise
+        with _pool_lock:
+            if _connection_pool is not None:
+                return
+            try:
+                _connection_pool = ConnectionPool(
+                    minconn=Config.DB_POOL_MIN,
+                    maxconn=Config.DB_POOL_MAX,
+                    timeout=Config.DB_POOL_TIMEOUT,
+                    max_age=Config.DB_POOL_MAX_AGE,
+                    ping_after=Config.DB_POOL_PING_AFTER,
+                    host=Config.POSTGRES_HOST,
+                    port=Config.POSTGRES_PORT,
+                    database=Config.POSTGRES_DB,
+                    user=Config.POSTGRES_USER,
+                    password=Config.POSTGRES_PASSWORD,
+                    connection_factory=PreparingConnection
+                )
+                logger.info("Database connection pool initialized")
+            except Exception as e:
+                logger.error(f"Failed to initialize database pool: {e}")
+                raise
 
 def get_db_connection():
-    """Get a connection from the pool"""
+    """Get a connection from the pool (waits up to DB_POOL_TIMEOUT when exhausted)"""
     if _connection_pool is None:
         init_db()
     return _connection_pool.getconn()
 
-def return_db_connection(conn):
-    """Return a connection to the pool"""
+def return_db_connection(conn, close=False):
+    """Return a connection to the pool (close=True discards it)"""
     if _connection_pool:
-        _connection_pool.putconn(conn)
+        _connection_pool.putconn(conn, close=close)
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Get connection pool gauges for this process"""
+    if _connection_pool is None:
+        return {}
+    return _connection_pool.stats()
+
+def create_session_connection():
+    """Open a dedicated autocommit connection for session state like LISTEN or advisory locks (never pooled)"""
+    conn = psycopg2.connect(
+        host=Config.POSTGRES_HOST,
+        port=Config.POSTGRES_PORT,
+        database=Config.POSTGRES_DB,
+        user=Config.POSTGRES_USER,
+        password=Config.POSTGRES_PASSWORD
+    )
+    conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+    return conn
 
 class DatabaseConnection:
     """Context manager for database connections"""
@@ -48,26 +90,39 @@ class DatabaseConnection:
         self.cursor = None
 
     def __enter__(self):
-        self.conn = get_db_connection()
+        with DB_POOL_WAIT.time():
+            self.conn = get_db_connection()
+        # Kept current on checkout/return too: in multiprocess mode a scrape
+        # only refreshes the worker that serves it
+        observe_pool(get_pool_stats())
         self.cursor = self.conn.cursor(cursor_factory=RealDictCursor)
         return self.cursor
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if exc_type is not None:
-            self.conn.rollback()
-        else:
-            self.conn.commit()
-
-        if self.cursor:
-            self.cursor.close()
+        # A dropped connection can't be reused; make sure the pool discards it
+        broken = exc_type is not None and issubclass(exc_type, _DISCONNECT_ERRORS)
+        try:
+            if exc_type is not None:
+                self.conn.rollback()
+            else:
+                self.conn.commit()
+        except _DISCONNECT_ERRORS:
+            broken = True
+            if exc_type is None:
+                raise
+        finally:
+            if self.cursor and not self.cursor.closed:
+                self.cursor.close()
 
-        if self.conn:
-            return_db_connection(self.conn)
+            if self.conn:
+                return_db_connection(self.conn, close=broken)
+                observe_pool(get_pool_stats())
 
 def execute_query(query, params=None, fetch_one=False, fetch_all=False):
     """Execute a query and return results"""
     with DatabaseConnection() as cursor:
-        cursor.execute(query, params or ())
+        with time_db(statement_label(query)):
+            cursor.execute(query, params or ())
 
         if fetch_one:
             return cursor.fetchone()
@@ -79,5 +134,46 @@ def execute_query(query, params=None, fetch_one=False, fetch_all=False):
 def execute_many(query, params_list):
     """Execute a query with multiple parameter sets"""
     with DatabaseConnection() as cursor:
-        cursor.executemany(query, params_list)
+        with time_db(statement_label(query)):
+            cursor.executemany(query, params_list)
         return cursor.rowcount
+
+def register_statement(name: str, query: str, param_types: Sequence[str] = ()):
+    """Register a hot query (with $1..$n placeholders) to run as a prepared statement.
+
+    Statements are prepared lazily on each pooled connection the first time
+    they run there, so the registry outlives connection recycling.
+    """
+    if not re.match(r'^[a-z_][a-z0-9_]*$', name):
+        raise ValueError(f"Invalid statement name: {name}")
+
+    types = f" ({', '.join(param_types)})" if param_types else ""
+    prepare_sql = f"PREPARE {name}{types} AS {query}"
+    fallback_sql = re.sub(r'\$(\d+)', r'%(p\1)s', query)
+    _prepared_statements[name] = (prepare_sql, fallback_sql)
+
+def execute_prepared(name: str, params: Sequence[Any] = (), fetch_one=False, fetch_all=False):
+    """Execute a registered statement by name and return results"""
+    prepare_sql, fallback_sql = _prepared_statements[name]
+
+    with DatabaseConnection() as cursor:
+        conn = cursor.connection
+
+        if Config.DB_PREPARED_STATEMENTS and isinstance(conn, PreparingConnection):
+            if name not in conn.prepared:
+                cursor.execute(prepare_sql)
+                conn.prepared.add(name)
+            placeholders = ', '.join(['%s'] * len(params))
+            with time_db(name):
+                cursor.execute(f"EXECUTE {name} ({placeholders})" if params else f"EXECUTE {name}", tuple(params))
+        else:
+            # e.g. behind a transaction-pooling proxy that drops session state
+            with time_db(name):
+                cursor.execute(fallback_sql, {f"p{i + 1}": value for i, value in enumerate(params)})
+
+        if fetch_one:
+            return cursor.fetchone()
+        elif fetch_all:
+            return cursor.fetchall()
+        else:
+            return cursor.rowcount
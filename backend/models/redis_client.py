@@ -0,0 +1,40 @@
+import redis
+import redis.asyncio
+from backend.config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_async_client = None
+
+def _options():
+    return {
+        'max_connections': Config.REDIS_MAX_CONNECTIONS,
+        'socket_timeout': Config.REDIS_SOCKET_TIMEOUT,
+        'socket_connect_timeout': Config.REDIS_SOCKET_TIMEOUT,
+        'health_check_interval': 30,
+        'decode_responses': True
+    }
+
+def get_redis() -> redis.Redis:
+    """Get the shared Redis client for this process (the pool reconnects after a fork)"""
+    global _client
+
+    if _client is None:
+        if not Config.REDIS_URL:
+            raise RuntimeError("REDIS_URL is not configured")
+        _client = redis.Redis.from_url(Config.REDIS_URL, **_options())
+        logger.info("Redis client initialized")
+    return _client
+
+def get_async_redis() -> redis.asyncio.Redis:
+    """Get the shared asyncio Redis client (created on first use inside the event loop)"""
+    global _async_client
+
+    if _async_client is None:
+        if not Config.REDIS_URL:
+            raise RuntimeError("REDIS_URL is not configured")
+        _async_client = redis.asyncio.Redis.from_url(Config.REDIS_URL, **_options())
+        logger.info("Async Redis client initialized")
+    return _async_client
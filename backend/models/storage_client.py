@@ -0,0 +1,83 @@
+import boto3
+from botocore.client import Config as BotoConfig
+from backend.config import Config
+from backend.metrics import instrument_s3_client
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+_s3_client = None
+_s3_lock = threading.Lock()
+_upload_executor = None
+
+def _build_s3_client():
+    """Build an S3 client with pooled, keep-alive connections and retries"""
+    s3_config = BotoConfig(
+        signature_version=Config.S3_SIGNATURE_VERSION,
+        s3={'addressing_style': 'path'} if 'minio' in Config.S3_ENDPOINT_URL.lower() else {},
+        max_pool_connections=Config.S3_MAX_POOL_CONNECTIONS,
+        connect_timeout=Config.S3_CONNECT_TIMEOUT,
+        read_timeout=Config.S3_READ_TIMEOUT,
+        tcp_keepalive=Config.S3_TCP_KEEPALIVE,
+        retries={
+            'max_attempts': Config.S3_MAX_ATTEMPTS,
+            'mode': Config.S3_RETRY_MODE
+        }
+    )
+
+    # A dedicated session keeps client creation independent of the
+    # (non thread-safe) boto3 default session
+    session = boto3.session.Session()
+    client = session.client(
+        's3',
+        endpoint_url=Config.S3_ENDPOINT_URL,
+        aws_access_key_id=Config.S3_ACCESS_KEY,
+        aws_secret_access_key=Config.S3_SECRET_KEY,
+        region_name=Config.S3_REGION,
+        config=s3_config,
+        use_ssl=Config.S3_USE_SSL
+    )
+    instrument_s3_client(client)
+    return client
+
+def init_storage():
+    """Initialize the shared S3 client for this process"""
+    global _s3_client
+
+    if _s3_client is None:
+        with _s3_lock:
+            if _s3_client is None:
+                try:
+                    _s3_client = _build_s3_client()
+                    logger.info("S3 client initialized")
+                except Exception as e:
+                    logger.error(f"Failed to initialize S3 client: {e}")
+                    raise
+
+def get_s3_client():
+    """Get the shared S3 client (boto3 clients are thread-safe)"""
+    if _s3_client is None:
+        init_storage()
+    return _s3_client
+
+def reset_storage():
+    """Drop the shared S3 client (e.g. after fork or config change)"""
+    global _s3_client
+
+    with _s3_lock:
+        _s3_client = None
+
+def get_upload_executor():
+    """Get the shared thread pool used for multipart part uploads"""
+    global _upload_executor
+
+    if _upload_executor is None:
+        with _s3_lock:
+            if _upload_executor is None:
+                _upload_executor = ThreadPoolExecutor(
+                    max_workers=Config.S3_UPLOAD_THREADS,
+                    thread_name_prefix='s3-upload'
+                )
+    return _upload_executor
@@ -0,0 +1,126 @@
+import asyncpg
+from typing import Dict, Set
+from backend.config import Config
+from backend.services.async_chat_service import AsyncChatService
+from backend.services.chat_service import CHAT_NOTIFY_CHANNEL
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+class AsyncChatSubscription:
+    """A single client's feed of new messages for one chat room"""
+
+    def __init__(self, chat_hash: str):
+        self.chat_hash = chat_hash
+        self.queue = asyncio.Queue(maxsize=Config.CHAT_EVENTS_QUEUE_SIZE)
+        # Set when the client fell behind; it must reconnect and resume
+        self.overflowed = False
+
+    def deliver(self, message) -> None:
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class AsyncChatEventBroker:
+    """Asyncio counterpart of ChatEventBroker using asyncpg's LISTEN support"""
+
+    def __init__(self, channel: str):
+        self.channel = channel
+        self._subscribers: Dict[str, Set[AsyncChatSubscription]] = {}
+        self._conn = None
+        self._lock = asyncio.Lock()
+        self._reconnect_task = None
+        self._stopped = False
+
+    async def start(self) -> None:
+        """Open the dedicated LISTEN connection"""
+        async with self._lock:
+            self._stopped = False
+            if self._conn is not None:
+                return
+            conn = await asyncpg.connect(
+                host=Config.POSTGRES_HOST,
+                port=Config.POSTGRES_PORT,
+                database=Config.POSTGRES_DB,
+                user=Config.POSTGRES_USER,
+                password=Config.POSTGRES_PASSWORD
+            )
+            conn.add_termination_listener(self._on_terminated)
+            await conn.add_listener(self.channel, self._on_notify)
+            self._conn = conn
+            logger.info(f"Listening for chat events on '{self.channel}'")
+
+    async def stop(self) -> None:
+        self._stopped = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    def _on_terminated(self, conn) -> None:
+        if self._stopped or conn is not self._conn:
+            return
+        logger.error("Chat event listener connection lost; reconnecting")
+        self._conn = None
+        # Notifications sent while disconnected are lost: open streams end and the
+        # clients resume from their last message
+        for subscribers in self._subscribers.values():
+            for subscription in subscribers:
+                subscription.overflowed = True
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        """Re-open the LISTEN connection, backing off up to 30s between attempts"""
+        delay = 1.0
+        while self._conn is None and not self._stopped:
+            try:
+                await self.start()
+            except Exception as e:
+                logger.error(f"Chat event listener reconnect failed, retrying in {delay:.0f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    async def subscribe(self, chat_hash: str) -> AsyncChatSubscription:
+        """Register a subscription for a room (reconnects the listener if needed)"""
+        await self.start()
+        subscription = AsyncChatSubscription(chat_hash)
+        self._subscribers.setdefault(chat_hash, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: AsyncChatSubscription) -> None:
+        subscribers = self._subscribers.get(subscription.chat_hash)
+        if subscribers:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.chat_hash]
+
+    def _on_notify(self, conn, pid, channel, payload) -> None:
+        asyncio.get_running_loop().create_task(self._dispatch(payload))
+
+    async def _dispatch(self, payload: str) -> None:
+        """Resolve a notification and deliver it to the room's subscribers"""
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Ignoring malformed chat event: {payload}")
+            return
+
+        subscribers = list(self._subscribers.get(event.get('chat_hash'), ()))
+        if not subscribers:
+            return
+
+        message = await AsyncChatService.get_chat_message(event['message_id'])
+        if message is None:
+            return
+
+        for subscription in subscribers:
+            subscription.deliver(message)
+
+# Process-wide broker shared by all SSE connections (one event loop per process)
+async_chat_events = AsyncChatEventBroker(CHAT_NOTIFY_CHANNEL)
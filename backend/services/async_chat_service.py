@@ -0,0 +1,191 @@
+import secrets
+import string
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Tuple
+from backend.models import async_db_client as db
+from backend.services.chat_service import ChatService, MESSAGES_SELECT, CHAT_NOTIFY_CHANNEL
+from backend.services.transcoder import media_transcoder
+import uuid
+
+class AsyncChatService:
+    """Asyncio counterpart of ChatService for the ASGI app"""
+
+    @staticmethod
+    async def create_chat_room() -> Dict[str, Any]:
+        """Create a new chat room"""
+        chars = string.ascii_letters + string.digits
+        chat_hash = ''.join(secrets.choice(chars) for _ in range(16))
+
+        # Chat rooms expire after 5 minutes
+        expires_at = datetime.now(timezone.utc) + timedelta(minutes=5)
+
+        query = """
+            INSERT INTO chat_rooms (hash, expires_at)
+            VALUES ($1, $2)
+            RETURNING id, hash, created_at, expires_at
+        """
+
+        try:
+            result = await db.fetch_one(query, chat_hash, expires_at)
+
+            if result:
+                return {
+                    'success': True,
+                    'hash': chat_hash,
+                    'chat_room': result
+                }
+            else:
+                return {
+                    'success': False,
+                    'error': 'Failed to create chat room'
+                }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    @staticmethod
+    async def get_chat_room(chat_hash: str) -> Dict[str, Any]:
+        """Get chat room details"""
+        result = await db.fetch_one("SELECT * FROM chat_rooms WHERE hash = $1", chat_hash)
+
+        if result:
+            if result['expires_at'] > datetime.now(timezone.utc):
+                return {
+                    'success': True,
+                    'chat_room': result
+                }
+            else:
+                return {
+                    'success': False,
+                    'error': 'Chat room expired'
+                }
+        else:
+            return {
+                'success': False,
+                'error': 'Chat room not found'
+            }
+
+    @staticmethod
+    async def post_message(
+        chat_hash: str,
+        shout_type: str,
+        max_hits: int,
+        max_time_minutes: int,
+        content_text: Optional[str] = None,
+        storage_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Create a shout and its chat message in a single statement (see ChatService.post_message)"""
+        shout_hash = secrets.token_urlsafe(36)
+        expires_at = datetime.now(timezone.utc) + timedelta(minutes=max_time_minutes)
+
+        query = """
+            WITH room AS (
+                SELECT id FROM chat_rooms
+                WHERE hash = $1 AND expires_at > now()
+            ), new_shout AS (
+                INSERT INTO shouts (hash, type, max_hits, max_time_minutes, content_text, storage_key, expires_at)
+                SELECT $2, $3, $4, $5, $6, $7, $8
+                FROM room
+                RETURNING id, hash
+            ), new_message AS (
+                INSERT INTO chat_messages (chat_room_id, shout_id)
+                SELECT room.id, new_shout.id FROM room, new_shout
+                RETURNING id, chat_room_id, shout_id, created_at
+            )
+            SELECT
+                new_message.id,
+                new_message.chat_room_id,
+                new_message.shout_id,
+                new_message.created_at,
+                pg_notify(
+                    $9,
+                    json_build_object('chat_hash', $1::text, 'message_id', new_message.id)::text
+                ) AS notified
+            FROM new_message
+        """
+
+        try:
+            result = await db.fetch_one(
+                query,
+                chat_hash, shout_hash, shout_type, max_hits, max_time_minutes,
+                content_text, storage_key, expires_at, CHAT_NOTIFY_CHANNEL
+            )
+
+            if result:
+                result.pop('notified', None)
+                media_transcoder.submit(shout_hash, storage_key, shout_type)
+                return {
+                    'success': True,
+                    'message': result,
+                    'shout_id': result['shout_id'],
+                    'shout_hash': shout_hash
+                }
+            else:
+                return {
+                    'success': False,
+                    'not_found': True,
+                    'error': 'Chat room not found or expired'
+                }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    @staticmethod
+    async def get_chat_message(message_id: str) -> Optional[Dict[str, Any]]:
+        """Get a single chat message with shout details"""
+        result = await db.fetch_one(MESSAGES_SELECT + " WHERE cm.id = $1", uuid.UUID(message_id))
+
+        if result:
+            return ChatService._format_message(result)
+        return None
+
+    @staticmethod
+    async def get_chat_messages(
+        chat_hash: str,
+        after_id: Optional[str] = None,
+        since: Optional[Tuple[datetime, str]] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Get messages in a chat room, oldest first (keyset cursor as in ChatService)"""
+        chat_id = await db.fetch_value("SELECT id FROM chat_rooms WHERE hash = $1", chat_hash)
+
+        if not chat_id:
+            return []
+
+        if since is None and after_id:
+            try:
+                cursor_row = await db.fetch_one(
+                    "SELECT created_at, id FROM chat_messages WHERE id = $1 AND chat_room_id = $2",
+                    uuid.UUID(str(after_id)), uuid.UUID(chat_id)
+                )
+            except ValueError:
+                cursor_row = None
+            if cursor_row:
+                since = (cursor_row['created_at'], cursor_row['id'])
+
+        # LIMIT NULL means no limit
+        if since is not None:
+            results = await db.fetch_all(
+                MESSAGES_SELECT + """
+                WHERE cm.chat_room_id = $1
+                AND (cm.created_at, cm.id) > ($2, $3)
+                ORDER BY cm.created_at ASC, cm.id ASC
+                LIMIT $4
+                """,
+                uuid.UUID(chat_id), since[0], uuid.UUID(str(since[1])), limit
+            )
+        else:
+            results = await db.fetch_all(
+                MESSAGES_SELECT + """
+                WHERE cm.chat_room_id = $1
+                ORDER BY cm.created_at ASC, cm.id ASC
+                LIMIT $2
+                """,
+                uuid.UUID(chat_id), limit
+            )
+
+        return [ChatService._format_message(row) for row in results]
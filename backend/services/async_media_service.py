@@ -0,0 +1,69 @@
+from botocore.exceptions import ClientError
+from typing import Dict, Any, AsyncIterator, Optional
+from backend.config import Config
+from backend.models.async_storage_client import get_s3_client
+from backend.services.media_service import MediaService
+
+class AsyncMediaService:
+    """Asyncio counterpart of MediaService for the ASGI app (aioboto3)"""
+
+    @staticmethod
+    async def open(storage_key: str, range_header: Optional[str] = None, if_range: Optional[str] = None) -> Dict[str, Any]:
+        """GetObject with the client's range; the caller must close result['body']"""
+        s3_client = get_s3_client()
+        byte_range = MediaService.parse_range(range_header)
+        params = {'Bucket': Config.S3_BUCKET, 'Key': storage_key}
+
+        try:
+            response = await s3_client.get_object(**params, **({'Range': byte_range} if byte_range else {}))
+            headers = MediaService.response_headers(storage_key, response)
+
+            if byte_range and not MediaService.range_still_valid(if_range, headers):
+                # Object changed since the client cached its first part: send all of it
+                response['Body'].close()
+                response = await s3_client.get_object(**params)
+                headers = MediaService.response_headers(storage_key, response)
+
+        except ClientError as e:
+            object_size = None
+            if e.response.get('Error', {}).get('Code') in ('416', 'InvalidRange'):
+                try:
+                    object_size = (await s3_client.head_object(**params))['ContentLength']
+                except Exception:
+                    pass
+            return MediaService.error_result(storage_key, e, object_size)
+
+        return {
+            'success': True,
+            'status': 206 if 'Content-Range' in headers else 200,
+            'headers': headers,
+            'body': response['Body']
+        }
+
+    @staticmethod
+    async def iter_body(body, chunk_size: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Stream an S3 body in large chunks (aiohttp hands over its buffers without copying)"""
+        chunk_size = chunk_size or Config.MEDIA_STREAM_CHUNK_SIZE
+        try:
+            while True:
+                chunk = await body.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            body.close()
+
+    @staticmethod
+    async def accel_redirect_headers(storage_key: str, expires_in: int = 300) -> Dict[str, str]:
+        """Headers that hand the transfer (Range included) over to nginx"""
+        presigned_url = await get_s3_client().generate_presigned_url(
+            'get_object',
+            Params={'Bucket': Config.S3_BUCKET, 'Key': storage_key},
+            ExpiresIn=expires_in
+        )
+        return {
+            'X-Accel-Redirect': MediaService.accel_redirect_path(presigned_url),
+            'X-Accel-Buffering': 'no',
+            'Content-Type': MediaService.content_type(storage_key),
+            'Cache-Control': 'private, no-store'
+        }
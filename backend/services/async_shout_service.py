@@ -0,0 +1,402 @@
+import secrets
+import asyncio
+import asyncpg
+from botocore.exceptions import ClientError
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional, BinaryIO
+from backend.models import async_db_client as db
+from backend.models.async_storage_client import get_s3_client
+from backend.services.shout_service import (
+    ShoutService, LIVE_SHOUT_QUERY, COLD_SHOUT_HIT_QUERY, CLAIM_UPLOAD_INSERT, STORAGE_KEY_UNIQUE_INDEX
+)
+from backend.services.existence_cache import shout_existence_cache
+from backend.services.hot_shouts import hot_shouts, HotTierUnavailable
+from backend.services.transcoder import media_transcoder
+from backend.services.media_service import MediaService
+from backend.services.url_cache import presigned_url_cache
+from backend.config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+class AsyncShoutService:
+    """Asyncio counterpart of ShoutService for the ASGI app (asyncpg + aioboto3)"""
+
+    @staticmethod
+    async def create_shout(
+        shout_type: str,
+        max_hits: int,
+        max_time_minutes: int,
+        content_text: Optional[str] = None,
+        storage_key: Optional[str] = None,
+        user_id: Optional[str] = None,
+        upload_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Create a new shout (see ShoutService.create_shout for upload_key)"""
+        shout_hash = secrets.token_urlsafe(36)
+        expires_at = datetime.now(timezone.utc) + timedelta(minutes=max_time_minutes)
+
+        params = [shout_hash, shout_type, max_hits, max_time_minutes, content_text, storage_key, user_id, expires_at,
+                  hot_shouts.counts(max_hits)]
+        if upload_key:
+            query = CLAIM_UPLOAD_INSERT.format(
+                hash='$1', type='$2', max_hits='$3', max_time_minutes='$4', content_text='$5',
+                storage_key='$6', user_id='$7', expires_at='$8', hot_tier='$9', upload_key='$10'
+            )
+            params.append(upload_key)
+        else:
+            query = """
+                INSERT INTO shouts (hash, type, max_hits, max_time_minutes, content_text, storage_key, user_id, expires_at, hot_tier)
+                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+                RETURNING id, hash, type, max_hits, max_time_minutes, content_text, storage_key, created_at, expires_at
+            """
+
+        try:
+            result = await db.fetch_one(query, *params)
+
+            if result:
+                shout_existence_cache.add(shout_hash)
+                await hot_shouts.admit_async(result, user_id)
+                media_transcoder.submit(shout_hash, storage_key, shout_type)
+                return {
+                    'success': True,
+                    'hash': shout_hash,
+                    'shout': result
+                }
+            elif upload_key:
+                return {
+                    'success': False,
+                    'conflict': True,
+                    'error': 'Upload already finalized or expired'
+                }
+            else:
+                return {
+                    'success': False,
+                    'error': 'Failed to create shout'
+                }
+        except asyncpg.exceptions.UniqueViolationError as e:
+            if e.constraint_name != STORAGE_KEY_UNIQUE_INDEX:
+                return {'success': False, 'error': str(e)}
+            return {
+                'success': False,
+                'conflict': True,
+                'error': 'Upload already finalized'
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    @staticmethod
+    async def get_shout(shout_hash: str, client_ip: str, user_agent: str) -> Dict[str, Any]:
+        """Get a shout and increment hit count"""
+        try:
+            query = "SELECT increment_shout_hit($1, $2, $3) AS result"
+            try:
+                # Multi-view shouts are counted in Redis when the hot tier has them
+                result = await hot_shouts.hit_async(shout_hash)
+                if result is not None:
+                    return ShoutService.handle_hit_result(result, client_ip, user_agent)
+            except HotTierUnavailable:
+                query = COLD_SHOUT_HIT_QUERY
+
+            row = await db.fetch_one(query, shout_hash, client_ip, user_agent)
+
+            if row is None:
+                # Counted in Redis, which is unreachable: refuse rather than risk an extra view
+                return {'valid': False, 'reason': 'unavailable'}
+            if row['result']:
+                return ShoutService.handle_hit_result(row['result'], client_ip, user_agent)
+            else:
+                return {'valid': False, 'reason': 'not_found'}
+
+        except Exception as e:
+            return {'valid': False, 'reason': 'error', 'message': str(e)}
+
+    @staticmethod
+    async def check_shout_exists(shout_hash: str) -> bool:
+        """Check if a shout can still be viewed, without incrementing hit count (cached)"""
+        exists = shout_existence_cache.lookup(shout_hash)
+        if exists is None:
+            exists = await db.fetch_value(LIVE_SHOUT_QUERY, shout_hash) is not None
+            shout_existence_cache.store(shout_hash, exists)
+        return exists
+
+    @staticmethod
+    async def storage_key_in_use(storage_key: str) -> bool:
+        """Check whether a shout already references a storage key"""
+        result = await db.fetch_value("SELECT 1 FROM shouts WHERE storage_key = $1 LIMIT 1", storage_key)
+        return result is not None
+
+    @staticmethod
+    async def upload_media(file_data: bytes, shout_hash: str, file_extension: str) -> Dict[str, Any]:
+        """Upload in-memory media (e.g. decoded base64 photos)"""
+        storage_key = f"{shout_hash}{file_extension}"
+
+        try:
+            await get_s3_client().put_object(
+                Bucket=Config.S3_BUCKET,
+                Key=storage_key,
+                Body=file_data,
+                ContentLength=len(file_data)
+            )
+            return {'success': True, 'storage_key': storage_key, 'size': len(file_data)}
+
+        except ClientError as e:
+            return {'success': False, 'error': f'S3 upload failed: {str(e)}'}
+        except Exception as e:
+            return {'success': False, 'error': f'Upload error: {str(e)}'}
+
+    @staticmethod
+    async def upload_media_stream(
+        stream: BinaryIO,
+        shout_hash: str,
+        file_extension: str,
+        max_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Stream a file object to S3 in fixed-size multipart parts.
+
+        Same contract as ShoutService.upload_media_stream; parts are uploaded
+        as concurrent tasks bounded by S3_MULTIPART_CONCURRENCY.
+        """
+        s3_client = get_s3_client()
+        storage_key = f"{shout_hash}{file_extension}"
+        part_size = Config.S3_MULTIPART_PART_SIZE
+        upload_id = None
+        tasks = []
+
+        try:
+            # The form file may be spooled to disk: read it off the event loop
+            chunk = await asyncio.to_thread(ShoutService._read_part, stream, part_size)
+            total_size = len(chunk)
+
+            if max_size is not None and total_size > max_size:
+                return {'success': False, 'too_large': True, 'size': total_size, 'error': 'File too large'}
+
+            # Small upload: a single PUT is cheaper than a multipart round trip
+            if total_size < part_size:
+                return await AsyncShoutService.upload_media(chunk, shout_hash, file_extension)
+
+            upload_id = (await s3_client.create_multipart_upload(
+                Bucket=Config.S3_BUCKET,
+                Key=storage_key
+            ))['UploadId']
+
+            slots = asyncio.Semaphore(Config.S3_MULTIPART_CONCURRENCY)
+
+            async def upload_part(part_number: int, body: bytes) -> Dict[str, Any]:
+                try:
+                    response = await s3_client.upload_part(
+                        Bucket=Config.S3_BUCKET,
+                        Key=storage_key,
+                        UploadId=upload_id,
+                        PartNumber=part_number,
+                        Body=body,
+                        ContentLength=len(body)
+                    )
+                    return {'PartNumber': part_number, 'ETag': response['ETag']}
+                finally:
+                    slots.release()
+
+            part_number = 0
+            too_large = False
+            while chunk:
+                # Wait for a free slot before buffering more of the stream
+                await slots.acquire()
+                if any(task.done() and task.exception() for task in tasks):
+                    slots.release()
+                    break
+                part_number += 1
+                tasks.append(asyncio.create_task(upload_part(part_number, chunk)))
+
+                chunk = await asyncio.to_thread(ShoutService._read_part, stream, part_size)
+                total_size += len(chunk)
+                if max_size is not None and total_size > max_size:
+                    too_large = True
+                    break
+
+            # Let in-flight parts settle so an abort leaves no stray parts
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+
+            if too_large:
+                await AsyncShoutService._abort_multipart_upload(storage_key, upload_id)
+                return {'success': False, 'too_large': True, 'size': total_size, 'error': 'File too large'}
+
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+
+            await s3_client.complete_multipart_upload(
+                Bucket=Config.S3_BUCKET,
+                Key=storage_key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': results}
+            )
+
+            return {'success': True, 'storage_key': storage_key, 'size': total_size}
+
+        except ClientError as e:
+            if upload_id:
+                await AsyncShoutService._abort_multipart_upload(storage_key, upload_id)
+            return {'success': False, 'error': f'S3 upload failed: {str(e)}'}
+        except Exception as e:
+            if upload_id:
+                await AsyncShoutService._abort_multipart_upload(storage_key, upload_id)
+            return {'success': False, 'error': f'Upload error: {str(e)}'}
+
+    @staticmethod
+    async def _abort_multipart_upload(storage_key: str, upload_id: str) -> None:
+        try:
+            await get_s3_client().abort_multipart_upload(
+                Bucket=Config.S3_BUCKET,
+                Key=storage_key,
+                UploadId=upload_id
+            )
+        except Exception as e:
+            logger.error(f"Failed to abort multipart upload {upload_id} for {storage_key}: {e}")
+
+    @staticmethod
+    async def get_media_url(storage_key: str, expires_in: int = 300, use_cache: bool = True) -> Optional[str]:
+        """Get presigned URL for media file (reused from cache while fresh)"""
+        if Config.MEDIA_DELIVERY == 'proxy':
+            return MediaService.signed_url(storage_key, expires_in)
+
+        if use_cache:
+            url = presigned_url_cache.get(storage_key, expires_in)
+            if url:
+                return url
+
+        try:
+            url = await get_s3_client().generate_presigned_url(
+                'get_object',
+                Params={
+                    'Bucket': Config.S3_BUCKET,
+                    'Key': storage_key
+                },
+                ExpiresIn=expires_in
+            )
+
+            if use_cache:
+                presigned_url_cache.put(storage_key, expires_in, url)
+
+            return url
+
+        except Exception as e:
+            logger.error(f"Error getting media URL: {e}")
+            return None
+
+    @staticmethod
+    def invalidate_media_url(storage_key: str) -> None:
+        """Forget the cached presigned URL of a burned or deleted object"""
+        presigned_url_cache.invalidate(storage_key)
+
+    @staticmethod
+    async def create_upload_url(
+        shout_hash: str,
+        file_extension: str,
+        content_type_prefix: str,
+        max_size: int,
+        expires_in: int = 900
+    ) -> Dict[str, Any]:
+        """Get a presigned POST policy for uploading media directly to S3"""
+        try:
+            storage_key = f"{shout_hash}{file_extension}"
+
+            # Recorded first: keys never finalized are deleted by the cleanup scheduler
+            await db.execute("INSERT INTO pending_uploads (storage_key) VALUES ($1)", storage_key)
+
+            post = await get_s3_client().generate_presigned_post(
+                Bucket=Config.S3_BUCKET,
+                Key=storage_key,
+                Conditions=[
+                    ['content-length-range', 1, max_size],
+                    ['starts-with', '$Content-Type', content_type_prefix]
+                ],
+                ExpiresIn=expires_in
+            )
+
+            return {
+                'success': True,
+                'storage_key': storage_key,
+                'url': post['url'],
+                'fields': post['fields'],
+                'expires_in': expires_in
+            }
+
+        except Exception as e:
+            return {'success': False, 'error': f'Failed to create upload URL: {str(e)}'}
+
+    @staticmethod
+    async def head_media(storage_key: str) -> Dict[str, Any]:
+        """Get size and content type of a stored media object"""
+        try:
+            response = await get_s3_client().head_object(Bucket=Config.S3_BUCKET, Key=storage_key)
+            return {
+                'success': True,
+                'size': response['ContentLength'],
+                'content_type': response.get('ContentType', '')
+            }
+
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return {'success': False, 'error': 'Upload not found'}
+            return {'success': False, 'error': f'S3 head failed: {str(e)}'}
+        except Exception as e:
+            return {'success': False, 'error': f'Storage error: {str(e)}'}
+
+    @staticmethod
+    async def read_media_head(storage_key: str, size: int = 64) -> Dict[str, Any]:
+        """Read the first bytes of a stored media object (ranged GET) for sniffing"""
+        try:
+            response = await get_s3_client().get_object(
+                Bucket=Config.S3_BUCKET,
+                Key=storage_key,
+                Range=f'bytes=0-{size - 1}'
+            )
+            try:
+                return {'success': True, 'head': await response['Body'].read()}
+            finally:
+                response['Body'].close()
+
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return {'success': False, 'error': 'Upload not found'}
+            return {'success': False, 'error': f'S3 read failed: {str(e)}'}
+        except Exception as e:
+            return {'success': False, 'error': f'Storage error: {str(e)}'}
+
+    @staticmethod
+    async def copy_media(source_key: str, storage_key: str) -> Dict[str, Any]:
+        """Copy an uploaded object to a new key, tracked as pending until a shout claims it"""
+        try:
+            await db.execute(
+                "INSERT INTO pending_uploads (storage_key) VALUES ($1) ON CONFLICT (storage_key) DO NOTHING",
+                storage_key
+            )
+            await get_s3_client().copy_object(
+                Bucket=Config.S3_BUCKET,
+                Key=storage_key,
+                CopySource={'Bucket': Config.S3_BUCKET, 'Key': source_key}
+            )
+            return {'success': True}
+
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return {'success': False, 'error': 'Upload not found'}
+            return {'success': False, 'error': f'S3 copy failed: {str(e)}'}
+        except Exception as e:
+            return {'success': False, 'error': f'Storage error: {str(e)}'}
+
+    @staticmethod
+    async def delete_media(storage_key: str) -> bool:
+        """Delete media file from S3"""
+        presigned_url_cache.invalidate(storage_key)
+
+        try:
+            await get_s3_client().delete_object(Bucket=Config.S3_BUCKET, Key=storage_key)
+            return True
+
+        except Exception as e:
+            logger.error(f"Error deleting media: {e}")
+            return False
@@ -0,0 +1,135 @@
+from backend.config import Config
+from backend.models.db_client import execute_query
+from backend.models.storage_client import get_s3_client
+from backend.services.url_cache import presigned_url_cache
+from typing import Dict, Any, List, Optional, Tuple
+import heapq
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class BurnDeletionQueue:
+    """Deletes burned media BURN_DELETE_DELAY seconds after its final view.
+
+    The hit itself already recorded the key in the storage_deletions outbox
+    (see increment_shout_hit), so this queue is only the fast path: anything
+    it drops, fails on, or loses in a restart is retried by the cleanup
+    scheduler from the outbox.
+    """
+
+    def __init__(self, workers: int, delay: int, max_size: int):
+        self.workers = workers
+        self.delay = delay
+        self.max_size = max_size
+        self._heap: List[Tuple[float, str]] = []
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._deleted = 0
+        self._failed = 0
+        self._dropped = 0
+
+    def enqueue(self, storage_key: str) -> None:
+        """Schedule a burned object for deletion (never blocks the caller)"""
+        with self._cond:
+            if len(self._heap) >= self.max_size:
+                # The outbox row stays, so the scheduler picks it up later
+                self._dropped += 1
+                return
+            heapq.heappush(self._heap, (time.monotonic() + self.delay, storage_key))
+            self._start_workers()
+            self._cond.notify()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'pending': len(self._heap),
+                'deleted': self._deleted,
+                'failed': self._failed,
+                'dropped': self._dropped
+            }
+
+    def _start_workers(self) -> None:
+        # Started lazily so forked workers get their own threads
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        for _ in range(self.workers - len(self._threads)):
+            thread = threading.Thread(target=self._work, name='burn-deleter', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _next_due(self) -> str:
+        with self._cond:
+            while True:
+                if self._heap:
+                    due, storage_key = self._heap[0]
+                    wait = due - time.monotonic()
+                    if wait <= 0:
+                        heapq.heappop(self._heap)
+                        # Hand the next deadline to another (possibly idle) worker
+                        if self._heap:
+                            self._cond.notify()
+                        return storage_key
+                else:
+                    wait = None
+                self._cond.wait(wait)
+
+    def _work(self) -> None:
+        while True:
+            storage_key = self._next_due()
+            error = delete_burned_media(storage_key)
+            with self._cond:
+                if error is None:
+                    self._deleted += 1
+                else:
+                    self._failed += 1
+
+
+def delete_burned_media(storage_key: str) -> Optional[str]:
+    """Delete one burned object and settle its outbox row; returns the error, if any"""
+    presigned_url_cache.invalidate(storage_key)
+
+    try:
+        get_s3_client().delete_object(Bucket=Config.S3_BUCKET, Key=storage_key)
+    except Exception as e:
+        logger.error(f"Failed to delete burned media {storage_key}: {e}")
+        record_deletion_failures([storage_key], str(e))
+        return str(e)
+
+    try:
+        complete_deletions([storage_key])
+    except Exception as e:
+        # The object is gone; the outbox retry will just delete it again
+        logger.error(f"Failed to clear outbox row for {storage_key}: {e}")
+    return None
+
+
+def complete_deletions(storage_keys: List[str]) -> None:
+    """Drop outbox rows and shout references for deleted objects"""
+    execute_query("""
+        WITH done AS (
+            DELETE FROM storage_deletions WHERE storage_key = ANY(%(keys)s)
+        )
+        UPDATE shouts SET storage_key = NULL WHERE storage_key = ANY(%(keys)s)
+    """, {'keys': storage_keys})
+
+
+def record_deletion_failures(storage_keys: List[str], error: str) -> None:
+    """Push failed outbox rows back with exponential backoff (capped at an hour)"""
+    try:
+        execute_query("""
+            UPDATE storage_deletions
+            SET attempts = attempts + 1,
+                last_error = %(error)s,
+                next_attempt_at = now() + least(interval '1 hour', interval '30 seconds' * power(2, attempts))
+            WHERE storage_key = ANY(%(keys)s)
+        """, {'keys': storage_keys, 'error': error[:500]})
+    except Exception as e:
+        logger.error(f"Failed to record deletion failure for {len(storage_keys)} keys: {e}")
+
+# Process-wide queue fed by the hit path
+burn_deletions = BurnDeletionQueue(
+    workers=Config.BURN_DELETE_WORKERS,
+    delay=Config.BURN_DELETE_DELAY,
+    max_size=Config.BURN_DELETE_QUEUE_SIZE
+)
@@ -0,0 +1,141 @@
+from typing import Dict, Set
+from backend.config import Config
+from backend.models.db_client import create_session_connection
+from backend.services.chat_service import ChatService, CHAT_NOTIFY_CHANNEL
+import threading
+import select
+import queue
+import json
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ChatSubscription:
+    """A single client's feed of new messages for one chat room"""
+
+    def __init__(self, chat_hash: str):
+        self.chat_hash = chat_hash
+        self.queue = queue.Queue(maxsize=Config.CHAT_EVENTS_QUEUE_SIZE)
+        # Set when the client fell behind; it must reconnect and resume
+        self.overflowed = False
+
+    def deliver(self, message) -> None:
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            self.overflowed = True
+
+
+class ChatEventBroker:
+    """Per-process LISTEN/NOTIFY listener that fans new chat messages out.
+
+    One background thread holds a dedicated Postgres connection listening on
+    the chat channel. Each notification is resolved to a message with a
+    single query and pushed to every subscription for that room, so the
+    database sees one read per message per process instead of one per
+    client poll.
+    """
+
+    def __init__(self, channel: str):
+        self.channel = channel
+        self._subscribers: Dict[str, Set[ChatSubscription]] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def subscribe(self, chat_hash: str) -> ChatSubscription:
+        """Register a subscription for a room (starts the listener if needed)"""
+        subscription = ChatSubscription(chat_hash)
+
+        with self._lock:
+            self._subscribers.setdefault(chat_hash, set()).add(subscription)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._listen,
+                    name='chat-events-listener',
+                    daemon=True
+                )
+                self._thread.start()
+
+        return subscription
+
+    def unsubscribe(self, subscription: ChatSubscription) -> None:
+        """Remove a subscription"""
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.chat_hash)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.chat_hash]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def _listen(self) -> None:
+        """Listener loop; reconnects after connection failures"""
+        reconnecting = False
+        while True:
+            conn = None
+            try:
+                conn = create_session_connection()
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.channel}")
+                logger.info(f"Listening for chat events on '{self.channel}'")
+
+                # Notifications sent while disconnected are lost: open streams end and
+                # the clients resume from their last message
+                if reconnecting:
+                    self._overflow_all()
+                    reconnecting = False
+
+                while True:
+                    if select.select([conn], [], [], Config.CHAT_EVENTS_KEEPALIVE) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        self._dispatch(notify.payload)
+
+            except Exception as e:
+                logger.error(f"Chat event listener failed: {e}")
+                reconnecting = True
+                time.sleep(1)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+    def _overflow_all(self) -> None:
+        """Mark every live subscription as behind, so its stream ends"""
+        with self._lock:
+            for subscribers in self._subscribers.values():
+                for subscription in subscribers:
+                    subscription.overflowed = True
+
+    def _dispatch(self, payload: str) -> None:
+        """Resolve a notification and deliver it to the room's subscribers"""
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Ignoring malformed chat event: {payload}")
+            return
+
+        with self._lock:
+            subscribers = list(self._subscribers.get(event.get('chat_hash'), ()))
+
+        # Nobody in this process is watching the room
+        if not subscribers:
+            return
+
+        message = ChatService.get_chat_message(event['message_id'])
+        if message is None:
+            return
+
+        for subscription in subscribers:
+            subscription.deliver(message)
+
+# Process-wide broker shared by all SSE connections
+chat_events = ChatEventBroker(CHAT_NOTIFY_CHANNEL)
@@ -1,8 +1,59 @@
+import hashlib
 import secrets
 import string
-from datetime import datetime, timedelta
-from typing import Dict, Any, List
-from backend.models.db_client import execute_query
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Tuple
+from backend.models.db_client import execute_query, execute_prepared, register_statement, DatabaseConnection
+from backend.services.transcoder import media_transcoder
+from backend.config import Config
+import json
+import uuid
+
+# Postgres NOTIFY channel for new chat messages
+CHAT_NOTIFY_CHANNEL = 'chat_messages'
+
+# Messages with shout details
+MESSAGES_SELECT = """
+    SELECT
+        cm.id,
+        cm.chat_room_id,
+        cm.shout_id,
+        cm.created_at,
+        s.id as shout_id,
+        s.hash as shout_hash,
+        s.type as shout_type,
+        s.content_text as shout_content_text,
+        s.storage_key as shout_storage_key,
+        s.max_hits as shout_max_hits,
+        s.current_hits as shout_current_hits
+    FROM chat_messages cm
+    JOIN shouts s ON cm.shout_id = s.id
+"""
+
+# Hot read-path queries, prepared once per pooled connection
+register_statement('chat_room_by_hash', "SELECT * FROM chat_rooms WHERE hash = $1", ('text',))
+register_statement('chat_room_id_by_hash', "SELECT id FROM chat_rooms WHERE hash = $1", ('text',))
+register_statement('chat_message_by_id', MESSAGES_SELECT + " WHERE cm.id = $1", ('uuid',))
+register_statement(
+    'chat_messages_all',
+    MESSAGES_SELECT + """
+    WHERE cm.chat_room_id = $1
+    ORDER BY cm.created_at ASC, cm.id ASC
+    LIMIT $2
+    """,
+    ('uuid', 'bigint')
+)
+register_statement(
+    'chat_messages_since',
+    MESSAGES_SELECT + """
+    WHERE cm.chat_room_id = $1
+    AND (cm.created_at, cm.id) > ($2, $3)
+    ORDER BY cm.created_at ASC, cm.id ASC
+    LIMIT $4
+    """,
+    ('uuid', 'timestamptz', 'uuid', 'bigint')
+)
 
 class ChatService:
     """Service for managing ephemeral chat rooms"""
@@ -46,14 +97,13 @@ class ChatService:
     @staticmethod
     def get_chat_room(chat_hash: str) -> Dict[str, Any]:
         """Get chat room details"""
-        query = "SELECT * FROM chat_rooms WHERE hash = %s"
-        result = execute_query(query, (chat_hash,), fetch_one=True)
+        result = execute_prepared('chat_room_by_hash', (chat_hash,), fetch_one=True)
 
         if result:
             result_dict = dict(result)
             # Check if expired
             expires_at = result_dict['expires_at']
-            if expires_at > datetime.utcnow():
+            if expires_at > datetime.now(timezone.utc):
                 return {
                     'success': True,
                     'chat_room': result_dict
@@ -73,8 +123,7 @@ class ChatService:
     def add_message_to_chat(chat_hash: str, shout_id: str) -> Dict[str, Any]:
         """Add a message (shout) to a chat room"""
         # First, get the chat room
-        chat_query = "SELECT id FROM chat_rooms WHERE hash = %s"
-        chat_result = execute_query(chat_query, (chat_hash,), fetch_one=True)
+        chat_result = execute_prepared('chat_room_id_by_hash', (chat_hash,), fetch_one=True)
 
         if not chat_result:
             return {
@@ -90,7 +139,13 @@ class ChatService:
         """
 
         try:
-            result = execute_query(query, (chat_result['id'], shout_id), fetch_one=True)
+            with DatabaseConnection() as cursor:
+                cursor.execute(query, (chat_result['id'], shout_id))
+                result = cursor.fetchone()
+
+                if result:
+                    # Delivered to listeners when this transaction commits
+                    ChatService._notify_new_message(cursor, chat_hash, result['id'])
 
             if result:
                 return {
@@ -109,55 +164,186 @@ class ChatService:
             }
 
     @staticmethod
-    def get_chat_messages(chat_hash: str) -> List[Dict[str, Any]]:
-        """Get all messages in a chat room"""
-        # Get chat room
-        chat_query = "SELECT id FROM chat_rooms WHERE hash = %s"
-        chat_result = execute_query(chat_query, (chat_hash,), fetch_one=True)
+    def post_message(
+        chat_hash: str,
+        shout_type: str,
+        max_hits: int,
+        max_time_minutes: int,
+        content_text: Optional[str] = None,
+        storage_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Create a shout and its chat message in a single statement.
 
-        if not chat_result:
-            return []
+        One round trip: the room lookup, both INSERTs and the NOTIFY run as
+        one CTE in one transaction. Returns not found when the room is
+        missing or expired.
+        """
+        shout_hash = secrets.token_urlsafe(36)
+        expires_at = datetime.utcnow() + timedelta(minutes=max_time_minutes)
 
-        # Get messages with shout details
         query = """
+            WITH room AS (
+                SELECT id FROM chat_rooms
+                WHERE hash = %(chat_hash)s AND expires_at > now()
+            ), new_shout AS (
+                INSERT INTO shouts (hash, type, max_hits, max_time_minutes, content_text, storage_key, expires_at)
+                SELECT %(shout_hash)s, %(type)s, %(max_hits)s, %(max_time_minutes)s,
+                       %(content_text)s, %(storage_key)s, %(expires_at)s
+                FROM room
+                RETURNING id, hash
+            ), new_message AS (
+                INSERT INTO chat_messages (chat_room_id, shout_id)
+                SELECT room.id, new_shout.id FROM room, new_shout
+                RETURNING id, chat_room_id, shout_id, created_at
+            )
             SELECT
-                cm.id,
-                cm.chat_room_id,
-                cm.shout_id,
-                cm.created_at,
-                s.id as shout_id,
-                s.hash as shout_hash,
-                s.type as shout_type,
-                s.content_text as shout_content_text,
-                s.storage_key as shout_storage_key,
-                s.max_hits as shout_max_hits,
-                s.current_hits as shout_current_hits
-            FROM chat_messages cm
-            JOIN shouts s ON cm.shout_id = s.id
-            WHERE cm.chat_room_id = %s
-            ORDER BY cm.created_at ASC
+                new_message.id,
+                new_message.chat_room_id,
+                new_message.shout_id,
+                new_message.created_at,
+                new_shout.hash AS shout_hash,
+                pg_notify(
+                    %(channel)s,
+                    json_build_object('chat_hash', %(chat_hash)s, 'message_id', new_message.id)::text
+                ) AS notified
+            FROM new_message
+            JOIN new_shout ON new_shout.id = new_message.shout_id
         """
 
-        results = execute_query(query, (chat_result['id'],), fetch_all=True)
+        try:
+            result = execute_query(query, {
+                'chat_hash': chat_hash,
+                'shout_hash': shout_hash,
+                'type': shout_type,
+                'max_hits': max_hits,
+                'max_time_minutes': max_time_minutes,
+                'content_text': content_text,
+                'storage_key': storage_key,
+                'expires_at': expires_at,
+                'channel': CHAT_NOTIFY_CHANNEL
+            }, fetch_one=True)
+
+            if result:
+                message = dict(result)
+                message.pop('notified', None)
+                message.pop('shout_hash', None)
+                media_transcoder.submit(shout_hash, storage_key, shout_type)
+                return {
+                    'success': True,
+                    'message': message,
+                    'shout_id': message['shout_id'],
+                    'shout_hash': shout_hash
+                }
+            else:
+                return {
+                    'success': False,
+                    'not_found': True,
+                    'error': 'Chat room not found or expired'
+                }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    @staticmethod
+    def _notify_new_message(cursor, chat_hash: str, message_id: str) -> None:
+        """Publish a new-message event on the chat NOTIFY channel"""
+        payload = json.dumps({'chat_hash': chat_hash, 'message_id': str(message_id)})
+        cursor.execute("SELECT pg_notify(%s, %s)", (CHAT_NOTIFY_CHANNEL, payload))
+
+    @staticmethod
+    def _format_message(row_dict: Dict[str, Any]) -> Dict[str, Any]:
+        """Restructure a message row to match expected format"""
+        return {
+            'id': row_dict['id'],
+            'chat_room_id': row_dict['chat_room_id'],
+            'shout_id': row_dict['shout_id'],
+            'created_at': row_dict['created_at'].isoformat() if row_dict['created_at'] else None,
+            'shouts': {
+                'type': row_dict['shout_type'],
+                'content_text': row_dict['shout_content_text'],
+                'storage_key': row_dict['shout_storage_key'],
+                'max_hits': row_dict['shout_max_hits'],
+                'current_hits': row_dict['shout_current_hits']
+            }
+        }
+
+    @staticmethod
+    def get_chat_message(message_id: str) -> Optional[Dict[str, Any]]:
+        """Get a single chat message with shout details"""
+        result = execute_prepared('chat_message_by_id', (message_id,), fetch_one=True)
+
+        if result:
+            return ChatService._format_message(dict(result))
+        return None
+
+    @staticmethod
+    def _get_message_cursor(chat_room_id: str, message_id: str) -> Optional[Dict[str, Any]]:
+        """Get (created_at, id) of a message in a room; None for unknown ids"""
+        try:
+            uuid.UUID(str(message_id))
+        except ValueError:
+            return None
+
+        query = "SELECT created_at, id FROM chat_messages WHERE id = %s AND chat_room_id = %s"
+        return execute_query(query, (message_id, chat_room_id), fetch_one=True)
+
+    @staticmethod
+    def get_chat_messages(
+        chat_hash: str,
+        after_id: Optional[str] = None,
+        since: Optional[Tuple[datetime, str]] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Get messages in a chat room, oldest first.
+
+        `since` is a (created_at, id) keyset cursor and `after_id` resolves one
+        from a message id; either way only newer messages are returned,
+        served from the (chat_room_id, created_at, id) index.
+        """
+        # Get chat room
+        chat_result = execute_prepared('chat_room_id_by_hash', (chat_hash,), fetch_one=True)
+
+        if not chat_result:
+            return []
+
+        if since is None and after_id:
+            cursor_row = ChatService._get_message_cursor(chat_result['id'], after_id)
+            if cursor_row:
+                since = (cursor_row['created_at'], cursor_row['id'])
+
+        # Get messages with shout details (LIMIT NULL means no limit)
+        if since is not None:
+            # Keyset pagination: everything after the last message the client saw
+            results = execute_prepared(
+                'chat_messages_since',
+                (chat_result['id'], since[0], since[1], limit),
+                fetch_all=True
+            )
+        else:
+            results = execute_prepared('chat_messages_all', (chat_result['id'], limit), fetch_all=True)
 
         if results:
-            # Restructure results to match expected format
-            messages = []
-            for row in results:
-                row_dict = dict(row)
-                messages.append({
-                    'id': row_dict['id'],
-                    'chat_room_id': row_dict['chat_room_id'],
-                    'shout_id': row_dict['shout_id'],
-                    'created_at': row_dict['created_at'].isoformat() if row_dict['created_at'] else None,
-                    'shouts': {
-                        'type': row_dict['shout_type'],
-                        'content_text': row_dict['shout_content_text'],
-                        'storage_key': row_dict['shout_storage_key'],
-                        'max_hits': row_dict['shout_max_hits'],
-                        'current_hits': row_dict['shout_current_hits']
-                    }
-                })
-            return messages
+            return [ChatService._format_message(dict(row)) for row in results]
 
         return []
+
+    @staticmethod
+    def get_message_cursor(message: Dict[str, Any]) -> str:
+        """Build the `since` cursor ("<created_at>,<id>") pointing at a message"""
+        return f"{message['created_at']},{message['id']}"
+
+    @staticmethod
+    def messages_etag(messages: List[Dict[str, Any]]) -> str:
+        """ETag for a page of messages, computed before media URLs are attached.
+
+        Media links expire, so pages with media also hash the current time
+        window: a 304 only confirms links handed out at most half a refresh
+        margin earlier, and every link has at least the full margin left then.
+        """
+        payload = json.dumps(messages, default=str, sort_keys=True)
+        if any(message.get('shouts') and message['shouts'].get('storage_key') for message in messages):
+            window = max(Config.PRESIGNED_URL_REFRESH_MARGIN // 2, 1)
+            payload += f"|{int(time.time()) // window}"
+        return hashlib.sha1(payload.encode()).hexdigest()
@@ -0,0 +1,133 @@
+from backend.config import Config
+from backend.models.db_client import create_session_connection
+from backend.services.cleanup_service import CleanupService
+from typing import Dict, Any, Optional
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Session advisory lock held by the replica that runs cleanup ('burn')
+CLEANUP_LOCK_ID = 0x6275726E
+
+class CleanupScheduler:
+    """Runs incremental cleanup every CLEANUP_INTERVAL seconds on one replica.
+
+    Every process runs a scheduler, but only the one holding the cleanup
+    advisory lock does any work. The lock is tied to a dedicated session, so
+    if the leader dies its connection drops, the lock is released, and another
+    replica takes over on its next tick.
+    """
+
+    def __init__(self, interval: int, time_budget: int, batch_limit: int):
+        self.interval = interval
+        self.time_budget = time_budget
+        self.batch_limit = batch_limit
+        self._lock_conn = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the scheduler thread (idempotent)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name='cleanup-scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the scheduler and give up leadership"""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.time_budget + 5)
+        self._release_leadership()
+
+    def run_forever(self) -> None:
+        """Scheduler loop; also the body of `python -m backend cleanup-worker`"""
+        logger.info(f"Cleanup scheduler started (every {self.interval}s, budget {self.time_budget}s)")
+        while not self._stop.is_set():
+            try:
+                if self._is_leader():
+                    self.run_once()
+            except Exception as e:
+                logger.error(f"Cleanup run failed: {e}")
+            self._stop.wait(self.interval)
+        self._release_leadership()
+
+    def run_once(self) -> Dict[str, Any]:
+        """Run one time-boxed cleanup pass and log its metrics"""
+        started = time.monotonic()
+        deadline = started + self.time_budget
+        metrics = {'expired_shouts': 0, 'dropped_hit_log_partitions': 0, 'deleted_chat_rooms': 0, 'db_batches': 0}
+
+        # Database: small batches until there is nothing left or the budget is spent
+        while time.monotonic() < deadline and not self._stop.is_set():
+            counts = CleanupService.cleanup_expired_content_batch(self.batch_limit)
+            metrics['db_batches'] += 1
+            for key, value in counts.items():
+                metrics[key] += value
+            if max(counts.values()) < self.batch_limit:
+                break
+
+        # Storage: whatever budget is left; unfinished keys carry over to the next run
+        metrics['abandoned_uploads'] = CleanupService.queue_abandoned_uploads(self.batch_limit)
+        burned = CleanupService.retry_storage_deletions(deadline=deadline)
+        storage = CleanupService.delete_expired_storage_files(deadline=deadline)
+        metrics['deleted_objects'] = burned['deleted'] + storage.get('deleted', 0)
+        metrics['failed_objects'] = burned['failed'] + storage.get('failed', 0)
+        metrics['duration_seconds'] = round(time.monotonic() - started, 3)
+
+        logger.info(
+            f"Cleanup run: {metrics['expired_shouts']} shouts expired, "
+            f"{metrics['dropped_hit_log_partitions']} hit log partitions dropped, "
+            f"{metrics['deleted_chat_rooms']} chat rooms deleted, "
+            f"{metrics['abandoned_uploads']} abandoned uploads queued, "
+            f"{metrics['deleted_objects']} objects deleted ({metrics['failed_objects']} failed) "
+            f"in {metrics['duration_seconds']}s"
+        )
+        return metrics
+
+    def _is_leader(self) -> bool:
+        """Check that we still hold the cleanup lock, or try to take it"""
+        if self._lock_conn is not None:
+            try:
+                with self._lock_conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                return True
+            except Exception as e:
+                # Session gone means the lock is gone too
+                logger.warning(f"Lost cleanup leadership: {e}")
+                self._release_leadership()
+
+        conn = create_session_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT pg_try_advisory_lock(%s)", (CLEANUP_LOCK_ID,))
+                acquired = cursor.fetchone()[0]
+        except Exception:
+            conn.close()
+            raise
+
+        if not acquired:
+            conn.close()
+            return False
+
+        logger.info("Acquired cleanup leadership")
+        self._lock_conn = conn
+        return True
+
+    def _release_leadership(self) -> None:
+        if self._lock_conn is not None:
+            try:
+                # Closing the session releases the advisory lock
+                self._lock_conn.close()
+            except Exception:
+                pass
+            self._lock_conn = None
+
+# Process-wide scheduler (started by the app factories when CLEANUP_SCHEDULER_ENABLED)
+cleanup_scheduler = CleanupScheduler(
+    interval=Config.CLEANUP_INTERVAL,
+    time_budget=Config.CLEANUP_TIME_BUDGET,
+    batch_limit=Config.CLEANUP_DB_BATCH_SIZE
+)
@@ -1,9 +1,28 @@
-from backend.models.db_client import execute_query
+from backend.models.db_client import execute_query, DatabaseConnection
 from backend.services.shout_service import ShoutService
+from backend.services.burn_queue import complete_deletions, record_deletion_failures
+from backend.config import Config
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, List, Optional
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Media of inactive shouts still waiting to be deleted from storage. Burned
+# shouts are left to the storage_deletions outbox, which holds their key for
+# BURN_DELETE_DELAY so the final viewer's link keeps working.
+EXPIRED_STORAGE_KEYS_QUERY = """
+    SELECT storage_key
+    FROM shouts
+    WHERE is_active = false
+    AND storage_key IS NOT NULL
+    AND NOT EXISTS (SELECT 1 FROM storage_deletions d WHERE d.storage_key = shouts.storage_key)
+"""
+
+# Storage keys S3 confirmed as deleted
+CLEAR_STORAGE_KEYS_QUERY = "UPDATE shouts SET storage_key = NULL WHERE storage_key = ANY(%s)"
+
 class CleanupService:
     """Service for cleaning up expired content"""
 
@@ -23,43 +42,163 @@ class CleanupService:
             return {'success': False, 'error': str(e)}
 
     @staticmethod
-    def delete_expired_storage_files():
-        """Delete storage files for expired shouts from S3"""
-        try:
-            # Get inactive shouts with storage keys
-            query = """
+    def cleanup_expired_content_batch(batch_limit: int) -> Dict[str, int]:
+        """Expire/delete at most batch_limit rows per table; returns the row counts"""
+        return dict(execute_query(
+            "SELECT * FROM cleanup_expired_content_batch(%s)",
+            (batch_limit,),
+            fetch_one=True
+        ))
+
+    @staticmethod
+    def queue_abandoned_uploads(batch_size: Optional[int] = None) -> int:
+        """Move direct uploads never finalized within PENDING_UPLOAD_TTL into the
+        storage_deletions outbox; returns how many keys were queued.
+
+        A stale row whose key a shout serves (a repeated finalize re-copying a
+        claimed object) is dropped without deleting the object.
+        """
+        batch_size = batch_size or Config.CLEANUP_DB_BATCH_SIZE
+        row = execute_query("""
+            WITH abandoned AS (
+                DELETE FROM pending_uploads
+                WHERE storage_key IN (
+                    SELECT storage_key
+                    FROM pending_uploads
+                    WHERE created_at <= now() - make_interval(secs => %s)
+                    ORDER BY created_at
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING storage_key
+            ), queued AS (
+                INSERT INTO storage_deletions (storage_key)
+                SELECT storage_key FROM abandoned a
+                WHERE NOT EXISTS (SELECT 1 FROM shouts s WHERE s.storage_key = a.storage_key)
+                ON CONFLICT (storage_key) DO NOTHING
+                RETURNING 1
+            )
+            SELECT count(*) AS queued FROM queued
+        """, (Config.PENDING_UPLOAD_TTL, batch_size), fetch_one=True)
+        return row['queued']
+
+    @staticmethod
+    def retry_storage_deletions(batch_size: Optional[int] = None, deadline: Optional[float] = None) -> Dict[str, int]:
+        """Delete burned media still in the storage_deletions outbox.
+
+        Only rows older than the in-process burn queue's delay (plus a margin)
+        are picked up, so this mostly handles failed or dropped deletions.
+        """
+        batch_size = min(batch_size or Config.CLEANUP_BATCH_SIZE, 1000)
+        grace_seconds = Config.BURN_DELETE_DELAY + 60
+        totals = {'deleted': 0, 'failed': 0}
+
+        while deadline is None or time.monotonic() < deadline:
+            rows = execute_query("""
                 SELECT storage_key
-                FROM shouts
-                WHERE is_active = false
-                AND storage_key IS NOT NULL
-            """
-            results = execute_query(query, fetch_all=True)
-
-            deleted_count = 0
-
-            if results:
-                for row in results:
-                    try:
-                        # Delete from S3 storage
-                        if ShoutService.delete_media(row['storage_key']):
-                            deleted_count += 1
-                            logger.info(f"Deleted storage file: {row['storage_key']}")
-                    except Exception as e:
-                        logger.error(f"Failed to delete {row['storage_key']}: {str(e)}")
-
-                # Mark as cleaned (remove storage_key reference)
-                storage_keys = [row['storage_key'] for row in results]
-                if storage_keys:
-                    placeholders = ','.join(['%s'] * len(storage_keys))
-                    update_query = f"""
-                        UPDATE shouts
-                        SET storage_key = NULL
-                        WHERE storage_key IN ({placeholders})
-                    """
-                    execute_query(update_query, tuple(storage_keys))
-
-            return {'success': True, 'deleted': deleted_count}
+                FROM storage_deletions
+                WHERE next_attempt_at <= now()
+                AND created_at <= now() - make_interval(secs => %s)
+                ORDER BY next_attempt_at
+                LIMIT %s
+            """, (grace_seconds, batch_size), fetch_all=True)
+            if not rows:
+                break
+
+            result = ShoutService.delete_media_batch([row['storage_key'] for row in rows])
+            if result['deleted']:
+                complete_deletions(result['deleted'])
+            if result['failed']:
+                record_deletion_failures(result['failed'], 'DeleteObjects failed')
+
+            totals['deleted'] += len(result['deleted'])
+            totals['failed'] += len(result['failed'])
+
+            if len(rows) < batch_size:
+                break
+
+        return totals
+
+    @staticmethod
+    def delete_expired_storage_files(
+        batch_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        deadline: Optional[float] = None
+    ):
+        """Delete storage files for expired shouts from S3.
+
+        Keys are paged out of Postgres with a server-side cursor, deleted with
+        DeleteObjects (one call per batch) on a small thread pool, and only the
+        keys S3 confirmed are cleared from their shouts. With a deadline
+        (time.monotonic() value) no new batch is started once it has passed.
+        """
+        batch_size = min(batch_size or Config.CLEANUP_BATCH_SIZE, 1000)
+        workers = workers or Config.CLEANUP_DELETE_WORKERS
+
+        totals = {'scanned': 0, 'deleted': 0, 'failed': 0, 'batches': 0}
+        started = time.perf_counter()
+
+        try:
+            with DatabaseConnection() as cursor:
+                # Named cursor: rows stay on the server until fetched
+                with cursor.connection.cursor(name='cleanup_storage_keys') as keys:
+                    keys.itersize = batch_size
+                    keys.execute(EXPIRED_STORAGE_KEYS_QUERY)
+
+                    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='cleanup') as executor:
+                        pending = set()
+
+                        while deadline is None or time.monotonic() < deadline:
+                            rows = keys.fetchmany(batch_size)
+                            if not rows:
+                                break
+
+                            storage_keys = [row[0] for row in rows]
+                            totals['scanned'] += len(storage_keys)
+                            pending.add(executor.submit(CleanupService._delete_storage_batch, storage_keys))
+
+                            # Keep at most two batches per worker in memory
+                            if len(pending) >= workers * 2:
+                                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                                CleanupService._collect_batches(done, totals)
+
+                        CleanupService._collect_batches(pending, totals)
+
+            elapsed = time.perf_counter() - started
+            totals['elapsed_seconds'] = round(elapsed, 3)
+            totals['keys_per_second'] = round(totals['deleted'] / elapsed, 1) if elapsed > 0 else 0.0
+
+            logger.info(
+                f"Storage cleanup deleted {totals['deleted']}/{totals['scanned']} files "
+                f"in {totals['batches']} batches ({totals['failed']} failed) "
+                f"in {totals['elapsed_seconds']}s, {totals['keys_per_second']} keys/s"
+            )
+            return {'success': True, **totals}
 
         except Exception as e:
             logger.error(f"Storage cleanup failed: {str(e)}")
-            return {'success': False, 'error': str(e)}
+            return {'success': False, 'error': str(e), **totals}
+
+    @staticmethod
+    def _delete_storage_batch(storage_keys: List[str]) -> Dict[str, Any]:
+        """Delete one batch from S3 and clear the keys that are gone"""
+        result = ShoutService.delete_media_batch(storage_keys)
+
+        # Mark as cleaned (remove storage_key reference); failed keys are retried next run
+        if result['deleted']:
+            try:
+                execute_query(CLEAR_STORAGE_KEYS_QUERY, (result['deleted'],))
+            except Exception as e:
+                # Deleting an already missing object succeeds, so a retry is harmless
+                logger.error(f"Failed to clear {len(result['deleted'])} storage keys: {str(e)}")
+                return {'deleted': [], 'failed': storage_keys}
+
+        return result
+
+    @staticmethod
+    def _collect_batches(futures, totals: Dict[str, Any]) -> None:
+        for future in futures:
+            result = future.result()
+            totals['batches'] += 1
+            totals['deleted'] += len(result['deleted'])
+            totals['failed'] += len(result['failed'])
@@ -0,0 +1,220 @@
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, Optional
+from backend.config import Config
+from backend.models.db_client import create_session_connection
+import hashlib
+import math
+import select
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Postgres NOTIFY channel fed by the shouts_created_notify trigger (migration 008)
+SHOUT_CREATED_CHANNEL = 'shout_created'
+
+# Every shout that can still be viewed (the partial expiry index covers it)
+LIVE_HASHES_QUERY = "SELECT hash FROM shouts WHERE is_active AND expires_at > now()"
+
+# How often the listener wakes up to check whether a rebuild is due
+LISTEN_POLL_SECONDS = 15
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (blake2b, double hashing)"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self._array = bytearray((self.bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value: str):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.bits for i in range(self.hashes))
+
+    def add(self, value: str) -> None:
+        for position in self._positions(value):
+            self._array[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        return all(self._array[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class ShoutExistenceCache:
+    """In-process answers for "is this shout still viewable?".
+
+    Positive entries live for `ttl` seconds (another process may burn the
+    shout meanwhile), negative ones for `negative_ttl` (a shout never comes
+    back). In front of both sits a Bloom filter of live hashes: a hash it has
+    never seen is rejected without a query. The filter is loaded from the
+    table and kept complete through the shout_created channel, and it is only
+    trusted while that listener is connected.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, negative_ttl: float,
+                 bloom_capacity: int, bloom_error_rate: float, rebuild_interval: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.bloom_capacity = bloom_capacity
+        self.bloom_error_rate = bloom_error_rate
+        self.rebuild_interval = rebuild_interval
+        self._entries = OrderedDict()
+        self._bloom: Optional[BloomFilter] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.hits = 0
+        self.misses = 0
+        self.bloom_rejections = 0
+        self.rebuilds = 0
+
+    def lookup(self, shout_hash: str) -> Optional[bool]:
+        """True/False when known without a query, None when the database must decide"""
+        self._start()
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(shout_hash)
+            if entry is not None:
+                exists, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(shout_hash)
+                    self.hits += 1
+                    return exists
+                del self._entries[shout_hash]
+
+            if self._bloom is not None and shout_hash not in self._bloom:
+                self.bloom_rejections += 1
+                return False
+
+            self.misses += 1
+            return None
+
+    def store(self, shout_hash: str, exists: bool) -> None:
+        """Remember a database answer"""
+        expires_at = time.monotonic() + (self.ttl if exists else self.negative_ttl)
+
+        with self._lock:
+            self._entries[shout_hash] = (exists, expires_at)
+            self._entries.move_to_end(shout_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def add(self, shout_hash: str) -> None:
+        """Record a shout created by this process (before its notification arrives)"""
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(shout_hash)
+        self.store(shout_hash, True)
+
+    def invalidate(self, shout_hash: str) -> None:
+        """A shout was burned: it is gone for good"""
+        self.store(shout_hash, False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses + self.bloom_rejections
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'bloom_rejections': self.bloom_rejections,
+                'hit_ratio': round((self.hits + self.bloom_rejections) / lookups, 4) if lookups else 0.0,
+                'bloom_ready': self._bloom is not None,
+                'bloom_hashes': self._bloom.count if self._bloom is not None else 0,
+                'rebuilds': self.rebuilds
+            }
+
+    def _start(self) -> None:
+        # Started lazily so forked workers get their own listener
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._listen, name='shout-existence-listener', daemon=True)
+                    self._thread.start()
+
+    def _set_bloom(self, bloom: Optional[BloomFilter]) -> None:
+        with self._lock:
+            self._bloom = bloom
+
+    def _add_hashes(self, hashes: Iterable[str]) -> None:
+        with self._lock:
+            if self._bloom is not None:
+                for shout_hash in hashes:
+                    self._bloom.add(shout_hash)
+
+    def _load(self, conn) -> BloomFilter:
+        """Build a filter from the table (LISTEN is already active, so nothing slips through)"""
+        bloom = BloomFilter(self.bloom_capacity, self.bloom_error_rate)
+        # WITH HOLD: named cursors need it on an autocommit connection
+        with conn.cursor(name='existence_cache_hashes', withhold=True) as cursor:
+            cursor.itersize = 10000
+            cursor.execute(LIVE_HASHES_QUERY)
+            for (shout_hash,) in cursor:
+                bloom.add(shout_hash)
+        self.rebuilds += 1
+        return bloom
+
+    def _listen(self) -> None:
+        """Listener loop; the filter is dropped while disconnected and rebuilt after"""
+        while True:
+            conn = None
+            try:
+                conn = create_session_connection()
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {SHOUT_CREATED_CHANNEL}")
+                bloom = self._load(conn)
+                self._set_bloom(bloom)
+                loaded_at = time.monotonic()
+                logger.info(f"Shout existence filter loaded with {bloom.count} hashes")
+
+                while True:
+                    reload = False
+                    if select.select([conn], [], [], LISTEN_POLL_SECONDS) != ([], [], []):
+                        conn.poll()
+                        while conn.notifies:
+                            payload = conn.notifies.pop(0).payload
+                            if payload == '*':
+                                reload = True
+                            else:
+                                self._add_hashes(payload.split(','))
+
+                    # Reload to shed expired hashes, or after a bulk insert
+                    if reload or time.monotonic() - loaded_at > self.rebuild_interval:
+                        bloom = self._load(conn)
+                        conn.poll()
+                        while conn.notifies:
+                            payload = conn.notifies.pop(0).payload
+                            if payload != '*':
+                                for shout_hash in payload.split(','):
+                                    bloom.add(shout_hash)
+                        self._set_bloom(bloom)
+                        loaded_at = time.monotonic()
+
+            except Exception as e:
+                # Notifications may be missed from here on: stop trusting the filter
+                self._set_bloom(None)
+                logger.error(f"Shout existence listener failed: {e}")
+                time.sleep(1)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+# Process-wide cache in front of ShoutService.check_shout_exists
+shout_existence_cache = ShoutExistenceCache(
+    max_entries=Config.EXISTENCE_CACHE_SIZE,
+    ttl=Config.EXISTENCE_CACHE_TTL,
+    negative_ttl=Config.EXISTENCE_CACHE_NEGATIVE_TTL,
+    bloom_capacity=Config.EXISTENCE_BLOOM_CAPACITY,
+    bloom_error_rate=Config.EXISTENCE_BLOOM_ERROR_RATE,
+    rebuild_interval=Config.EXISTENCE_BLOOM_REBUILD_INTERVAL
+)
@@ -0,0 +1,119 @@
+from backend.config import Config
+from backend.models.db_client import DatabaseConnection
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
+import atexit
+import io
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+HitLogRow = Tuple[str, Optional[str], Optional[str], datetime]
+
+def _copy_field(value) -> str:
+    """Escape a value for COPY's text format"""
+    if value is None:
+        return '\\N'
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+class HitLogWriter:
+    """Buffers hit log rows in memory and writes them to hit_logs with COPY.
+
+    Rows are flushed every HIT_LOG_FLUSH_INTERVAL seconds, or as soon as
+    HIT_LOG_BATCH_SIZE rows are waiting. Hit logs are analytics only: when the
+    buffer is full or a flush fails, rows are dropped and counted.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, max_buffer: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer: List[HitLogRow] = []
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._written = 0
+        self._dropped = 0
+        self._flushes = 0
+
+    def record(self, shout_id: str, client_ip: Optional[str], user_agent: Optional[str]) -> None:
+        """Queue a hit log row (never blocks on the database)"""
+        row = (shout_id, user_agent, client_ip, datetime.now(timezone.utc))
+        with self._cond:
+            if len(self._buffer) >= self.max_buffer:
+                self._dropped += 1
+                return
+            self._buffer.append(row)
+            self._start()
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify()
+
+    def flush(self) -> int:
+        """Write everything buffered so far; returns the number of rows written"""
+        with self._flush_lock:
+            with self._cond:
+                rows, self._buffer = self._buffer, []
+            if not rows:
+                return 0
+
+            data = io.StringIO()
+            for row in rows:
+                data.write('\t'.join(_copy_field(value) for value in row))
+                data.write('\n')
+            data.seek(0)
+
+            try:
+                with DatabaseConnection() as cursor:
+                    cursor.copy_expert(
+                        "COPY hit_logs (shout_id, user_agent, ip_address, viewed_at) FROM STDIN",
+                        data
+                    )
+            except Exception as e:
+                logger.error(f"Failed to write {len(rows)} hit logs: {e}")
+                with self._cond:
+                    self._dropped += len(rows)
+                return 0
+
+            with self._cond:
+                self._written += len(rows)
+                self._flushes += 1
+            return len(rows)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'buffered': len(self._buffer),
+                'written': self._written,
+                'dropped': self._dropped,
+                'flushes': self._flushes
+            }
+
+    def _start(self) -> None:
+        # Started lazily so forked workers get their own thread
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='hit-log-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if len(self._buffer) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+            self.flush()
+
+# Process-wide writer fed by the hit path
+hit_log_writer = HitLogWriter(
+    batch_size=Config.HIT_LOG_BATCH_SIZE,
+    flush_interval=Config.HIT_LOG_FLUSH_INTERVAL,
+    max_buffer=Config.HIT_LOG_BUFFER_SIZE
+)
+
+# Don't lose the last partial batch on a clean shutdown
+atexit.register(hit_log_writer.flush)
@@ -0,0 +1,364 @@
+from backend.config import Config
+from backend.models.db_client import execute_query
+from backend.models.redis_client import get_redis, get_async_redis
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+import atexit
+import json
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class HotTierUnavailable(Exception):
+    """Redis could not be asked; it may be counting the shout's views"""
+
+KEY_PREFIX = 'hot_shout:'
+DIRTY_KEY = 'hot_shouts:dirty'
+
+# Keys outlive their shout a little, so a used-up shout keeps being refused by
+# Redis (Postgres may not have its last views yet) and late flushes find it
+KEY_GRACE_SECONDS = 300
+
+# KEYS: shout key, dirty set. ARGV: now (epoch seconds), hash.
+# nil: not a hot shout (or past its expiry) - Postgres decides.
+# The final view also drops the cached shout, so its content doesn't outlive it.
+HIT_SCRIPT = """
+local fields = redis.call('HMGET', KEYS[1], 'expires_at', 'remaining', 'shout')
+if not fields[1] or tonumber(fields[1]) <= tonumber(ARGV[1]) then
+  return false
+end
+local remaining = tonumber(fields[2])
+if remaining <= 0 then
+  return {'expired_hits'}
+end
+redis.call('HSET', KEYS[1], 'remaining', remaining - 1)
+if remaining == 1 then
+  redis.call('HDEL', KEYS[1], 'shout')
+end
+redis.call('HINCRBY', KEYS[1], 'pending', 1)
+redis.call('SADD', KEYS[2], ARGV[2])
+return {'valid', remaining, fields[3]}
+"""
+
+# KEYS: dirty set. ARGV: batch size, key prefix.
+# Pops dirty hashes and hands over their unflushed views: {hash, views, ...}
+TAKE_SCRIPT = """
+local taken = {}
+for _, hash in ipairs(redis.call('SPOP', KEYS[1], ARGV[1])) do
+  local key = ARGV[2] .. hash
+  local pending = tonumber(redis.call('HGET', key, 'pending') or '0')
+  if pending > 0 then
+    redis.call('HSET', key, 'pending', 0)
+    table.insert(taken, hash)
+    table.insert(taken, pending)
+  end
+end
+return taken
+"""
+
+# KEYS: dirty set. ARGV: key prefix, then hash/views pairs that failed to flush
+GIVE_BACK_SCRIPT = """
+for i = 2, #ARGV, 2 do
+  local key = ARGV[1] .. ARGV[i]
+  if redis.call('EXISTS', key) == 1 then
+    redis.call('HINCRBY', key, 'pending', ARGV[i + 1])
+    redis.call('SADD', KEYS[1], ARGV[i])
+  end
+end
+return 0
+"""
+
+# ARGV: key prefix, then hash/remaining pairs as Postgres sees them after a flush.
+# Views Postgres counted on its own (Redis was unreachable) shrink the Redis allowance.
+CAP_SCRIPT = """
+for i = 2, #ARGV, 2 do
+  local key = ARGV[1] .. ARGV[i]
+  local remaining = redis.call('HGET', key, 'remaining')
+  if remaining then
+    local allowed = tonumber(ARGV[i + 1]) - tonumber(redis.call('HGET', key, 'pending') or '0')
+    if allowed < 0 then
+      allowed = 0
+    end
+    if tonumber(remaining) > allowed then
+      redis.call('HSET', key, 'remaining', allowed)
+    end
+    if allowed == 0 then
+      redis.call('HDEL', key, 'shout')
+    end
+  end
+end
+return 0
+"""
+
+# KEYS: shout key. ARGV: storage key. Points a cached shout at a replacement object.
+STORAGE_KEY_SCRIPT = """
+local shout = redis.call('HGET', KEYS[1], 'shout')
+if not shout then
+  return 0
+end
+local decoded = cjson.decode(shout)
+decoded['storage_key'] = ARGV[1]
+redis.call('HSET', KEYS[1], 'shout', cjson.encode(decoded))
+return 1
+"""
+
+# Write views back and queue the media of shouts that are now used up, as
+# increment_shout_hit does for views counted in Postgres
+FLUSH_HITS_QUERY = """
+    WITH counted AS (
+        UPDATE shouts s
+        SET current_hits = LEAST(s.max_hits, s.current_hits + v.hits)
+        FROM unnest(%s::text[], %s::int[]) AS v(hash, hits)
+        WHERE s.hash = v.hash
+        RETURNING s.hash, s.storage_key, s.current_hits, s.max_hits
+    ), queued AS (
+        INSERT INTO storage_deletions (storage_key)
+        SELECT storage_key FROM counted
+        WHERE current_hits >= max_hits AND storage_key IS NOT NULL
+        ON CONFLICT (storage_key) DO NOTHING
+    )
+    SELECT hash, max_hits - current_hits AS remaining FROM counted
+"""
+
+def _json_default(value):
+    # Same timestamp format as row_to_json, so both tiers return identical shouts
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+class HotShoutStore:
+    """Redis tier for the view counters of multi-view shouts.
+
+    Shouts with at least `min_hits` views are copied to Redis when created.
+    Their views are then counted by a Lua script (one atomic decrement, so
+    Redis alone enforces max_hits) and written back to Postgres in batches
+    by a background thread. Postgres stays the source of truth: creation and
+    expiry are decided there, and any shout Redis doesn't know, or any view
+    made while Redis is unreachable, goes through increment_shout_hit as
+    before. Shouts Redis counts are flagged `hot_tier` in Postgres, and the
+    fallback refuses them while Redis is unreachable: Postgres doesn't have
+    their latest views, and once Redis is back it would serve views
+    Postgres had already used up.
+    """
+
+    def __init__(self, enabled: bool, min_hits: int, flush_interval: float, batch_size: int):
+        self.enabled = enabled
+        self.min_hits = min_hits
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._scripts = None
+        self._async_scripts = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.admitted = 0
+        self.hits = 0
+        self.fallbacks = 0
+        self.flushed = 0
+        self.flush_errors = 0
+
+    def admit(self, shout: Dict[str, Any], user_id: Optional[str] = None) -> None:
+        """Copy a newly created shout to Redis if it is worth it (never raises)"""
+        if not self._eligible(shout):
+            return
+        try:
+            key, fields, expire_at = self._entry(shout, user_id)
+            pipe = get_redis().pipeline(transaction=True)
+            pipe.hset(key, mapping=fields)
+            pipe.expireat(key, expire_at)
+            pipe.execute()
+            self._count('admitted')
+        except Exception as e:
+            logger.error(f"Failed to admit shout to Redis, it stays on Postgres: {e}")
+
+    async def admit_async(self, shout: Dict[str, Any], user_id: Optional[str] = None) -> None:
+        """admit() for the ASGI app"""
+        if not self._eligible(shout):
+            return
+        try:
+            key, fields, expire_at = self._entry(shout, user_id)
+            async with get_async_redis().pipeline(transaction=True) as pipe:
+                pipe.hset(key, mapping=fields)
+                pipe.expireat(key, expire_at)
+                await pipe.execute()
+            self._count('admitted')
+        except Exception as e:
+            logger.error(f"Failed to admit shout to Redis, it stays on Postgres: {e}")
+
+    def counts(self, max_hits: int) -> bool:
+        """Whether views of a new shout allowing max_hits views are counted in Redis"""
+        return self.enabled and max_hits >= self.min_hits
+
+    def hit(self, shout_hash: str) -> Optional[Dict[str, Any]]:
+        """Count a view in Redis; None when Postgres has to count it.
+
+        Raises HotTierUnavailable when Redis fails: only shouts not flagged
+        hot_tier may then be counted in Postgres.
+        """
+        if not self.enabled:
+            return None
+        try:
+            reply = self._get_scripts()['hit'](keys=[KEY_PREFIX + shout_hash, DIRTY_KEY], args=[time.time(), shout_hash])
+        except Exception as e:
+            logger.warning(f"Redis hit failed, falling back to Postgres for shouts it doesn't count: {e}")
+            self._count('fallbacks')
+            raise HotTierUnavailable() from e
+        return self._hit_result(reply)
+
+    async def hit_async(self, shout_hash: str) -> Optional[Dict[str, Any]]:
+        """hit() for the ASGI app"""
+        if not self.enabled:
+            return None
+        try:
+            reply = await self._get_async_scripts()['hit'](
+                keys=[KEY_PREFIX + shout_hash, DIRTY_KEY], args=[time.time(), shout_hash]
+            )
+        except Exception as e:
+            logger.warning(f"Redis hit failed, falling back to Postgres for shouts it doesn't count: {e}")
+            self._count('fallbacks')
+            raise HotTierUnavailable() from e
+        return self._hit_result(reply)
+
+    def replace_storage_key(self, shout_hash: str, storage_key: str) -> None:
+        """Serve a hot shout's media from a new object (e.g. after transcoding)"""
+        if not self.enabled:
+            return
+        try:
+            self._get_scripts()['storage_key'](keys=[KEY_PREFIX + shout_hash], args=[storage_key])
+        except Exception as e:
+            # Views keep the old object until Redis forgets the shout
+            logger.warning(f"Failed to update storage key of hot shout: {e}")
+
+    def flush(self) -> int:
+        """Write up to one batch of views back to Postgres; returns the number of shouts updated"""
+        if not self.enabled:
+            return 0
+        with self._flush_lock:
+            scripts = self._get_scripts()
+            try:
+                taken = scripts['take'](keys=[DIRTY_KEY], args=[self.batch_size, KEY_PREFIX])
+            except Exception as e:
+                logger.error(f"Failed to take hot shout views from Redis: {e}")
+                self._count('flush_errors')
+                return 0
+            if not taken:
+                return 0
+
+            hashes = taken[0::2]
+            views = [int(count) for count in taken[1::2]]
+
+            try:
+                rows = execute_query(FLUSH_HITS_QUERY, (hashes, views), fetch_all=True)
+            except Exception as e:
+                logger.error(f"Failed to write views of {len(hashes)} hot shouts: {e}")
+                self._count('flush_errors')
+                self._give_back(hashes, views)
+                return 0
+
+            try:
+                scripts['cap'](keys=[], args=[KEY_PREFIX] + self._pairs((row['hash'], row['remaining']) for row in rows))
+            except Exception as e:
+                logger.warning(f"Failed to sync hot shout allowances: {e}")
+
+            self._count('flushed', len(rows))
+            return len(rows)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'admitted': self.admitted,
+                'hits': self.hits,
+                'fallbacks': self.fallbacks,
+                'flushed': self.flushed,
+                'flush_errors': self.flush_errors
+            }
+
+    def _eligible(self, shout: Dict[str, Any]) -> bool:
+        return self.counts(shout.get('max_hits', 1))
+
+    def _entry(self, shout: Dict[str, Any], user_id: Optional[str]) -> Tuple[str, Dict[str, Any], int]:
+        # The row as increment_shout_hit would return it
+        shout = dict(shout)
+        shout.setdefault('user_id', user_id)
+        shout.setdefault('current_hits', 0)
+        shout.setdefault('is_active', True)
+        expires_at = shout['expires_at'].timestamp()
+        fields = {
+            'shout': json.dumps(shout, default=_json_default),
+            'remaining': shout['max_hits'] - shout['current_hits'],
+            'pending': 0,
+            'expires_at': expires_at
+        }
+        return KEY_PREFIX + shout['hash'], fields, int(expires_at) + KEY_GRACE_SECONDS
+
+    def _hit_result(self, reply) -> Optional[Dict[str, Any]]:
+        if reply is None:
+            return None
+        self._count('hits')
+        self._start()
+        if reply[0] != 'valid':
+            return {'valid': False, 'reason': reply[0]}
+        shout = json.loads(reply[2])
+        # As before this view was counted, like increment_shout_hit
+        shout['current_hits'] = shout['max_hits'] - int(reply[1])
+        return {'valid': True, 'shout': shout}
+
+    def _give_back(self, hashes: List[str], views: List[int]) -> None:
+        try:
+            self._get_scripts()['give_back'](keys=[DIRTY_KEY], args=[KEY_PREFIX] + self._pairs(zip(hashes, views)))
+        except Exception as e:
+            logger.error(f"Lost {sum(views)} unflushed views of {len(hashes)} hot shouts: {e}")
+
+    @staticmethod
+    def _pairs(pairs) -> List[Any]:
+        return [value for pair in pairs for value in pair]
+
+    def _count(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def _get_scripts(self):
+        if self._scripts is None:
+            client = get_redis()
+            self._scripts = {
+                'hit': client.register_script(HIT_SCRIPT),
+                'take': client.register_script(TAKE_SCRIPT),
+                'give_back': client.register_script(GIVE_BACK_SCRIPT),
+                'cap': client.register_script(CAP_SCRIPT),
+                'storage_key': client.register_script(STORAGE_KEY_SCRIPT)
+            }
+        return self._scripts
+
+    def _get_async_scripts(self):
+        if self._async_scripts is None:
+            self._async_scripts = {'hit': get_async_redis().register_script(HIT_SCRIPT)}
+        return self._async_scripts
+
+    def _start(self) -> None:
+        # Started lazily so forked workers get their own thread
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='hot-shout-flusher', daemon=True)
+                    self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            # A full batch means more is probably waiting
+            while self.flush() >= self.batch_size:
+                pass
+
+# Process-wide hot tier used by the view path (a no-op unless HOT_SHOUTS_ENABLED)
+hot_shouts = HotShoutStore(
+    enabled=Config.HOT_SHOUTS_ENABLED,
+    min_hits=Config.HOT_SHOUTS_MIN_HITS,
+    flush_interval=Config.HOT_SHOUTS_FLUSH_INTERVAL,
+    batch_size=Config.HOT_SHOUTS_FLUSH_BATCH_SIZE
+)
+
+# Hand over the views counted by this process before a clean shutdown
+atexit.register(hot_shouts.flush)
@@ -0,0 +1,198 @@
+from botocore.exceptions import ClientError
+from datetime import timezone
+from email.utils import format_datetime
+from typing import Dict, Any, Iterator, Optional
+from urllib.parse import quote, urlsplit
+from backend.config import Config
+from backend.models.storage_client import get_s3_client
+import hashlib
+import hmac
+import os
+import re
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Fallback when the object was stored without a usable Content-Type
+MEDIA_TYPES = {
+    '.wav': 'audio/wav',
+    '.mp3': 'audio/mpeg',
+    '.ogg': 'audio/ogg',
+    '.flac': 'audio/flac',
+    '.m4a': 'audio/mp4',
+    '.mp4': 'video/mp4',
+    '.webm': 'video/webm',
+    '.mov': 'video/quicktime',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.webp': 'image/webp'
+}
+
+# A single byte range; multi-range requests are served in full
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+class MediaService:
+    """Streams stored media through the API with HTTP Range support.
+
+    Used instead of presigned URLs when S3 is not reachable by browsers
+    (MEDIA_DELIVERY=proxy). Links are HMAC-signed and expire like presigned
+    URLs. A Range header is passed through to GetObject, so seeking in a video
+    only fetches the bytes it needs. With MEDIA_ACCEL_REDIRECT_PREFIX set,
+    nginx fetches the object itself and Python never touches the bytes.
+    """
+
+    @staticmethod
+    def signature(storage_key: str, expires: int) -> str:
+        message = f"{storage_key}\0{expires}".encode()
+        return hmac.new(Config.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()[:32]
+
+    @staticmethod
+    def signed_url(storage_key: str, expires_in: int = 300) -> str:
+        """Expiring /api/media link for a storage key"""
+        expires = int(time.time()) + expires_in
+        signature = MediaService.signature(storage_key, expires)
+        return f"{Config.MEDIA_BASE_URL.rstrip('/')}/api/media/{quote(storage_key)}?expires={expires}&sig={signature}"
+
+    @staticmethod
+    def verify(storage_key: str, expires: Optional[str], signature: Optional[str]) -> bool:
+        """Check a link's signature and expiry"""
+        if not expires or not signature or not expires.isdigit():
+            return False
+        if int(expires) < time.time():
+            return False
+        return hmac.compare_digest(MediaService.signature(storage_key, int(expires)), signature)
+
+    @staticmethod
+    def parse_range(header: Optional[str]) -> Optional[str]:
+        """Normalized single byte range to pass to S3, or None to serve the whole object.
+
+        Syntactically invalid and multi-range headers are ignored (RFC 9110
+        allows that); whether a range is satisfiable is left to S3.
+        """
+        if not header:
+            return None
+        match = RANGE_PATTERN.match(header.replace(' ', ''))
+        if not match:
+            return None
+        start, end = match.groups()
+        if not start and not end:
+            return None
+        if start and end and int(end) < int(start):
+            return None
+        return f"bytes={start}-{end}"
+
+    @staticmethod
+    def content_type(storage_key: str, stored_type: Optional[str] = None) -> str:
+        if stored_type and stored_type not in ('binary/octet-stream', 'application/octet-stream'):
+            return stored_type
+        return MEDIA_TYPES.get(os.path.splitext(storage_key)[1].lower(), 'application/octet-stream')
+
+    @staticmethod
+    def response_headers(storage_key: str, s3_response: Dict[str, Any]) -> Dict[str, str]:
+        """Client headers for a GetObject response (full or partial)"""
+        headers = {
+            'Content-Type': MediaService.content_type(storage_key, s3_response.get('ContentType')),
+            'Content-Length': str(s3_response['ContentLength']),
+            'Accept-Ranges': 'bytes',
+            # Burn-after-reading content must not end up in shared caches
+            'Cache-Control': 'private, no-store'
+        }
+        if s3_response.get('ContentRange'):
+            headers['Content-Range'] = s3_response['ContentRange']
+        if s3_response.get('ETag'):
+            headers['ETag'] = s3_response['ETag']
+        if s3_response.get('LastModified'):
+            headers['Last-Modified'] = format_datetime(s3_response['LastModified'].astimezone(timezone.utc), usegmt=True)
+        return headers
+
+    @staticmethod
+    def range_still_valid(if_range: Optional[str], headers: Dict[str, str]) -> bool:
+        """If-Range: only honor the range when the validator still matches"""
+        return not if_range or if_range in (headers.get('ETag'), headers.get('Last-Modified'))
+
+    @staticmethod
+    def error_result(storage_key: str, error: ClientError, object_size: Optional[int] = None) -> Dict[str, Any]:
+        code = error.response.get('Error', {}).get('Code')
+        if code in ('404', 'NoSuchKey', 'NotFound'):
+            return {'success': False, 'status': 404, 'error': 'Media not found'}
+        if code in ('416', 'InvalidRange'):
+            headers = {'Accept-Ranges': 'bytes'}
+            if object_size is not None:
+                headers['Content-Range'] = f"bytes */{object_size}"
+            return {'success': False, 'status': 416, 'error': 'Range not satisfiable', 'headers': headers}
+        logger.error(f"Failed to fetch media {storage_key}: {error}")
+        return {'success': False, 'status': 502, 'error': 'Storage error'}
+
+    @staticmethod
+    def open(storage_key: str, range_header: Optional[str] = None, if_range: Optional[str] = None) -> Dict[str, Any]:
+        """GetObject with the client's range; the caller must close result['body']"""
+        s3_client = get_s3_client()
+        byte_range = MediaService.parse_range(range_header)
+        params = {'Bucket': Config.S3_BUCKET, 'Key': storage_key}
+
+        try:
+            response = s3_client.get_object(**params, **({'Range': byte_range} if byte_range else {}))
+            headers = MediaService.response_headers(storage_key, response)
+
+            if byte_range and not MediaService.range_still_valid(if_range, headers):
+                # Object changed since the client cached its first part: send all of it
+                response['Body'].close()
+                response = s3_client.get_object(**params)
+                headers = MediaService.response_headers(storage_key, response)
+
+        except ClientError as e:
+            object_size = None
+            if e.response.get('Error', {}).get('Code') in ('416', 'InvalidRange'):
+                try:
+                    object_size = s3_client.head_object(**params)['ContentLength']
+                except Exception:
+                    pass
+            return MediaService.error_result(storage_key, e, object_size)
+
+        return {
+            'success': True,
+            'status': 206 if 'Content-Range' in headers else 200,
+            'headers': headers,
+            'body': response['Body']
+        }
+
+    @staticmethod
+    def iter_body(body, chunk_size: Optional[int] = None) -> Iterator[bytes]:
+        """Stream an S3 body through one reusable buffer.
+
+        readinto() fills the same buffer for every chunk; only the bytes handed
+        to the server are copied, because WSGI servers may hold on to them.
+        """
+        buffer = bytearray(chunk_size or Config.MEDIA_STREAM_CHUNK_SIZE)
+        view = memoryview(buffer)
+        try:
+            while True:
+                read = body.readinto(buffer)
+                if not read:
+                    break
+                yield bytes(view[:read])
+        finally:
+            body.close()
+
+    @staticmethod
+    def accel_redirect_path(presigned_url: str) -> str:
+        """X-Accel-Redirect target: the presigned path and query under the nginx S3 location"""
+        parts = urlsplit(presigned_url)
+        return f"{Config.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip('/')}{parts.path}?{parts.query}"
+
+    @staticmethod
+    def accel_redirect_headers(storage_key: str, expires_in: int = 300) -> Dict[str, str]:
+        """Headers that hand the transfer (Range included) over to nginx"""
+        presigned_url = get_s3_client().generate_presigned_url(
+            'get_object',
+            Params={'Bucket': Config.S3_BUCKET, 'Key': storage_key},
+            ExpiresIn=expires_in
+        )
+        return {
+            'X-Accel-Redirect': MediaService.accel_redirect_path(presigned_url),
+            'X-Accel-Buffering': 'no',
+            'Content-Type': MediaService.content_type(storage_key),
+            'Cache-Control': 'private, no-store'
+        }
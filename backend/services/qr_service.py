@@ -0,0 +1,182 @@
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+from backend.config import Config
+from backend.metrics import QR_RENDER_DURATION
+import hashlib
+import io
+import struct
+import threading
+import zlib
+import qrcode
+
+# Bump when rendering output changes, so clients don't keep stale images under an old ETag
+RENDER_VERSION = 1
+
+QR_FORMATS = {
+    'png': 'image/png',           # Pillow, as before
+    'png-compact': 'image/png',   # 1-bit PNG encoded without Pillow
+    'svg': 'image/svg+xml'        # single <path>, no Pillow
+}
+
+QrKey = Tuple[str, str, int]
+
+class QrImageCache:
+    """LRU cache of rendered QR images keyed by (url, format, box size), bounded by total bytes"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: QrKey) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key: QrKey, data: bytes) -> None:
+        # Never let one huge image flush the whole cache
+        if len(data) > self.max_bytes // 4:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+class QrService:
+    """QR code rendering for share links"""
+
+    @staticmethod
+    def get_qr(url: str, fmt: str = 'png', box_size: int = 10) -> bytes:
+        """Rendered QR image for a URL, from the cache when possible"""
+        key = (url, fmt, box_size)
+        data = qr_cache.get(key)
+        if data is None:
+            data = QrService.render(url, fmt, box_size)
+            qr_cache.put(key, data)
+        return data
+
+    @staticmethod
+    def etag(url: str, fmt: str, box_size: int) -> str:
+        """Strong validator derived from the inputs, so a 304 needs no rendering"""
+        return hashlib.sha1(f"{RENDER_VERSION}\0{fmt}\0{box_size}\0{url}".encode()).hexdigest()
+
+    @staticmethod
+    def render(url: str, fmt: str = 'png', box_size: int = 10) -> bytes:
+        with QR_RENDER_DURATION.labels(format=fmt).time():
+            if fmt == 'svg':
+                return QrService._render_svg(QrService._matrix(url), box_size)
+            if fmt == 'png-compact':
+                return QrService._render_png_compact(QrService._matrix(url), box_size)
+            return QrService._render_png(url, box_size)
+
+    @staticmethod
+    def _make_qr(url: str, box_size: int) -> qrcode.QRCode:
+        qr = qrcode.QRCode(
+            version=1,
+            error_correction=qrcode.constants.ERROR_CORRECT_L,
+            box_size=box_size,
+            border=4
+        )
+        qr.add_data(url)
+        qr.make(fit=True)
+        return qr
+
+    @staticmethod
+    def _matrix(url: str) -> List[List[bool]]:
+        """Module matrix including the quiet-zone border"""
+        return QrService._make_qr(url, 1).get_matrix()
+
+    @staticmethod
+    def _render_png(url: str, box_size: int) -> bytes:
+        img = QrService._make_qr(url, box_size).make_image(fill_color="black", back_color="white")
+
+        # Convert to bytes
+        img_buffer = io.BytesIO()
+        img.save(img_buffer, format='PNG')
+        return img_buffer.getvalue()
+
+    @staticmethod
+    def _render_svg(matrix: List[List[bool]], box_size: int) -> bytes:
+        """One path of dark runs in module coordinates, scaled by the viewport"""
+        size = len(matrix)
+        segments = []
+        for y, row in enumerate(matrix):
+            x = 0
+            while x < size:
+                if not row[x]:
+                    x += 1
+                    continue
+                run = 1
+                while x + run < size and row[x + run]:
+                    run += 1
+                segments.append(f"M{x},{y}h{run}v1h-{run}z")
+                x += run
+
+        pixels = size * box_size
+        return (
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{pixels}" height="{pixels}" '
+            f'viewBox="0 0 {size} {size}" shape-rendering="crispEdges">'
+            f'<rect width="{size}" height="{size}" fill="#fff"/>'
+            f'<path d="{"".join(segments)}" fill="#000"/></svg>'
+        ).encode()
+
+    @staticmethod
+    def _render_png_compact(matrix: List[List[bool]], box_size: int) -> bytes:
+        """1-bit grayscale PNG straight from the matrix (zlib only)"""
+        pixels = len(matrix) * box_size
+
+        scanlines = bytearray()
+        for row in matrix:
+            # Bit 1 = white in 1-bit grayscale
+            bits = ''.join(('0' if dark else '1') * box_size for dark in row)
+            bits += '1' * (-len(bits) % 8)
+            line = b'\x00' + int(bits, 2).to_bytes(len(bits) // 8, 'big')
+            scanlines += line * box_size
+
+        def chunk(kind: bytes, body: bytes) -> bytes:
+            return struct.pack('>I', len(body)) + kind + body + struct.pack('>I', zlib.crc32(kind + body))
+
+        return (
+            b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', pixels, pixels, 1, 0, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(bytes(scanlines), 9))
+            + chunk(b'IEND', b'')
+        )
+
+# Process-wide cache of rendered QR images
+qr_cache = QrImageCache(max_bytes=Config.QR_CACHE_MAX_BYTES)
@@ -0,0 +1,223 @@
+from backend.config import Config
+from backend.metrics import RATE_LIMITED
+from typing import Dict, Any, Optional, Tuple
+import redis
+import redis.asyncio
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+KEY_PREFIX = 'ratelimit:'
+
+# KEYS: bucket. ARGV: capacity, refill rate (tokens per second).
+# Returns the seconds to wait as a string (0 = allowed); Redis' clock is shared by all workers.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = capacity
+if bucket[1] then
+  tokens = math.min(capacity, tonumber(bucket[1]) + (now - tonumber(bucket[2])) * rate)
+end
+local wait = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+Limit = Tuple[int, float]  # (burst capacity, tokens per second)
+
+def parse_limit(value: str) -> Limit:
+    """'10/minute' -> bursts of 10, refilled at 10 per minute"""
+    count, period = value.strip().split('/')
+    return int(count), int(count) / PERIODS[period.strip()]
+
+def parse_limits(value: str) -> Dict[str, Limit]:
+    """'shouts=120/minute,utils.generate_qr=60/minute' -> {route class: limit}"""
+    limits = {}
+    for item in value.split(','):
+        if item.strip():
+            route_class, limit = item.split('=', 1)
+            limits[route_class.strip()] = parse_limit(limit)
+    return limits
+
+class MemoryBuckets:
+    """Token buckets in this process, spread over independently locked shards"""
+
+    def __init__(self, shards: int, max_keys: int):
+        self._shards = [(threading.Lock(), {}) for _ in range(shards)]
+        self.max_keys_per_shard = max(1, max_keys // shards)
+
+    def consume(self, key: str, capacity: int, rate: float) -> float:
+        """Take a token; returns 0 when allowed, else the seconds until one is available"""
+        lock, buckets = self._shards[hash(key) % len(self._shards)]
+        now = time.monotonic()
+
+        with lock:
+            bucket = buckets.get(key)
+            if bucket is None:
+                tokens = capacity
+                if len(buckets) >= self.max_keys_per_shard:
+                    self._prune(buckets, now)
+            else:
+                tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            # (tokens, updated, full again at)
+            buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+            return wait
+
+    async def consume_async(self, key: str, capacity: int, rate: float) -> float:
+        return self.consume(key, capacity, rate)
+
+    def size(self) -> int:
+        return sum(len(buckets) for _, buckets in self._shards)
+
+    def _prune(self, buckets: Dict[str, Tuple[float, float, float]], now: float) -> None:
+        # Full buckets carry no state; drop them, then the oldest if still crowded
+        for key in [key for key, bucket in buckets.items() if bucket[2] <= now]:
+            del buckets[key]
+        while len(buckets) >= self.max_keys_per_shard:
+            del buckets[next(iter(buckets))]
+
+class RedisBuckets:
+    """Token buckets shared by all workers, updated atomically by a Lua script"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self._script = None
+        self._async_script = None
+
+    def _client_options(self) -> Dict[str, Any]:
+        return {
+            'max_connections': Config.REDIS_MAX_CONNECTIONS,
+            'socket_timeout': Config.REDIS_SOCKET_TIMEOUT,
+            'socket_connect_timeout': Config.REDIS_SOCKET_TIMEOUT,
+            'decode_responses': True
+        }
+
+    def consume(self, key: str, capacity: int, rate: float) -> float:
+        if self._script is None:
+            client = redis.Redis.from_url(self.url, **self._client_options())
+            self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+        return float(self._script(keys=[KEY_PREFIX + key], args=[capacity, rate]))
+
+    async def consume_async(self, key: str, capacity: int, rate: float) -> float:
+        if self._async_script is None:
+            client = redis.asyncio.Redis.from_url(self.url, **self._client_options())
+            self._async_script = client.register_script(TOKEN_BUCKET_SCRIPT)
+        return float(await self._async_script(keys=[KEY_PREFIX + key], args=[capacity, rate]))
+
+    def size(self) -> Optional[int]:
+        return None
+
+class RateLimiter:
+    """Token-bucket limits per client IP and route class.
+
+    A route class is an endpoint ('shouts.create_shout') or a whole blueprint
+    ('shouts'); the endpoint's own limit wins. Routes without a limit are not
+    counted. If the shared backend is unreachable, requests are let through.
+    """
+
+    def __init__(self, limits: Dict[str, Limit], storage_url: str, trusted_proxies: int,
+                 memory_shards: int, memory_max_keys: int):
+        self.limits = limits
+        self.trusted_proxies = trusted_proxies
+        if storage_url.startswith(('redis://', 'rediss://', 'unix://')):
+            self.backend = RedisBuckets(storage_url)
+        else:
+            self.backend = MemoryBuckets(memory_shards, memory_max_keys)
+        self._lock = threading.Lock()
+        self._last_error_log = 0.0
+        self._limited_counters = {route_class: RATE_LIMITED.labels(route=route_class) for route_class in limits}
+        self.allowed = 0
+        self.limited = 0
+        self.errors = 0
+
+    def route_class(self, blueprint: Optional[str], endpoint: Optional[str]) -> Optional[str]:
+        if endpoint in self.limits:
+            return endpoint
+        if blueprint in self.limits:
+            return blueprint
+        return None
+
+    def client_ip(self, remote_addr: Optional[str], forwarded_for: Optional[str]) -> str:
+        """The client address, taken from X-Forwarded-For only as far as our own proxies appended it"""
+        if self.trusted_proxies and forwarded_for:
+            hops = [hop.strip() for hop in forwarded_for.split(',')]
+            if len(hops) >= self.trusted_proxies:
+                return hops[-self.trusted_proxies]
+        return remote_addr or 'unknown'
+
+    def check(self, route_class: str, client_ip: str) -> float:
+        """0 when the request may proceed, else the seconds to wait (Retry-After)"""
+        capacity, rate = self.limits[route_class]
+        try:
+            wait = self.backend.consume(f"{route_class}:{client_ip}", capacity, rate)
+        except Exception as e:
+            self._error(e)
+            return 0.0
+        return self._record(route_class, wait)
+
+    async def check_async(self, route_class: str, client_ip: str) -> float:
+        """check() for the ASGI app"""
+        capacity, rate = self.limits[route_class]
+        try:
+            wait = await self.backend.consume_async(f"{route_class}:{client_ip}", capacity, rate)
+        except Exception as e:
+            self._error(e)
+            return 0.0
+        return self._record(route_class, wait)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'backend': type(self.backend).__name__,
+                'buckets': self.backend.size(),
+                'allowed': self.allowed,
+                'limited': self.limited,
+                'errors': self.errors
+            }
+
+    def _record(self, route_class: str, wait: float) -> float:
+        with self._lock:
+            if wait > 0:
+                self.limited += 1
+            else:
+                self.allowed += 1
+        if wait > 0:
+            self._limited_counters[route_class].inc()
+        return wait
+
+    def _error(self, error: Exception) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self.errors += 1
+            if now - self._last_error_log < 60:
+                return
+            self._last_error_log = now
+        logger.warning(f"Rate limit backend failed, letting requests through: {error}")
+
+# Process-wide limiter used by the rate_limit blueprints
+rate_limiter = RateLimiter(
+    limits=parse_limits(Config.RATELIMIT_LIMITS),
+    storage_url=Config.RATELIMIT_STORAGE_URL,
+    trusted_proxies=Config.RATELIMIT_TRUSTED_PROXIES,
+    memory_shards=Config.RATELIMIT_MEMORY_SHARDS,
+    memory_max_keys=Config.RATELIMIT_MEMORY_MAX_KEYS
+)
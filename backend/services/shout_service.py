@@ -1,13 +1,69 @@
 import secrets
-import boto3
-from botocore.client import Config as BotoConfig
+import psycopg2.errors
 from botocore.exceptions import ClientError
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
-from backend.models.db_client import execute_query, DatabaseConnection
+from typing import Dict, Any, List, Optional, BinaryIO
+from backend.models.db_client import execute_query, execute_prepared, register_statement, DatabaseConnection
+from backend.models.storage_client import get_s3_client, get_upload_executor
+from backend.services.url_cache import presigned_url_cache
+from backend.services.burn_queue import burn_deletions
+from backend.services.hit_log_writer import hit_log_writer
+from backend.services.media_service import MediaService
+from backend.services.existence_cache import shout_existence_cache
+from backend.services.hot_shouts import hot_shouts, HotTierUnavailable
+from backend.services.transcoder import media_transcoder
 from backend.config import Config
+from concurrent.futures import wait
+import threading
+import logging
 import io
 
+logger = logging.getLogger(__name__)
+
+# A shout that can still be viewed (burned and expired ones no longer "exist")
+LIVE_SHOUT_QUERY = """
+    SELECT id FROM shouts
+    WHERE hash = $1 AND is_active AND expires_at > now() AND current_hits < max_hits
+"""
+
+# A storage key belongs to at most one shout (migration 010)
+STORAGE_KEY_UNIQUE_INDEX = 'idx_shouts_storage_key_unique'
+
+# Direct uploads: the issued key is claimed in the same statement that creates the shout
+# (no row when it was never issued, already finalized or swept as abandoned). When
+# the object was copied under its sniffed extension, the copy's pending row is
+# claimed too and the issued object goes to the outbox.
+CLAIM_UPLOAD_INSERT = """
+    WITH claimed AS (
+        DELETE FROM pending_uploads WHERE storage_key = {upload_key}::text RETURNING storage_key
+    ), copied AS (
+        DELETE FROM pending_uploads
+        WHERE storage_key = {storage_key}::text AND storage_key <> {upload_key}::text
+        AND EXISTS (SELECT 1 FROM claimed)
+    ), replaced AS (
+        INSERT INTO storage_deletions (storage_key)
+        SELECT storage_key FROM claimed WHERE storage_key <> {storage_key}::text
+        ON CONFLICT (storage_key) DO NOTHING
+    )
+    INSERT INTO shouts (hash, type, max_hits, max_time_minutes, content_text, storage_key, user_id, expires_at, hot_tier)
+    SELECT {hash}::text, {type}::text, {max_hits}::integer, {max_time_minutes}::integer, {content_text}::text,
+           {storage_key}::text, {user_id}::uuid, {expires_at}::timestamptz, {hot_tier}::boolean
+    FROM claimed
+    RETURNING id, hash, type, max_hits, max_time_minutes, content_text, storage_key, created_at, expires_at
+"""
+
+# View counting while Redis is unreachable: shouts the hot tier counts return no
+# row (refused), since Postgres lacks their latest views
+COLD_SHOUT_HIT_QUERY = """
+    SELECT increment_shout_hit($1, $2, $3) AS result
+    WHERE NOT EXISTS (SELECT 1 FROM shouts WHERE hash = $1 AND hot_tier)
+"""
+
+# Hot read-path queries, prepared once per pooled connection
+register_statement('shout_hit', "SELECT increment_shout_hit($1, $2, $3) AS result", ('text', 'text', 'text'))
+register_statement('shout_hit_cold', COLD_SHOUT_HIT_QUERY, ('text', 'text', 'text'))
+register_statement('shout_exists', LIVE_SHOUT_QUERY, ('text',))
+
 class ShoutService:
     """Service for managing shouts (ephemeral content)"""
 
@@ -18,39 +74,78 @@ class ShoutService:
         max_time_minutes: int,
         content_text: Optional[str] = None,
         storage_key: Optional[str] = None,
-        user_id: Optional[str] = None
+        user_id: Optional[str] = None,
+        upload_key: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Create a new shout"""
+        """Create a new shout.
+
+        With upload_key (finalize), that issued direct upload must still be
+        unclaimed, otherwise nothing is created and 'conflict' is set;
+        storage_key is the object the shout serves (a copy under the sniffed
+        extension, or the upload itself).
+        """
         # Generate unique hash
         shout_hash = secrets.token_urlsafe(36)
 
         # Calculate expiration time
         expires_at = datetime.utcnow() + timedelta(minutes=max_time_minutes)
 
-        query = """
-            INSERT INTO shouts (hash, type, max_hits, max_time_minutes, content_text, storage_key, user_id, expires_at)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING id, hash, type, max_hits, max_time_minutes, content_text, storage_key, created_at, expires_at
-        """
+        if upload_key:
+            query = CLAIM_UPLOAD_INSERT.format(
+                hash='%(hash)s', type='%(type)s', max_hits='%(max_hits)s', max_time_minutes='%(max_time_minutes)s',
+                content_text='%(content_text)s', storage_key='%(storage_key)s', user_id='%(user_id)s',
+                expires_at='%(expires_at)s', hot_tier='%(hot_tier)s', upload_key='%(upload_key)s'
+            )
+        else:
+            query = """
+                INSERT INTO shouts (hash, type, max_hits, max_time_minutes, content_text, storage_key, user_id, expires_at, hot_tier)
+                VALUES (%(hash)s, %(type)s, %(max_hits)s, %(max_time_minutes)s, %(content_text)s, %(storage_key)s,
+                        %(user_id)s, %(expires_at)s, %(hot_tier)s)
+                RETURNING id, hash, type, max_hits, max_time_minutes, content_text, storage_key, created_at, expires_at
+            """
 
         try:
-            result = execute_query(
-                query,
-                (shout_hash, shout_type, max_hits, max_time_minutes, content_text, storage_key, user_id, expires_at),
-                fetch_one=True
-            )
+            result = execute_query(query, {
+                'hash': shout_hash,
+                'type': shout_type,
+                'max_hits': max_hits,
+                'max_time_minutes': max_time_minutes,
+                'content_text': content_text,
+                'storage_key': storage_key,
+                'user_id': user_id,
+                'expires_at': expires_at,
+                'hot_tier': hot_shouts.counts(max_hits),
+                'upload_key': upload_key
+            }, fetch_one=True)
 
             if result:
+                shout_existence_cache.add(shout_hash)
+                hot_shouts.admit(result, user_id)
+                media_transcoder.submit(shout_hash, storage_key, shout_type)
                 return {
                     'success': True,
                     'hash': shout_hash,
                     'shout': dict(result)
                 }
+            elif upload_key:
+                return {
+                    'success': False,
+                    'conflict': True,
+                    'error': 'Upload already finalized or expired'
+                }
             else:
                 return {
                     'success': False,
                     'error': 'Failed to create shout'
                 }
+        except psycopg2.errors.UniqueViolation as e:
+            if e.diag.constraint_name != STORAGE_KEY_UNIQUE_INDEX:
+                return {'success': False, 'error': str(e)}
+            return {
+                'success': False,
+                'conflict': True,
+                'error': 'Upload already finalized'
+            }
         except Exception as e:
             return {
                 'success': False,
@@ -61,82 +156,228 @@ class ShoutService:
     def get_shout(shout_hash: str, client_ip: str, user_agent: str) -> Dict[str, Any]:
         """Get a shout and increment hit count"""
         try:
+            statement = 'shout_hit'
+            try:
+                # Multi-view shouts are counted in Redis when the hot tier has them
+                result = hot_shouts.hit(shout_hash)
+                if result is not None:
+                    return ShoutService.handle_hit_result(result, client_ip, user_agent)
+            except HotTierUnavailable:
+                statement = 'shout_hit_cold'
+
             # Call the database function to increment hit and validate
-            query = "SELECT * FROM increment_shout_hit(%s, %s, %s)"
-            result = execute_query(query, (shout_hash, client_ip, user_agent), fetch_one=True)
+            row = execute_prepared(statement, (shout_hash, client_ip, user_agent), fetch_one=True)
 
-            if result:
-                return dict(result)
+            if row is None:
+                # Counted in Redis, which is unreachable: refuse rather than risk an extra view
+                return {'valid': False, 'reason': 'unavailable'}
+            if row['result']:
+                return ShoutService.handle_hit_result(row['result'], client_ip, user_agent)
             else:
                 return {'valid': False, 'reason': 'not_found'}
 
         except Exception as e:
             return {'valid': False, 'reason': 'error', 'message': str(e)}
 
+    @staticmethod
+    def handle_hit_result(result: Dict[str, Any], client_ip: str, user_agent: str) -> Dict[str, Any]:
+        """Log a counted view, flag one that used up the last hit and queue its media for deletion"""
+        result = dict(result)
+        shout = result.get('shout')
+
+        if result.get('valid') and shout:
+            hit_log_writer.record(shout['id'], client_ip, user_agent)
+
+        # The shout row is returned as it was before this view was counted
+        result['burned'] = bool(
+            result.get('valid') and shout
+            and shout.get('current_hits', 0) + 1 >= shout.get('max_hits', 1)
+        )
+
+        if result['burned'] and shout.get('hash'):
+            shout_existence_cache.invalidate(shout['hash'])
+
+        if result['burned'] and shout.get('storage_key'):
+            ShoutService.invalidate_media_url(shout['storage_key'])
+            burn_deletions.enqueue(shout['storage_key'])
+
+        return result
+
     @staticmethod
     def check_shout_exists(shout_hash: str) -> bool:
-        """Check if a shout exists without incrementing hit count"""
-        query = "SELECT id FROM shouts WHERE hash = %s"
-        result = execute_query(query, (shout_hash,), fetch_one=True)
-        return result is not None
+        """Check if a shout can still be viewed, without incrementing hit count (cached)"""
+        exists = shout_existence_cache.lookup(shout_hash)
+        if exists is None:
+            exists = execute_prepared('shout_exists', (shout_hash,), fetch_one=True) is not None
+            shout_existence_cache.store(shout_hash, exists)
+        return exists
 
     @staticmethod
     def _get_s3_client():
-        """Get configured S3 client (Minio, AWS S3, etc.)"""
-        s3_config = BotoConfig(
-            signature_version=Config.S3_SIGNATURE_VERSION,
-            s3={'addressing_style': 'path'} if 'minio' in Config.S3_ENDPOINT_URL.lower() else {}
-        )
-
-        return boto3.client(
-            's3',
-            endpoint_url=Config.S3_ENDPOINT_URL,
-            aws_access_key_id=Config.S3_ACCESS_KEY,
-            aws_secret_access_key=Config.S3_SECRET_KEY,
-            region_name=Config.S3_REGION,
-            config=s3_config,
-            use_ssl=Config.S3_USE_SSL
-        )
+        """Get the shared S3 client (Minio, AWS S3, etc.)"""
+        return get_s3_client()
 
     @staticmethod
     def upload_media(file_data: bytes, shout_hash: str, file_extension: str) -> Dict[str, Any]:
-        """Upload media file to S3-compatible storage"""
+        """Upload in-memory media (e.g. decoded base64 photos) to S3-compatible storage"""
+        return ShoutService.upload_media_stream(io.BytesIO(file_data), shout_hash, file_extension)
+
+    @staticmethod
+    def _read_part(stream: BinaryIO, size: int) -> bytes:
+        """Read up to `size` bytes, looping over short reads from socket-backed streams"""
+        chunks = []
+        remaining = size
+        while remaining > 0:
+            chunk = stream.read(remaining)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b''.join(chunks)
+
+    @staticmethod
+    def upload_media_stream(
+        stream: BinaryIO,
+        shout_hash: str,
+        file_extension: str,
+        max_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Stream a file object to S3 in fixed-size multipart parts.
+
+        At most S3_MULTIPART_CONCURRENCY parts are in flight (plus the one
+        being read), so memory per upload stays bounded regardless of file
+        size. Uploads smaller than one part go out as a single PUT. Any
+        failure, or exceeding max_size, aborts the multipart upload.
+        """
+        s3_client = ShoutService._get_s3_client()
+        storage_key = f"{shout_hash}{file_extension}"
+        part_size = Config.S3_MULTIPART_PART_SIZE
+        upload_id = None
+
         try:
-            s3_client = ShoutService._get_s3_client()
+            chunk = ShoutService._read_part(stream, part_size)
+            total_size = len(chunk)
 
-            # Create storage key
-            storage_key = f"{shout_hash}{file_extension}"
+            if max_size is not None and total_size > max_size:
+                return {'success': False, 'too_large': True, 'size': total_size, 'error': 'File too large'}
 
-            # Upload to S3
-            file_obj = io.BytesIO(file_data)
-            file_size = len(file_data)
+            # Small upload: a single PUT is cheaper than a multipart round trip
+            if total_size < part_size:
+                s3_client.put_object(
+                    Bucket=Config.S3_BUCKET,
+                    Key=storage_key,
+                    Body=chunk,
+                    ContentLength=total_size
+                )
+                return {
+                    'success': True,
+                    'storage_key': storage_key,
+                    'size': total_size
+                }
 
-            s3_client.put_object(
+            upload_id = s3_client.create_multipart_upload(
+                Bucket=Config.S3_BUCKET,
+                Key=storage_key
+            )['UploadId']
+
+            executor = get_upload_executor()
+            slots = threading.BoundedSemaphore(Config.S3_MULTIPART_CONCURRENCY)
+            failed = threading.Event()
+            futures = []
+
+            def upload_part(part_number: int, body: bytes) -> Dict[str, Any]:
+                response = s3_client.upload_part(
+                    Bucket=Config.S3_BUCKET,
+                    Key=storage_key,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=body,
+                    ContentLength=len(body)
+                )
+                return {'PartNumber': part_number, 'ETag': response['ETag']}
+
+            def part_done(future):
+                if future.exception() is not None:
+                    failed.set()
+                slots.release()
+
+            part_number = 0
+            too_large = False
+            while chunk and not failed.is_set():
+                # Wait for a free slot before buffering more of the stream
+                slots.acquire()
+                part_number += 1
+                future = executor.submit(upload_part, part_number, chunk)
+                future.add_done_callback(part_done)
+                futures.append(future)
+
+                chunk = ShoutService._read_part(stream, part_size)
+                total_size += len(chunk)
+                if max_size is not None and total_size > max_size:
+                    too_large = True
+                    break
+
+            # Let in-flight parts settle so the abort below leaves no stray parts
+            wait(futures)
+
+            if too_large:
+                ShoutService._abort_multipart_upload(s3_client, storage_key, upload_id)
+                return {'success': False, 'too_large': True, 'size': total_size, 'error': 'File too large'}
+
+            # Raises the first part failure, if any
+            parts = [f.result() for f in futures]
+
+            s3_client.complete_multipart_upload(
                 Bucket=Config.S3_BUCKET,
                 Key=storage_key,
-                Body=file_obj,
-                ContentLength=file_size
+                UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
             )
 
             return {
                 'success': True,
-                'storage_key': storage_key
+                'storage_key': storage_key,
+                'size': total_size
             }
 
         except ClientError as e:
+            if upload_id:
+                ShoutService._abort_multipart_upload(s3_client, storage_key, upload_id)
             return {
                 'success': False,
                 'error': f'S3 upload failed: {str(e)}'
             }
         except Exception as e:
+            if upload_id:
+                ShoutService._abort_multipart_upload(s3_client, storage_key, upload_id)
             return {
                 'success': False,
                 'error': f'Upload error: {str(e)}'
             }
 
     @staticmethod
-    def get_media_url(storage_key: str, expires_in: int = 300) -> Optional[str]:
-        """Get presigned URL for media file from S3"""
+    def _abort_multipart_upload(s3_client, storage_key: str, upload_id: str) -> None:
+        """Abort a multipart upload so S3 discards the already-stored parts"""
+        try:
+            s3_client.abort_multipart_upload(
+                Bucket=Config.S3_BUCKET,
+                Key=storage_key,
+                UploadId=upload_id
+            )
+        except Exception as e:
+            logger.error(f"Failed to abort multipart upload {upload_id} for {storage_key}: {e}")
+
+    @staticmethod
+    def get_media_url(storage_key: str, expires_in: int = 300, use_cache: bool = True) -> Optional[str]:
+        """Get presigned URL for media file from S3 (reused from cache while fresh)"""
+        if Config.MEDIA_DELIVERY == 'proxy':
+            return MediaService.signed_url(storage_key, expires_in)
+
+        if use_cache:
+            url = presigned_url_cache.get(storage_key, expires_in)
+            if url:
+                return url
+
         try:
             s3_client = ShoutService._get_s3_client()
 
@@ -150,15 +391,147 @@ class ShoutService:
                 ExpiresIn=expires_in
             )
 
+            if use_cache:
+                presigned_url_cache.put(storage_key, expires_in, url)
+
             return url
 
         except Exception as e:
             print(f"Error getting media URL: {e}")
             return None
 
+    @staticmethod
+    def view_url_expiry(burned: bool) -> int:
+        """Lifetime of a view's media link; the final view's expires before its object is deleted"""
+        if burned:
+            return min(Config.MEDIA_URL_EXPIRY, Config.BURN_DELETE_DELAY)
+        return Config.MEDIA_URL_EXPIRY
+
+    @staticmethod
+    def invalidate_media_url(storage_key: str) -> None:
+        """Forget the cached presigned URL of a burned or deleted object"""
+        presigned_url_cache.invalidate(storage_key)
+
+    @staticmethod
+    def create_upload_url(
+        shout_hash: str,
+        file_extension: str,
+        content_type_prefix: str,
+        max_size: int,
+        expires_in: int = 900
+    ) -> Dict[str, Any]:
+        """Get a presigned POST policy for uploading media directly to S3.
+
+        The policy pins the storage key, caps the size with content-length-range
+        and requires a Content-Type of the expected family, so S3 itself rejects
+        oversize or mistyped uploads.
+        """
+        try:
+            s3_client = ShoutService._get_s3_client()
+            storage_key = f"{shout_hash}{file_extension}"
+
+            # Recorded first: keys never finalized are deleted by the cleanup scheduler
+            execute_query("INSERT INTO pending_uploads (storage_key) VALUES (%s)", (storage_key,))
+
+            post = s3_client.generate_presigned_post(
+                Bucket=Config.S3_BUCKET,
+                Key=storage_key,
+                Conditions=[
+                    ['content-length-range', 1, max_size],
+                    ['starts-with', '$Content-Type', content_type_prefix]
+                ],
+                ExpiresIn=expires_in
+            )
+
+            return {
+                'success': True,
+                'storage_key': storage_key,
+                'url': post['url'],
+                'fields': post['fields'],
+                'expires_in': expires_in
+            }
+
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Failed to create upload URL: {str(e)}'
+            }
+
+    @staticmethod
+    def head_media(storage_key: str) -> Dict[str, Any]:
+        """Get size and content type of a stored media object"""
+        try:
+            s3_client = ShoutService._get_s3_client()
+            response = s3_client.head_object(Bucket=Config.S3_BUCKET, Key=storage_key)
+
+            return {
+                'success': True,
+                'size': response['ContentLength'],
+                'content_type': response.get('ContentType', '')
+            }
+
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return {'success': False, 'error': 'Upload not found'}
+            return {'success': False, 'error': f'S3 head failed: {str(e)}'}
+        except Exception as e:
+            return {'success': False, 'error': f'Storage error: {str(e)}'}
+
+    @staticmethod
+    def read_media_head(storage_key: str, size: int = 64) -> Dict[str, Any]:
+        """Read the first bytes of a stored media object (ranged GET) for sniffing"""
+        try:
+            response = ShoutService._get_s3_client().get_object(
+                Bucket=Config.S3_BUCKET,
+                Key=storage_key,
+                Range=f'bytes=0-{size - 1}'
+            )
+            try:
+                return {'success': True, 'head': response['Body'].read()}
+            finally:
+                response['Body'].close()
+
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return {'success': False, 'error': 'Upload not found'}
+            return {'success': False, 'error': f'S3 read failed: {str(e)}'}
+        except Exception as e:
+            return {'success': False, 'error': f'Storage error: {str(e)}'}
+
+    @staticmethod
+    def copy_media(source_key: str, storage_key: str) -> Dict[str, Any]:
+        """Copy an uploaded object to a new key, tracked as pending until a shout claims it"""
+        try:
+            execute_query(
+                "INSERT INTO pending_uploads (storage_key) VALUES (%s) ON CONFLICT (storage_key) DO NOTHING",
+                (storage_key,)
+            )
+            ShoutService._get_s3_client().copy_object(
+                Bucket=Config.S3_BUCKET,
+                Key=storage_key,
+                CopySource={'Bucket': Config.S3_BUCKET, 'Key': source_key}
+            )
+            return {'success': True}
+
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return {'success': False, 'error': 'Upload not found'}
+            return {'success': False, 'error': f'S3 copy failed: {str(e)}'}
+        except Exception as e:
+            return {'success': False, 'error': f'Storage error: {str(e)}'}
+
+    @staticmethod
+    def storage_key_in_use(storage_key: str) -> bool:
+        """Check whether a shout already references a storage key"""
+        query = "SELECT 1 FROM shouts WHERE storage_key = %s LIMIT 1"
+        result = execute_query(query, (storage_key,), fetch_one=True)
+        return result is not None
+
     @staticmethod
     def delete_media(storage_key: str) -> bool:
         """Delete media file from S3"""
+        ShoutService.invalidate_media_url(storage_key)
+
         try:
             s3_client = ShoutService._get_s3_client()
 
@@ -172,3 +545,33 @@ class ShoutService:
         except Exception as e:
             print(f"Error deleting media: {e}")
             return False
+
+    @staticmethod
+    def delete_media_batch(storage_keys: List[str]) -> Dict[str, Any]:
+        """Delete up to 1000 media files from S3 in one DeleteObjects call"""
+        for storage_key in storage_keys:
+            ShoutService.invalidate_media_url(storage_key)
+
+        try:
+            response = ShoutService._get_s3_client().delete_objects(
+                Bucket=Config.S3_BUCKET,
+                Delete={
+                    'Objects': [{'Key': storage_key} for storage_key in storage_keys],
+                    'Quiet': True
+                }
+            )
+
+            # Quiet mode only reports the keys that failed
+            errors = response.get('Errors', [])
+            failed = {error['Key'] for error in errors}
+            for error in errors:
+                logger.error(f"Failed to delete {error['Key']}: {error.get('Code')} {error.get('Message')}")
+
+            return {
+                'deleted': [storage_key for storage_key in storage_keys if storage_key not in failed],
+                'failed': sorted(failed)
+            }
+
+        except Exception as e:
+            logger.error(f"Batch delete of {len(storage_keys)} objects failed: {e}")
+            return {'deleted': [], 'failed': list(storage_keys)}
@@ -0,0 +1,230 @@
+from backend.config import Config
+from backend.models.db_client import execute_query
+from backend.models.storage_client import get_s3_client
+from backend.services.hot_shouts import hot_shouts
+from backend.services.media_service import MediaService
+from backend.services.validation import ValidationService
+from typing import Dict, Any, List, Optional, Tuple
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Only lossless audio is worth re-encoding; compressed uploads (MediaRecorder's
+# webm/opus, mp3, ...) would lose quality for little gain
+LOSSLESS_AUDIO = ('wav', 'flac')
+VIDEO_CONTAINERS = ('mp4', 'mov', 'webm')
+
+# Point the shout at the transcoded object unless it was burned, expired or
+# changed meanwhile. The original goes to the outbox, to be deleted once the
+# links already handed out for it have expired.
+SWAP_QUERY = """
+    WITH swapped AS (
+        UPDATE shouts SET storage_key = %(new_key)s
+        WHERE hash = %(hash)s AND storage_key = %(old_key)s
+        AND is_active AND expires_at > now() AND current_hits < max_hits
+        RETURNING id
+    ), queued AS (
+        INSERT INTO storage_deletions (storage_key, next_attempt_at)
+        SELECT %(old_key)s, now() + make_interval(secs => %(grace)s) FROM swapped
+        ON CONFLICT (storage_key) DO NOTHING
+    )
+    SELECT count(*) AS swapped FROM swapped
+"""
+
+Job = Tuple[str, str, str]  # (shout hash, storage key, shout type)
+
+class MediaTranscoder:
+    """Re-encodes uploaded audio and video with ffmpeg in background threads.
+
+    Jobs are queued after the shout is created, so uploads return as before
+    and the original is served until the smaller rendition is swapped in.
+    Lossless audio becomes Opus; video gets a bitrate- and height-capped
+    H.264 or VP9 rendition. A result that isn't smaller, a shout burned
+    meanwhile, or any failure leaves the original in place.
+    """
+
+    def __init__(self, enabled: bool, ffmpeg_path: str, workers: int, max_size: int, timeout: int):
+        self.enabled = enabled
+        self.ffmpeg_path = ffmpeg_path
+        self.workers = workers
+        self.timeout = timeout
+        self._queue: 'queue.Queue[Job]' = queue.Queue(maxsize=max_size)
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._ffmpeg: Optional[str] = None
+        self.transcoded = 0
+        self.skipped = 0
+        self.failed = 0
+        self.dropped = 0
+        self.bytes_saved = 0
+
+    def submit(self, shout_hash: str, storage_key: Optional[str], shout_type: str) -> None:
+        """Queue a new shout's media for transcoding (never blocks the caller)"""
+        if not self.enabled or not storage_key or shout_type not in ('audio', 'video'):
+            return
+        if not self._find_ffmpeg():
+            return
+        try:
+            self._queue.put_nowait((shout_hash, storage_key, shout_type))
+        except queue.Full:
+            # The original is served as uploaded
+            self._count('dropped')
+            return
+        self._start_workers()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'pending': self._queue.qsize(),
+                'transcoded': self.transcoded,
+                'skipped': self.skipped,
+                'failed': self.failed,
+                'dropped': self.dropped,
+                'bytes_saved': self.bytes_saved
+            }
+
+    def transcode(self, shout_hash: str, storage_key: str, shout_type: str) -> Optional[str]:
+        """Transcode one shout's media and swap it in; returns the new storage key, if any"""
+        s3_client = get_s3_client()
+
+        with tempfile.TemporaryDirectory(prefix='transcode-') as workdir:
+            source = os.path.join(workdir, 'source')
+            s3_client.download_file(Config.S3_BUCKET, storage_key, source)
+            with open(source, 'rb') as f:
+                container = ValidationService.sniff_container(f.read(64))
+
+            plan = self._plan(shout_type, container)
+            if plan is None:
+                self._count('skipped')
+                return None
+            extension, options = plan
+
+            target = os.path.join(workdir, 'target' + extension)
+            subprocess.run(
+                [self.ffmpeg_path, '-nostdin', '-hide_banner', '-loglevel', 'error', '-y',
+                 '-i', source, '-map_metadata', '-1'] + options + [target],
+                check=True,
+                capture_output=True,
+                timeout=self.timeout
+            )
+
+            source_size = os.path.getsize(source)
+            target_size = os.path.getsize(target)
+            if target_size >= source_size:
+                self._count('skipped')
+                return None
+
+            new_key = f"{os.path.splitext(storage_key)[0]}-t{extension}"
+            s3_client.upload_file(
+                target, Config.S3_BUCKET, new_key,
+                ExtraArgs={'ContentType': MediaService.content_type(new_key)}
+            )
+
+        try:
+            row = execute_query(SWAP_QUERY, {
+                'hash': shout_hash,
+                'old_key': storage_key,
+                'new_key': new_key,
+                'grace': Config.TRANSCODE_REPLACED_GRACE
+            }, fetch_one=True)
+        except Exception:
+            self._discard(new_key)
+            raise
+
+        if not row or not row['swapped']:
+            # Burned, expired or deleted while we were busy
+            self._discard(new_key)
+            self._count('skipped')
+            return None
+
+        hot_shouts.replace_storage_key(shout_hash, new_key)
+        with self._lock:
+            self.transcoded += 1
+            self.bytes_saved += source_size - target_size
+        return new_key
+
+    @staticmethod
+    def _plan(shout_type: str, container: Optional[str]) -> Optional[Tuple[str, List[str]]]:
+        """(extension, ffmpeg output options) for a source, or None to keep it as is"""
+        if shout_type == 'audio' and container in LOSSLESS_AUDIO:
+            extension = '.ogg' if Config.TRANSCODE_AUDIO_CONTAINER == 'ogg' else '.webm'
+            return extension, ['-vn', '-c:a', 'libopus', '-b:a', f"{Config.TRANSCODE_AUDIO_BITRATE}k"]
+
+        if shout_type == 'video' and container in VIDEO_CONTAINERS:
+            bitrate = Config.TRANSCODE_VIDEO_MAX_BITRATE
+            # Downscale only, keeping the aspect ratio (even width for the encoders)
+            options = [
+                '-vf', f"scale=-2:'min({Config.TRANSCODE_VIDEO_MAX_HEIGHT},ih)'",
+                '-maxrate', f"{bitrate}k", '-bufsize', f"{bitrate * 2}k"
+            ]
+            if Config.TRANSCODE_VIDEO_CODEC == 'vp9':
+                return '.webm', options + [
+                    '-c:v', 'libvpx-vp9', '-crf', '33', '-b:v', f"{bitrate}k",
+                    '-deadline', 'realtime', '-cpu-used', '8',
+                    '-c:a', 'libopus', '-b:a', f"{Config.TRANSCODE_AUDIO_BITRATE}k"
+                ]
+            return '.mp4', options + [
+                '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '26', '-pix_fmt', 'yuv420p',
+                '-c:a', 'aac', '-b:a', '128k',
+                '-movflags', '+faststart'
+            ]
+
+        return None
+
+    def _find_ffmpeg(self) -> bool:
+        if self._ffmpeg is None:
+            with self._lock:
+                if self._ffmpeg is None:
+                    self._ffmpeg = shutil.which(self.ffmpeg_path) or ''
+                    if not self._ffmpeg:
+                        logger.error(f"ffmpeg not found at {self.ffmpeg_path!r}, media is stored as uploaded")
+        return bool(self._ffmpeg)
+
+    @staticmethod
+    def _discard(storage_key: str) -> None:
+        try:
+            get_s3_client().delete_object(Bucket=Config.S3_BUCKET, Key=storage_key)
+        except Exception as e:
+            logger.error(f"Failed to delete unused transcode {storage_key}: {e}")
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _start_workers(self) -> None:
+        # Started lazily so forked workers get their own threads
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            for _ in range(self.workers - len(self._threads)):
+                thread = threading.Thread(target=self._work, name='media-transcoder', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self) -> None:
+        while True:
+            shout_hash, storage_key, shout_type = self._queue.get()
+            try:
+                self.transcode(shout_hash, storage_key, shout_type)
+            except subprocess.CalledProcessError as e:
+                stderr = e.stderr.decode(errors='replace').strip()[-500:] if e.stderr else ''
+                logger.error(f"ffmpeg failed on {storage_key}: {stderr}")
+                self._count('failed')
+            except Exception as e:
+                logger.error(f"Failed to transcode {storage_key}: {e}")
+                self._count('failed')
+
+# Process-wide transcoder fed by shout creation (a no-op unless TRANSCODE_ENABLED)
+media_transcoder = MediaTranscoder(
+    enabled=Config.TRANSCODE_ENABLED,
+    ffmpeg_path=Config.FFMPEG_PATH,
+    workers=Config.TRANSCODE_WORKERS,
+    max_size=Config.TRANSCODE_QUEUE_SIZE,
+    timeout=Config.TRANSCODE_TIMEOUT
+)
@@ -0,0 +1,85 @@
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+from backend.config import Config
+import threading
+import time
+
+class PresignedUrlCache:
+    """Bounded LRU cache of presigned media URLs, keyed by storage_key.
+
+    A cached URL is reused until fewer than `refresh_margin` seconds of its
+    validity remain, so clients always get a URL that is still usable.
+    """
+
+    def __init__(self, max_entries: int, refresh_margin: int):
+        self.max_entries = max_entries
+        self.refresh_margin = refresh_margin
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, storage_key: str, expires_in: int) -> Optional[str]:
+        """Return a cached URL that is still fresh enough, or None"""
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(storage_key)
+            if entry is not None:
+                url, entry_expires_in, expires_at = entry
+                if entry_expires_in == expires_in and expires_at - now > self.refresh_margin:
+                    self._entries.move_to_end(storage_key)
+                    self.hits += 1
+                    return url
+                del self._entries[storage_key]
+
+            self.misses += 1
+            return None
+
+    def put(self, storage_key: str, expires_in: int, url: str) -> None:
+        """Store a freshly signed URL"""
+        # Not worth caching if it would be stale on the next lookup
+        if expires_in <= self.refresh_margin or self.max_entries <= 0:
+            return
+
+        expires_at = time.monotonic() + expires_in
+
+        with self._lock:
+            self._entries[storage_key] = (url, expires_in, expires_at)
+            self._entries.move_to_end(storage_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, storage_key: str) -> None:
+        """Drop the URL for a burned or deleted object"""
+        with self._lock:
+            if self._entries.pop(storage_key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop all cached URLs"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+# Process-wide cache shared by all request threads
+presigned_url_cache = PresignedUrlCache(
+    max_entries=Config.PRESIGNED_URL_CACHE_SIZE,
+    refresh_margin=Config.PRESIGNED_URL_REFRESH_MARGIN
+)
@@ -1,4 +1,6 @@
 from typing import Dict, Any, Optional
+from datetime import datetime
+import uuid
 import re
 
 class ValidationService:
@@ -8,9 +10,30 @@ class ValidationService:
 
     # File extensions
     ALLOWED_EXTENSIONS = {
-        'audio': ['.wav', '.mp3', '.ogg'],
-        'video': ['.mp4', '.webm'],
-        'photo': ['.jpg', '.jpeg', '.png']
+        'audio': ['.wav', '.mp3', '.ogg', '.flac', '.webm', '.m4a'],
+        'video': ['.mp4', '.webm', '.mov'],
+        'photo': ['.jpg', '.jpeg', '.png', '.webp']
+    }
+
+    # Containers recognised from their first bytes, and the extension each is stored under per type
+    SNIFFED_EXTENSIONS = {
+        'wav': {'audio': '.wav'},
+        'mp3': {'audio': '.mp3'},
+        'ogg': {'audio': '.ogg'},
+        'flac': {'audio': '.flac'},
+        'webm': {'audio': '.webm', 'video': '.webm'},
+        'mp4': {'audio': '.m4a', 'video': '.mp4'},
+        'mov': {'video': '.mov'},
+        'jpeg': {'photo': '.jpeg'},
+        'png': {'photo': '.png'},
+        'webp': {'photo': '.webp'}
+    }
+
+    # MIME type families accepted for direct uploads
+    CONTENT_TYPE_PREFIXES = {
+        'audio': 'audio/',
+        'video': 'video/',
+        'photo': 'image/'
     }
 
     # Size limits (in bytes)
@@ -21,6 +44,16 @@ class ValidationService:
         'text': 10000  # 10KB characters
     }
 
+    # Shout options an upload may declare ahead of its body (query parameter -> header)
+    UPLOAD_OPTION_HEADERS = {
+        'type': 'X-Shout-Type',
+        'maxhits': 'X-Shout-Max-Hits',
+        'maxtime': 'X-Shout-Max-Time'
+    }
+
+    # Multipart framing and the small form fields sent along with the file
+    UPLOAD_OVERHEAD = 64 * 1024
+
     @staticmethod
     def validate_shout_type(shout_type: str) -> Dict[str, Any]:
         """Validate shout type"""
@@ -105,8 +138,197 @@ class ValidationService:
         return {'valid': True}
 
     @staticmethod
-    def get_file_extension(content_type: str, filename: Optional[str] = None) -> str:
-        """Get appropriate file extension based on content type"""
+    def upload_options(args, headers) -> Dict[str, Optional[str]]:
+        """Shout options declared in the query string or X-Shout-* headers"""
+        return {
+            name: args.get(name) or headers.get(header)
+            for name, header in ValidationService.UPLOAD_OPTION_HEADERS.items()
+        }
+
+    @staticmethod
+    def max_request_size(shout_type: Optional[str], is_json: bool) -> int:
+        """Largest body a create request of this type can legitimately have"""
+        if shout_type == 'text':
+            # Up to 6 bytes per character once JSON-escaped
+            return ValidationService.MAX_FILE_SIZES['text'] * 6 + ValidationService.UPLOAD_OVERHEAD
+
+        if is_json:
+            # Only photos come as JSON (base64 data URIs, a third larger than the file)
+            return ValidationService.MAX_FILE_SIZES['photo'] * 4 // 3 + ValidationService.UPLOAD_OVERHEAD
+
+        if shout_type in ValidationService.CONTENT_TYPE_PREFIXES:
+            max_size = ValidationService.MAX_FILE_SIZES[shout_type]
+        else:
+            max_size = max(ValidationService.MAX_FILE_SIZES[media_type] for media_type in ValidationService.CONTENT_TYPE_PREFIXES)
+        return max_size + ValidationService.UPLOAD_OVERHEAD
+
+    @staticmethod
+    def validate_upload_request(content_length: Optional[int], is_json: bool, options: Dict[str, Optional[str]]) -> Dict[str, Any]:
+        """Check what an upload declares (size, type, options) before its body is read.
+
+        On success 'value' is the body size cap for the request, to be enforced
+        while reading bodies that come without a Content-Length.
+        """
+        shout_type = options.get('type')
+        if shout_type:
+            type_validation = ValidationService.validate_shout_type(shout_type)
+            if not type_validation['valid']:
+                return {**type_validation, 'status': 400}
+
+        if options.get('maxhits'):
+            hits_validation = ValidationService.validate_max_hits(options['maxhits'])
+            if not hits_validation['valid']:
+                return {**hits_validation, 'status': 400}
+
+        if options.get('maxtime'):
+            time_validation = ValidationService.validate_max_time(options['maxtime'])
+            if not time_validation['valid']:
+                return {**time_validation, 'status': 400}
+
+        max_size = ValidationService.max_request_size(shout_type, is_json)
+        if content_length is not None and content_length > max_size:
+            if shout_type in ValidationService.CONTENT_TYPE_PREFIXES:
+                error = ValidationService.validate_file_size(content_length, shout_type)['error']
+            else:
+                error = 'File too large'
+            return {'valid': False, 'error': error, 'status': 413}
+
+        return {'valid': True, 'value': max_size}
+
+    @staticmethod
+    def validate_content_type(mime_type: str, content_type: str) -> Dict[str, Any]:
+        """Validate that a MIME type belongs to the family of a shout type"""
+        prefix = ValidationService.CONTENT_TYPE_PREFIXES.get(content_type)
+
+        if not prefix or not mime_type or not mime_type.lower().startswith(prefix):
+            return {
+                'valid': False,
+                'error': f"Invalid content type for {content_type}"
+            }
+
+        return {'valid': True}
+
+    @staticmethod
+    def validate_storage_key(storage_key: str, content_type: str) -> Dict[str, Any]:
+        """Validate a storage key issued by the direct upload flow"""
+        file_ext = ValidationService.get_file_extension(content_type)
+        pattern = r'^[A-Za-z0-9_-]{48}' + re.escape(file_ext) + r'$'
+
+        if not storage_key or not re.match(pattern, storage_key):
+            return {
+                'valid': False,
+                'error': 'Invalid storage key'
+            }
+
+        return {'valid': True}
+
+    @staticmethod
+    def validate_message_cursor(cursor: str) -> Dict[str, Any]:
+        """Validate a chat `since` cursor of the form <created_at>,<message id>"""
+        try:
+            # A '+' in the UTC offset arrives as a space when not URL-encoded
+            created_at, message_id = cursor.replace(' ', '+').rsplit(',', 1)
+            return {
+                'valid': True,
+                'value': (datetime.fromisoformat(created_at), str(uuid.UUID(message_id)))
+            }
+        except (ValueError, AttributeError):
+            return {
+                'valid': False,
+                'error': 'Invalid since cursor (expected "<created_at>,<id>")'
+            }
+
+    @staticmethod
+    def validate_page_limit(limit: int, max_limit: int = 500) -> Dict[str, Any]:
+        """Validate a page size parameter"""
+        try:
+            value = int(limit)
+            if value < 1 or value > max_limit:
+                return {
+                    'valid': False,
+                    'error': f'Limit must be between 1 and {max_limit}'
+                }
+            return {'valid': True, 'value': value}
+        except (ValueError, TypeError):
+            return {
+                'valid': False,
+                'error': 'Limit must be a valid integer'
+            }
+
+    @staticmethod
+    def validate_qr_options(fmt: Optional[str], size: Optional[str], formats) -> Dict[str, Any]:
+        """Validate QR output format and box size (pixels per module)"""
+        fmt = fmt or 'png'
+        if fmt not in formats:
+            return {
+                'valid': False,
+                'error': f'Invalid format. Must be one of: {", ".join(formats)}'
+            }
+
+        try:
+            box_size = int(size) if size else 10
+        except (ValueError, TypeError):
+            return {'valid': False, 'error': 'Size must be a valid integer'}
+        if box_size < 1 or box_size > 20:
+            return {'valid': False, 'error': 'Size must be between 1 and 20'}
+
+        return {'valid': True, 'value': (fmt, box_size)}
+
+    @staticmethod
+    def peek(stream, size: int = 64) -> bytes:
+        """First bytes of a seekable upload stream, leaving its position unchanged"""
+        position = stream.tell()
+        head = stream.read(size)
+        stream.seek(position)
+        return head
+
+    @staticmethod
+    def sniff_container(head: bytes) -> Optional[str]:
+        """Identify a media container from its magic bytes"""
+        if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+            return 'wav'
+        if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+            return 'webp'
+        if head[:3] == b'\xff\xd8\xff':
+            return 'jpeg'
+        if head[:8] == b'\x89PNG\r\n\x1a\n':
+            return 'png'
+        if head[:4] == b'OggS':
+            return 'ogg'
+        if head[:4] == b'fLaC':
+            return 'flac'
+        if head[:4] == b'\x1a\x45\xdf\xa3':
+            # EBML header: WebM (or Matroska, which browsers play as WebM)
+            return 'webm'
+        if head[4:8] == b'ftyp':
+            return 'mov' if head[8:12] == b'qt  ' else 'mp4'
+        # ID3 tag, or an MPEG audio frame sync with a valid layer
+        if head[:3] == b'ID3' or (len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0 and head[1] & 0x06):
+            return 'mp3'
+        return None
+
+    @staticmethod
+    def validate_media_content(head: bytes, content_type: str) -> Dict[str, Any]:
+        """Reject files whose recognised container belongs to another type (unknown ones pass)"""
+        container = ValidationService.sniff_container(head)
+
+        if container and content_type not in ValidationService.SNIFFED_EXTENSIONS[container]:
+            return {
+                'valid': False,
+                'error': f"File content ({container}) does not match type {content_type}"
+            }
+
+        return {'valid': True}
+
+    @staticmethod
+    def get_file_extension(content_type: str, filename: Optional[str] = None, head: Optional[bytes] = None) -> str:
+        """Get appropriate file extension from the sniffed container, else the content type"""
+        if head:
+            container = ValidationService.sniff_container(head)
+            extension = ValidationService.SNIFFED_EXTENSIONS.get(container, {}).get(content_type)
+            if extension:
+                return extension
+
         if content_type == 'audio':
             return '.wav'
         elif content_type == 'video':
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark: posting a text chat message, old multi-query flow vs the
+single-statement ChatService.post_message.
+
+Needs the docker-compose Postgres (POSTGRES_* env vars as for the backend):
+
+    python benchmarks/chat_post.py --iterations 500
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from psycopg2.extras import RealDictCursor
+from backend.models.db_client import init_db, execute_query
+from backend.services.chat_service import ChatService
+from backend.services.shout_service import ShoutService
+
+_statements = 0
+_original_execute = RealDictCursor.execute
+
+
+def _counting_execute(self, query, vars=None):
+    global _statements
+    _statements += 1
+    return _original_execute(self, query, vars)
+
+
+def legacy_post(chat_hash):
+    """The pre-refactor flow: room check, shout INSERT, id lookup, message INSERT"""
+    ChatService.get_chat_room(chat_hash)
+    shout = ShoutService.create_shout('text', 10, 5, content_text='benchmark')
+    row = execute_query("SELECT id FROM shouts WHERE hash = %s", (shout['hash'],), fetch_one=True)
+    ChatService.add_message_to_chat(chat_hash, row['id'])
+
+
+def single_statement_post(chat_hash):
+    ChatService.post_message(chat_hash, 'text', 10, 5, content_text='benchmark')
+
+
+def measure(label, fn, chat_hash, iterations):
+    global _statements
+    _statements = 0
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(chat_hash)
+        samples.append((time.perf_counter() - start) * 1000)
+
+    samples.sort()
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:<18} statements/post {_statements / iterations:4.1f}  "
+          f"p50 {statistics.median(samples):7.3f} ms  p95 {p95:7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    init_db()
+    RealDictCursor.execute = _counting_execute
+
+    chat_hash = ChatService.create_chat_room()['hash']
+
+    measure('legacy flow', legacy_post, chat_hash, args.iterations)
+    measure('single statement', single_statement_post, chat_hash, args.iterations)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Load test: throughput and tail latency of the sync (gunicorn) and async
+(hypercorn) APIs as concurrency grows.
+
+Start both servers against the same Postgres/MinIO with rate limiting off
+(otherwise most requests measure fast 429s), e.g.
+
+    RATELIMIT_ENABLED=False gunicorn -w 4 --threads 8 -b :5000 "backend.app_api:create_app()"
+    RATELIMIT_ENABLED=False hypercorn -w 4 -b :5001 "backend.app_asgi:create_asgi_app()"
+
+then:
+
+    python benchmarks/concurrency.py --target sync=http://localhost:5000 \\
+        --target async=http://localhost:5001 --concurrency 10,100,500
+
+Each level runs a chat message list and a shout existence check per request
+slot (chat room and shout are created up front on the first target). Any
+non-2xx response counts as an error, not as a latency sample.
+
+Needs `pip install -r benchmarks/requirements.txt`.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+
+
+async def setup(session, base_url):
+    """Create a chat room with a few messages and a text shout to read back"""
+    async with session.post(f"{base_url}/api/chat/create") as response:
+        chat_hash = (await response.json())['hash']
+    for i in range(5):
+        async with session.post(f"{base_url}/api/chat/{chat_hash}/message",
+                                json={'type': 'text', 'data': f'benchmark {i}'}) as response:
+            await response.read()
+    async with session.post(f"{base_url}/api/shouts/create",
+                            json={'type': 'text', 'data': 'benchmark', 'maxhits': 100}) as response:
+        shout_hash = (await response.json())['hash']
+    return chat_hash, shout_hash
+
+
+async def worker(session, urls, deadline, samples, errors):
+    i = 0
+    while time.perf_counter() < deadline:
+        url = urls[i % len(urls)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            async with session.get(url) as response:
+                await response.read()
+                if not 200 <= response.status < 300:
+                    errors.append(response.status)
+                    continue
+        except aiohttp.ClientError as e:
+            errors.append(type(e).__name__)
+            continue
+        samples.append((time.perf_counter() - start) * 1000)
+
+
+async def run_level(label, base_url, chat_hash, shout_hash, concurrency, duration):
+    urls = [
+        f"{base_url}/api/chat/{chat_hash}/messages",
+        f"{base_url}/api/shouts/check/{shout_hash}",
+    ]
+    samples, errors = [], []
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(
+            worker(session, urls, deadline, samples, errors) for _ in range(concurrency)
+        ))
+
+    if not samples:
+        print(f"{label:<8} c={concurrency:<5} no successful requests ({len(errors)} errors)")
+        return
+
+    samples.sort()
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    print(f"{label:<8} c={concurrency:<5} {len(samples) / duration:8.1f} req/s  "
+          f"p50 {statistics.median(samples):8.2f} ms  p95 {p95:8.2f} ms  "
+          f"p99 {p99:8.2f} ms  errors {len(errors)}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', action='append', required=True,
+                        help='label=base_url, may be repeated')
+    parser.add_argument('--concurrency', default='10,50,100,500')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per level')
+    args = parser.parse_args()
+
+    targets = [target.split('=', 1) for target in args.target]
+    levels = [int(level) for level in args.concurrency.split(',')]
+
+    async with aiohttp.ClientSession() as session:
+        chat_hash, shout_hash = await setup(session, targets[0][1])
+
+    for concurrency in levels:
+        for label, base_url in targets:
+            await run_level(label, base_url, chat_hash, shout_hash, concurrency, args.duration)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
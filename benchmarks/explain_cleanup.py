@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Query plan regression check for the shouts indexes (migration 007).
+
+EXPLAINs the queries behind cleanup_expired_content / the batched variant
+and CleanupService.delete_expired_storage_files, plus the hash and
+storage-key lookups, and fails if one of them stops using its index. Seq
+scans are disabled while planning, so a small dev database gives the same
+answer as production: if the planner still picks a seq scan, no usable index
+exists for the query.
+
+Needs the docker-compose Postgres with all migrations applied:
+
+    python benchmarks/explain_cleanup.py
+"""
+import json
+import os
+import sys
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from backend.models.db_client import create_session_connection
+from backend.services.cleanup_service import EXPIRED_STORAGE_KEYS_QUERY, CLEAR_STORAGE_KEYS_QUERY
+from backend.services.existence_cache import LIVE_HASHES_QUERY
+
+# (label, query, params, index the plan must use)
+CHECKS = [
+    (
+        # The expiry sweep inside cleanup_expired_content_batch()
+        'expiry sweep',
+        """
+            SELECT id FROM shouts
+            WHERE (expires_at <= now() OR current_hits >= max_hits)
+            AND is_active = true
+            LIMIT 1000
+        """,
+        (),
+        'idx_shouts_active_expires_at'
+    ),
+    (
+        'storage cleanup scan',
+        EXPIRED_STORAGE_KEYS_QUERY,
+        (),
+        'idx_shouts_cleanup_storage_key'
+    ),
+    (
+        'clear deleted keys',
+        CLEAR_STORAGE_KEYS_QUERY,
+        (['a.webm', 'b.webm'],),
+        'idx_shouts_storage_key_unique'
+    ),
+    (
+        # Bloom filter (re)load of the existence cache
+        'live hash snapshot',
+        LIVE_HASHES_QUERY,
+        (),
+        'idx_shouts_active_expires_at'
+    ),
+    (
+        'view by hash',
+        "SELECT id FROM shouts WHERE hash = %s",
+        ('benchmark',),
+        'shouts_hash_key'
+    ),
+]
+
+
+def plan_nodes(node):
+    yield node
+    for child in node.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+def explain(cursor, query, params):
+    cursor.execute("SET LOCAL enable_seqscan = off")
+    cursor.execute(f"EXPLAIN (FORMAT JSON) {query}", params)
+    return cursor.fetchone()[0][0]['Plan']
+
+
+def main():
+    conn = create_session_connection()
+    # EXPLAIN doesn't execute the UPDATE, but keep everything in a rolled-back transaction anyway
+    conn.autocommit = False
+    failures = 0
+
+    try:
+        with conn.cursor() as cursor:
+            for label, query, params, index in CHECKS:
+                plan = explain(cursor, query, params)
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                nodes = list(plan_nodes(plan))
+                indexes = {node['Index Name'] for node in nodes if 'Index Name' in node}
+                seq_scans = [node for node in nodes
+                             if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') == 'shouts']
+
+                ok = index in indexes and not seq_scans
+                failures += not ok
+                used = ', '.join(sorted(indexes)) or 'Seq Scan'
+                print(f"{'ok  ' if ok else 'FAIL'} {label:<22} expected {index:<32} used {used}")
+    finally:
+        conn.rollback()
+        conn.close()
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
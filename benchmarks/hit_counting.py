@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+pgbench-style concurrency benchmark: views/sec on a single hot shout.
+
+Every client thread holds its own connection and calls increment_shout_hit
+on the same shout in a loop, like `pgbench -c N -T S` with a one-statement
+script. With --compare the pre-006 implementation (SELECT ... FOR UPDATE,
+then UPDATE) runs side by side as bench_increment_shout_hit_locking, which
+is dropped again afterwards. With --redis the views also go through the
+hot-shout tier (Lua decrement in Redis, batched write-back), and the final
+Postgres count is checked after the last flush.
+
+Needs the docker-compose Postgres with all migrations applied (and Redis,
+with REDIS_URL set, for --redis):
+
+    python benchmarks/hit_counting.py --clients 1,8,32,64 --duration 10 --compare
+    REDIS_URL=redis://localhost:6379/0 python benchmarks/hit_counting.py --redis
+"""
+import argparse
+import os
+import secrets
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from backend.models.db_client import create_session_connection
+from backend.services.hot_shouts import HotShoutStore, HotTierUnavailable
+
+LOCKING_FUNCTION = """
+CREATE OR REPLACE FUNCTION bench_increment_shout_hit_locking(shout_hash text, client_ip text, client_ua text)
+RETURNS json
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  shout_record shouts;
+BEGIN
+  SELECT * INTO shout_record FROM shouts WHERE hash = shout_hash FOR UPDATE;
+  IF NOT FOUND THEN
+    RETURN json_build_object('valid', false, 'reason', 'not_found');
+  END IF;
+  IF shout_record.expires_at <= now() THEN
+    RETURN json_build_object('valid', false, 'reason', 'expired_time');
+  END IF;
+  IF shout_record.current_hits >= shout_record.max_hits THEN
+    RETURN json_build_object('valid', false, 'reason', 'expired_hits');
+  END IF;
+  IF NOT shout_record.is_active THEN
+    RETURN json_build_object('valid', false, 'reason', 'inactive');
+  END IF;
+  UPDATE shouts SET current_hits = current_hits + 1 WHERE id = shout_record.id;
+  RETURN json_build_object('valid', true, 'shout', row_to_json(shout_record));
+END;
+$$;
+"""
+
+
+def create_hot_shout(conn, store=None):
+    """A text shout that can be viewed far more often than the benchmark will"""
+    shout_hash = secrets.token_urlsafe(36)
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO shouts (hash, type, max_hits, max_time_minutes, content_text, expires_at, hot_tier)
+            VALUES (%s, 'text', 2000000000, 60, 'benchmark', %s, %s)
+            RETURNING id::text, hash, type, max_hits, max_time_minutes, content_text, storage_key, created_at, expires_at
+        """, (shout_hash, datetime.now(timezone.utc) + timedelta(hours=1), store is not None))
+        columns = [column.name for column in cursor.description]
+        shout = dict(zip(columns, cursor.fetchone()))
+    if store is not None:
+        store.admit(shout)
+    return shout_hash
+
+
+def redis_client(store, shout_hash, deadline, samples, errors):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            result = store.hit(shout_hash)
+        except HotTierUnavailable:
+            result = None
+        if not result or not result.get('valid'):
+            errors.append(1)
+            continue
+        samples.append((time.perf_counter() - start) * 1000)
+
+
+def client(function, shout_hash, deadline, samples, errors):
+    conn = create_session_connection()
+    try:
+        with conn.cursor() as cursor:
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    cursor.execute(f"SELECT {function}(%s, '127.0.0.1', 'hit-bench')", (shout_hash,))
+                    cursor.fetchone()
+                except Exception:
+                    errors.append(1)
+                    continue
+                samples.append((time.perf_counter() - start) * 1000)
+    finally:
+        conn.close()
+
+
+def run(label, function, conn, clients, duration, store=None):
+    shout_hash = create_hot_shout(conn, store)
+    samples, errors = [], []
+    deadline = time.perf_counter() + duration
+
+    if store is not None:
+        target, first = redis_client, store
+    else:
+        target, first = client, function
+    threads = [
+        threading.Thread(target=target, args=(first, shout_hash, deadline, samples, errors))
+        for _ in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Drain what the flusher hasn't written back yet
+    if store is not None:
+        while store.flush():
+            pass
+
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT current_hits FROM shouts WHERE hash = %s", (shout_hash,))
+        counted = cursor.fetchone()[0]
+        cursor.execute("DELETE FROM shouts WHERE hash = %s", (shout_hash,))
+
+    samples.sort()
+    p95 = samples[int(len(samples) * 0.95) - 1] if samples else 0.0
+    median = statistics.median(samples) if samples else 0.0
+    consistent = 'ok' if counted == len(samples) else f'MISMATCH ({counted} counted)'
+    print(f"{label:<10} clients {clients:>3}  {len(samples) / duration:9.1f} views/s  "
+          f"p50 {median:7.3f} ms  p95 {p95:7.3f} ms  errors {len(errors)}  hits {consistent}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', default='1,8,32,64', help='comma-separated client counts')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per run')
+    parser.add_argument('--compare', action='store_true', help='also run the row-locking implementation')
+    parser.add_argument('--redis', action='store_true', help='also run through the Redis hot-shout tier')
+    args = parser.parse_args()
+
+    store = HotShoutStore(enabled=True, min_hits=1, flush_interval=1.0, batch_size=500) if args.redis else None
+
+    conn = create_session_connection()
+    try:
+        if args.compare:
+            with conn.cursor() as cursor:
+                cursor.execute(LOCKING_FUNCTION)
+
+        for clients in (int(value) for value in args.clients.split(',')):
+            run('update', 'increment_shout_hit', conn, clients, args.duration)
+            if args.compare:
+                run('for-update', 'bench_increment_shout_hit_locking', conn, clients, args.duration)
+            if store is not None:
+                run('redis', None, conn, clients, args.duration, store)
+    finally:
+        if args.compare:
+            with conn.cursor() as cursor:
+                cursor.execute("DROP FUNCTION IF EXISTS bench_increment_shout_hit_locking(text, text, text)")
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
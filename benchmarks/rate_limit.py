@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Cost of one rate limit check, per backend.
+
+Every thread calls RateLimiter.check in a tight loop over a pool of client
+IPs (so buckets are created, refilled and refused, as under real traffic)
+and the wall time per check is reported (threads share the GIL, so this is
+what a check costs the worker process). The memory backend needs nothing
+running; pass --redis-url for the shared Redis backend:
+
+    python benchmarks/rate_limit.py --threads 1,4,16 --checks 200000
+    python benchmarks/rate_limit.py --redis-url redis://localhost:6379/0 --checks 20000
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from backend.services.rate_limiter import RateLimiter, parse_limit
+
+
+def worker(limiter, clients, checks, offset, results):
+    limited = 0
+    for i in range(checks):
+        if limiter.check('bench', clients[(offset + i) % len(clients)]) > 0:
+            limited += 1
+    results.append(limited)
+
+
+def run(label, storage_url, threads, checks, clients, limit):
+    limiter = RateLimiter(
+        limits={'bench': parse_limit(limit)},
+        storage_url=storage_url,
+        trusted_proxies=0,
+        memory_shards=64,
+        memory_max_keys=100000
+    )
+    ips = [f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}" for i in range(clients)]
+    per_thread = checks // threads
+    results = []
+
+    pool = [
+        threading.Thread(target=worker, args=(limiter, ips, per_thread, n * 7919, results))
+        for n in range(threads)
+    ]
+    wall_start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    wall = time.perf_counter() - wall_start
+
+    total = per_thread * threads
+    limited = sum(results)
+    per_check = wall / total * 1e6
+    errors = limiter.stats()['errors']
+    print(f"{label:<7} threads {threads:>3}  {per_check:8.2f} us/check  {total / wall:11.0f} checks/s  "
+          f"limited {limited / total:6.1%}  errors {errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', default='1,4,16', help='comma-separated thread counts')
+    parser.add_argument('--checks', type=int, default=200000, help='checks per run (all threads)')
+    parser.add_argument('--clients', type=int, default=10000, help='distinct client IPs')
+    parser.add_argument('--limit', default='20/second', help='limit per client')
+    parser.add_argument('--redis-url', help='also run the Redis backend')
+    args = parser.parse_args()
+
+    for threads in (int(value) for value in args.threads.split(',')):
+        run('memory', 'memory://', threads, args.checks, args.clients, args.limit)
+        if args.redis_url:
+            run('redis', args.redis_url, threads, args.checks, args.clients, args.limit)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: per-call S3 client creation vs the shared pooled client.
+
+Runs against S3_ENDPOINT_URL when set (e.g. local MinIO), otherwise starts
+an in-process moto server as a stand-in:
+
+    python benchmarks/s3_client.py --iterations 200
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+
+def start_moto():
+    """Start a local moto S3 server and point the backend config at it"""
+    from moto.server import ThreadedMotoServer
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = ThreadedMotoServer(port=0)
+    server.start()
+    host, port = server.get_host_and_port()
+
+    os.environ['S3_ENDPOINT_URL'] = f"http://{host}:{port}"
+    os.environ.setdefault('S3_ACCESS_KEY', 'testing')
+    os.environ.setdefault('S3_SECRET_KEY', 'testing')
+    os.environ['S3_USE_SSL'] = 'False'
+    return server
+
+
+def timed(label, fn, iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(i)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {iterations:>6} ops  {elapsed:8.3f}s  {elapsed / iterations * 1000:8.3f} ms/op")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=100)
+    args = parser.parse_args()
+
+    server = None
+    if not os.environ.get('S3_ENDPOINT_URL'):
+        server = start_moto()
+
+    from backend.config import Config
+    from backend.models import storage_client
+
+    Config.S3_ENDPOINT_URL = os.environ['S3_ENDPOINT_URL']
+    Config.S3_ACCESS_KEY = os.environ['S3_ACCESS_KEY']
+    Config.S3_SECRET_KEY = os.environ['S3_SECRET_KEY']
+    Config.S3_USE_SSL = os.environ.get('S3_USE_SSL', 'True').lower() == 'true'
+
+    client = storage_client.get_s3_client()
+    try:
+        client.create_bucket(Bucket=Config.S3_BUCKET)
+    except client.exceptions.BucketAlreadyOwnedByYou:
+        pass
+
+    payload = os.urandom(16 * 1024)
+
+    def fresh_client_roundtrip(i):
+        c = storage_client._build_s3_client()
+        key = f"bench-fresh-{i}"
+        c.put_object(Bucket=Config.S3_BUCKET, Key=key, Body=payload)
+        c.generate_presigned_url('get_object', Params={'Bucket': Config.S3_BUCKET, 'Key': key}, ExpiresIn=300)
+        c.delete_object(Bucket=Config.S3_BUCKET, Key=key)
+
+    def shared_client_roundtrip(i):
+        c = storage_client.get_s3_client()
+        key = f"bench-shared-{i}"
+        c.put_object(Bucket=Config.S3_BUCKET, Key=key, Body=payload)
+        c.generate_presigned_url('get_object', Params={'Bucket': Config.S3_BUCKET, 'Key': key}, ExpiresIn=300)
+        c.delete_object(Bucket=Config.S3_BUCKET, Key=key)
+
+    print(f"endpoint: {Config.S3_ENDPOINT_URL}")
+    fresh = timed('per-call client', fresh_client_roundtrip, args.iterations)
+    shared = timed('shared pooled client', shared_client_roundtrip, args.iterations)
+    print(f"speedup: {fresh / shared:.2f}x")
+
+    if server:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: end-to-end scenarios with machine-readable results.
+
+Scenarios (run all by default, or pick with --scenarios):
+
+    create_text    throughput of POST /api/shouts/create for text shouts
+    view_burst     concurrent views of one shout (hit counting contention);
+                   every burst must count exactly max_hits views
+    chat_polling   N participants polling a chat room while messages are
+                   posted; poll latency and post-to-delivery lag
+    media_upload   multipart video uploads of 1, 10 and 100 MB through the API
+    cleanup        cleanup_expired_content_batch over --cleanup-rows expired
+                   shouts inserted straight into Postgres (the scheduler's DB pass)
+
+The HTTP scenarios need a running API backed by the docker-compose Postgres and
+MinIO; the cleanup scenario connects to Postgres itself (POSTGRES_* env vars as
+for the backend):
+
+    python benchmarks/suite.py --base-url http://localhost:5000 --output results.json
+    python benchmarks/suite.py --scenarios cleanup --cleanup-rows 1000000
+
+Results go to --output as JSON (run metadata plus one object per scenario).
+With --baseline, headline metrics are compared against an earlier results file
+and the run exits 1 when any of them regressed by more than --tolerance.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import aiohttp
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+SCENARIOS = ['create_text', 'view_burst', 'chat_polling', 'media_upload', 'cleanup']
+
+# (scenario, dotted metric path) -> which direction is better
+HEADLINE_METRICS = {
+    ('create_text', 'throughput_rps'): 'higher',
+    ('create_text', 'latency_ms.p95'): 'lower',
+    ('view_burst', 'views_per_second'): 'higher',
+    ('view_burst', 'latency_ms.p95'): 'lower',
+    ('chat_polling', 'poll_latency_ms.p95'): 'lower',
+    ('chat_polling', 'delivery_lag_ms.p95'): 'lower',
+    ('media_upload', 'sizes.1MB.mb_per_second'): 'higher',
+    ('media_upload', 'sizes.10MB.mb_per_second'): 'higher',
+    ('media_upload', 'sizes.100MB.mb_per_second'): 'higher',
+    ('cleanup', 'rows_per_second'): 'higher',
+}
+
+
+def latency_summary(samples):
+    """Percentiles of a list of millisecond samples"""
+    if not samples:
+        return {'count': 0}
+    samples = sorted(samples)
+
+    def pct(p):
+        # Nearest-rank percentile
+        return round(samples[max(0, math.ceil(len(samples) * p) - 1)], 3)
+
+    return {
+        'count': len(samples),
+        'mean': round(statistics.fmean(samples), 3),
+        'p50': round(statistics.median(samples), 3),
+        'p95': pct(0.95),
+        'p99': pct(0.99),
+        'max': round(samples[-1], 3)
+    }
+
+
+async def timed_request(session, method, url, **kwargs):
+    """(status, parsed JSON or None, milliseconds); status 0 on connection errors"""
+    start = time.perf_counter()
+    try:
+        async with session.request(method, url, **kwargs) as response:
+            body = await response.read()
+            elapsed = (time.perf_counter() - start) * 1000
+            try:
+                data = json.loads(body) if body else None
+            except ValueError:
+                data = None
+            return response.status, data, elapsed
+    except aiohttp.ClientError:
+        return 0, None, (time.perf_counter() - start) * 1000
+
+
+async def create_text_shout(session, base_url, max_hits=1):
+    status, data, _ = await timed_request(session, 'POST', f"{base_url}/api/shouts/create",
+                                          json={'type': 'text', 'data': 'benchmark', 'maxhits': max_hits})
+    if status != 201:
+        raise RuntimeError(f"Could not create a shout ({status}): {data}")
+    return data['hash']
+
+
+async def scenario_create_text(session, args):
+    samples, errors = [], 0
+    deadline = time.perf_counter() + args.duration
+
+    async def client():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            status, _, elapsed = await timed_request(
+                session, 'POST', f"{args.base_url}/api/shouts/create",
+                json={'type': 'text', 'data': 'benchmark', 'maxhits': 1, 'maxtime': 1}
+            )
+            if status == 201:
+                samples.append(elapsed)
+            else:
+                errors += 1
+
+    await asyncio.gather(*(client() for _ in range(args.concurrency)))
+    return {
+        'concurrency': args.concurrency,
+        'duration_seconds': args.duration,
+        'requests': len(samples),
+        'errors': errors,
+        'throughput_rps': round(len(samples) / args.duration, 1),
+        'latency_ms': latency_summary(samples)
+    }
+
+
+async def scenario_view_burst(session, args):
+    samples, errors = [], 0
+    counted_total, wall_total, inconsistent = 0, 0.0, 0
+
+    for _ in range(args.bursts):
+        shout_hash = await create_text_shout(session, args.base_url, max_hits=args.burst_hits)
+        url = f"{args.base_url}/api/shouts/{shout_hash}"
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(
+            timed_request(session, 'GET', url) for _ in range(args.burst_size)
+        ))
+        wall_total += time.perf_counter() - start
+
+        counted = sum(1 for status, data, _ in results if status == 200 and data and data.get('valid'))
+        errors += sum(1 for status, _, _ in results if status == 0 or status >= 500)
+        samples.extend(elapsed for _, _, elapsed in results)
+        counted_total += counted
+        # Never more views than max_hits, and none lost while hits were left
+        if counted != min(args.burst_hits, args.burst_size):
+            inconsistent += 1
+
+    return {
+        'bursts': args.bursts,
+        'burst_size': args.burst_size,
+        'max_hits': args.burst_hits,
+        'counted_views': counted_total,
+        'inconsistent_bursts': inconsistent,
+        'errors': errors,
+        'views_per_second': round(counted_total / wall_total, 1) if wall_total else 0.0,
+        'latency_ms': latency_summary(samples)
+    }
+
+
+async def scenario_chat_polling(session, args):
+    status, data, _ = await timed_request(session, 'POST', f"{args.base_url}/api/chat/create")
+    if status not in (200, 201):
+        raise RuntimeError(f"Could not create a chat room ({status}): {data}")
+    chat_hash = data['hash']
+    messages_url = f"{args.base_url}/api/chat/{chat_hash}/messages"
+
+    sent_at = {}
+    poll_samples, lag_samples = [], []
+    errors = 0
+    deadline = time.perf_counter() + args.duration
+
+    async def poster():
+        nonlocal errors
+        seq = 0
+        while time.perf_counter() < deadline:
+            sent_at[f"bench-{seq}"] = time.perf_counter()
+            status, _, _ = await timed_request(session, 'POST', f"{args.base_url}/api/chat/{chat_hash}/message",
+                                               json={'type': 'text', 'data': f"bench-{seq}"})
+            if status not in (200, 201):
+                errors += 1
+            seq += 1
+            await asyncio.sleep(args.post_interval)
+
+    async def participant():
+        nonlocal errors
+        cursor, etag = None, None
+        seen = set()
+        while time.perf_counter() < deadline:
+            headers = {'If-None-Match': etag} if etag else {}
+            params = {'since': cursor} if cursor else {}
+            start = time.perf_counter()
+            try:
+                async with session.get(messages_url, params=params, headers=headers) as response:
+                    body = await response.read()
+                    received = time.perf_counter()
+                    poll_samples.append((received - start) * 1000)
+                    if response.status == 200:
+                        etag = response.headers.get('ETag')
+                        data = json.loads(body)
+                        cursor = data.get('cursor') or cursor
+                        for message in data.get('messages', []):
+                            text = (message.get('shouts') or {}).get('content_text')
+                            if text in sent_at and text not in seen:
+                                seen.add(text)
+                                lag_samples.append((received - sent_at[text]) * 1000)
+                    elif response.status != 304:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+            await asyncio.sleep(args.poll_interval)
+
+    await asyncio.gather(poster(), *(participant() for _ in range(args.participants)))
+    return {
+        'participants': args.participants,
+        'poll_interval_seconds': args.poll_interval,
+        'messages_posted': len(sent_at),
+        'polls': len(poll_samples),
+        'errors': errors,
+        'poll_latency_ms': latency_summary(poll_samples),
+        # Includes up to one poll interval of waiting, by design of polling
+        'delivery_lag_ms': latency_summary(lag_samples)
+    }
+
+
+async def scenario_media_upload(session, args):
+    sizes = {}
+    payload = os.urandom(max(args.upload_sizes) * 1000 * 1000)
+
+    for size_mb in args.upload_sizes:
+        # Decimal MB, so 100 MB still fits under the 100 MiB request limit
+        body = memoryview(payload)[:size_mb * 1000 * 1000]
+        samples, errors = [], 0
+        for _ in range(args.upload_repeats):
+            form = aiohttp.FormData()
+            form.add_field('type', 'video')
+            form.add_field('maxhits', '1')
+            form.add_field('maxtime', '1')
+            form.add_field('data', bytes(body), filename='benchmark.mp4', content_type='video/mp4')
+            status, data, elapsed = await timed_request(session, 'POST', f"{args.base_url}/api/shouts/create",
+                                                        data=form)
+            if status == 201:
+                samples.append(elapsed)
+            else:
+                errors += 1
+
+        mean_seconds = statistics.fmean(samples) / 1000 if samples else 0.0
+        sizes[f"{size_mb}MB"] = {
+            'uploads': len(samples),
+            'errors': errors,
+            'mb_per_second': round(size_mb / mean_seconds, 2) if mean_seconds else 0.0,
+            'latency_ms': latency_summary(samples)
+        }
+
+    return {'repeats': args.upload_repeats, 'sizes': sizes}
+
+
+def scenario_cleanup(args):
+    from backend.models.db_client import create_session_connection
+    from backend.services.cleanup_service import CleanupService
+
+    marker = f"benchmark-cleanup-{int(time.time())}"
+    conn = create_session_connection()
+    try:
+        with conn.cursor() as cursor:
+            start = time.perf_counter()
+            cursor.execute("""
+                INSERT INTO shouts (hash, type, max_hits, max_time_minutes, content_text, created_at, expires_at)
+                SELECT md5(%s || n::text) || md5(random()::text), 'text', 1, 1, %s,
+                       now() - interval '2 hours', now() - interval '1 hour'
+                FROM generate_series(1, %s) AS n
+            """, (marker, marker, args.cleanup_rows))
+            cursor.execute("ANALYZE shouts")
+            seed_seconds = time.perf_counter() - start
+
+        batch_samples, expired = [], 0
+        start = time.perf_counter()
+        while True:
+            batch_start = time.perf_counter()
+            counts = CleanupService.cleanup_expired_content_batch(args.cleanup_batch)
+            batch_samples.append((time.perf_counter() - batch_start) * 1000)
+            expired += counts['expired_shouts']
+            if max(counts.values()) < args.cleanup_batch:
+                break
+        elapsed = time.perf_counter() - start
+
+        return {
+            'rows': args.cleanup_rows,
+            'batch_size': args.cleanup_batch,
+            'seed_seconds': round(seed_seconds, 3),
+            'expired_shouts': expired,
+            'batches': len(batch_samples),
+            'elapsed_seconds': round(elapsed, 3),
+            'rows_per_second': round(expired / elapsed, 1) if elapsed else 0.0,
+            'batch_latency_ms': latency_summary(batch_samples)
+        }
+    finally:
+        with conn.cursor() as cursor:
+            cursor.execute("DELETE FROM shouts WHERE content_text = %s", (marker,))
+        conn.close()
+
+
+def run_metadata(args):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=parent_dir,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'git_commit': commit,
+        'base_url': args.base_url,
+        'python': platform.python_version(),
+        'host': platform.node(),
+        'arguments': {key: value for key, value in vars(args).items() if key not in ('baseline', 'output')}
+    }
+
+
+def metric_value(results, scenario, path):
+    value = results.get(scenario)
+    for key in path.split('.'):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def compare(results, baseline, tolerance):
+    """Print headline metrics against a baseline; returns the number of regressions"""
+    regressions = 0
+    for (scenario, path), better in HEADLINE_METRICS.items():
+        current = metric_value(results, scenario, path)
+        previous = metric_value(baseline, scenario, path)
+        if current is None or not previous:
+            continue
+        change = (current - previous) / previous
+        regressed = change < -tolerance if better == 'higher' else change > tolerance
+        regressions += regressed
+        print(f"{'REGRESSION' if regressed else 'ok':<10} {scenario}.{path:<28} "
+              f"{previous:>10} -> {current:>10} ({change:+.1%})")
+    return regressions
+
+
+async def run_http_scenarios(args, selected):
+    results = {}
+    handlers = {
+        'create_text': scenario_create_text,
+        'view_burst': scenario_view_burst,
+        'chat_polling': scenario_chat_polling,
+        'media_upload': scenario_media_upload,
+    }
+    connector = aiohttp.TCPConnector(limit=max(args.concurrency, args.burst_size, args.participants + 1))
+    timeout = aiohttp.ClientTimeout(total=600)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        for name in selected:
+            if name in handlers:
+                print(f"running {name} ...", flush=True)
+                results[name] = await handlers[name](session, args)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://localhost:5000')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='comma-separated subset of: ' + ', '.join(SCENARIOS))
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--baseline', help='earlier results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='allowed relative regression (0.15 = 15%%)')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds for timed scenarios')
+    parser.add_argument('--concurrency', type=int, default=32, help='clients for create_text')
+    parser.add_argument('--bursts', type=int, default=20)
+    parser.add_argument('--burst-size', type=int, default=200, help='concurrent views per burst')
+    parser.add_argument('--burst-hits', type=int, default=100, help='max_hits of the burst shout (<= 100)')
+    parser.add_argument('--participants', type=int, default=20)
+    parser.add_argument('--poll-interval', type=float, default=1.0)
+    parser.add_argument('--post-interval', type=float, default=0.5)
+    parser.add_argument('--upload-sizes', default='1,10,100', help='comma-separated sizes in MB')
+    parser.add_argument('--upload-repeats', type=int, default=3)
+    parser.add_argument('--cleanup-rows', type=int, default=1000000)
+    parser.add_argument('--cleanup-batch', type=int, default=1000)
+    args = parser.parse_args()
+    args.upload_sizes = [int(size) for size in args.upload_sizes.split(',')]
+
+    selected = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(selected) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    report = {'meta': run_metadata(args), 'results': {}}
+    report['results'].update(asyncio.run(run_http_scenarios(args, selected)))
+    if 'cleanup' in selected:
+        print("running cleanup ...", flush=True)
+        report['results']['cleanup'] = scenario_cleanup(args)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report['results'], indent=2))
+    print(f"results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(report['results'], baseline.get('results', {}), args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
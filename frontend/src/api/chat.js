@@ -1,4 +1,4 @@
-import apiClient from './client';
+import apiClient, { shoutOptionHeaders } from './client';
 
 export const chatApi = {
   /**
@@ -18,21 +18,31 @@ export const chatApi = {
   },
 
   /**
-   * Get all messages in a chat room
+   * Get messages in a chat room (only newer ones when a `since` cursor is given)
    */
-  getChatMessages: async (hash) => {
-    const response = await apiClient.get(`/api/chat/${hash}/messages`);
+  getChatMessages: async (hash, since = null) => {
+    const params = since ? { since } : {};
+    const response = await apiClient.get(`/api/chat/${hash}/messages`, { params });
     return response.data;
   },
 
+  /**
+   * Open a Server-Sent Events stream of new messages in a chat room
+   */
+  openMessageStream: (hash) => {
+    return new EventSource(`${apiClient.defaults.baseURL}/api/chat/${hash}/events`);
+  },
+
   /**
    * Post a message to a chat room
    */
   postChatMessage: async (hash, data) => {
+    const maxhits = data.maxhits || 10;
+    const maxtime = data.maxtime || 5;
     const formData = new FormData();
     formData.append('type', data.type);
-    formData.append('maxhits', data.maxhits || 10);
-    formData.append('maxtime', data.maxtime || 5);
+    formData.append('maxhits', maxhits);
+    formData.append('maxtime', maxtime);
 
     if (data.type === 'text') {
       formData.append('data', data.content);
@@ -45,6 +55,7 @@ export const chatApi = {
     const response = await apiClient.post(`/api/chat/${hash}/message`, formData, {
       headers: {
         'Content-Type': 'multipart/form-data',
+        ...shoutOptionHeaders(data.type, maxhits, maxtime),
       },
     });
     return response.data;
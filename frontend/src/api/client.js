@@ -28,4 +28,14 @@ apiClient.interceptors.response.use(
   }
 );
 
+/**
+ * Shout options repeated as headers, so the API can size (or refuse) an upload
+ * before reading its body
+ */
+export const shoutOptionHeaders = (type, maxhits, maxtime) => ({
+  'X-Shout-Type': type,
+  'X-Shout-Max-Hits': String(maxhits),
+  'X-Shout-Max-Time': String(maxtime),
+});
+
 export default apiClient;
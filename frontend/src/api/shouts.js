@@ -1,23 +1,27 @@
-import apiClient from './client';
+import apiClient, { shoutOptionHeaders } from './client';
 
 export const shoutApi = {
   /**
    * Create a new shout
    */
   createShout: async (data) => {
+    const maxhits = data.maxhits || 1;
+    const maxtime = data.maxtime || 240;
     const formData = new FormData();
     formData.append('type', data.type);
-    formData.append('maxhits', data.maxhits || 1);
-    formData.append('maxtime', data.maxtime || 240);
+    formData.append('maxhits', maxhits);
+    formData.append('maxtime', maxtime);
 
     if (data.type === 'text') {
       formData.append('data', data.content);
-      const response = await apiClient.post('/api/shouts/create', formData);
+      const response = await apiClient.post('/api/shouts/create', formData, {
+        headers: shoutOptionHeaders(data.type, maxhits, maxtime),
+      });
       return response.data;
     } else {
-      // For media files
+      // Media files go straight to storage; the API only registers them
       if (data.file) {
-        formData.append('data', data.file);
+        return shoutApi.createShoutDirect(data);
       } else if (data.content) {
         // For base64 encoded content (photos from canvas)
         formData.append('data', data.content);
@@ -26,12 +30,50 @@ export const shoutApi = {
       const response = await apiClient.post('/api/shouts/create', formData, {
         headers: {
           'Content-Type': 'multipart/form-data',
+          ...shoutOptionHeaders(data.type, maxhits, maxtime),
         },
       });
       return response.data;
     }
   },
 
+  /**
+   * Create a media shout by uploading the file directly to storage
+   */
+  createShoutDirect: async (data) => {
+    const { data: ticket } = await apiClient.post('/api/shouts/upload-url', {
+      type: data.type,
+    });
+
+    if (data.file.size > ticket.max_size) {
+      throw new Error(`File too large (max ${Math.floor(ticket.max_size / (1024 * 1024))}MB)`);
+    }
+
+    // Presigned POST: policy fields first, file last
+    const uploadForm = new FormData();
+    Object.entries(ticket.upload.fields).forEach(([key, value]) => {
+      uploadForm.append(key, value);
+    });
+    uploadForm.append('Content-Type', data.file.type);
+    uploadForm.append('file', data.file);
+
+    const uploadResponse = await fetch(ticket.upload.url, {
+      method: 'POST',
+      body: uploadForm,
+    });
+    if (!uploadResponse.ok) {
+      throw new Error(`Upload failed (${uploadResponse.status})`);
+    }
+
+    const response = await apiClient.post('/api/shouts/finalize', {
+      type: data.type,
+      storage_key: ticket.storage_key,
+      maxhits: data.maxhits || 1,
+      maxtime: data.maxtime || 240,
+    });
+    return response.data;
+  },
+
   /**
    * Get a shout by hash
    */
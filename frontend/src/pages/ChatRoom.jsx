@@ -19,16 +19,23 @@ function ChatRoom() {
 
   const messagesEndRef = useRef(null);
   const pollIntervalRef = useRef(null);
+  const eventSourceRef = useRef(null);
+  const cursorRef = useRef(null);
 
   useEffect(() => {
+    cursorRef.current = null;
+
     if (chatHash) {
       loadChatRoom();
-      startPolling();
+      startStreaming();
     } else {
       setLoading(false);
     }
 
     return () => {
+      if (eventSourceRef.current) {
+        eventSourceRef.current.close();
+      }
       if (pollIntervalRef.current) {
         clearInterval(pollIntervalRef.current);
       }
@@ -60,9 +67,14 @@ function ChatRoom() {
 
   const loadMessages = async () => {
     try {
-      const result = await chatApi.getChatMessages(chatHash);
+      const result = await chatApi.getChatMessages(chatHash, cursorRef.current);
       if (result.success) {
-        setMessages(result.messages);
+        if (cursorRef.current) {
+          result.messages.forEach(appendMessage);
+        } else {
+          setMessages(result.messages);
+        }
+        cursorRef.current = result.cursor || cursorRef.current;
         setLoading(false);
       }
     } catch (err) {
@@ -70,7 +82,38 @@ function ChatRoom() {
     }
   };
 
+  const appendMessage = (message) => {
+    setMessages((prev) => (
+      prev.some((m) => m.id === message.id) ? prev : [...prev, message]
+    ));
+  };
+
+  const startStreaming = () => {
+    if (typeof EventSource === 'undefined') {
+      startPolling();
+      return;
+    }
+
+    // The browser reconnects on its own and resumes via Last-Event-ID
+    const source = chatApi.openMessageStream(chatHash);
+    source.addEventListener('message', (event) => {
+      appendMessage(JSON.parse(event.data));
+      setLoading(false);
+    });
+    source.addEventListener('expired', () => {
+      source.close();
+    });
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED) {
+        startPolling();
+      }
+    };
+    eventSourceRef.current = source;
+  };
+
   const startPolling = () => {
+    if (pollIntervalRef.current) return;
+
     pollIntervalRef.current = setInterval(() => {
       loadMessages();
     }, 3000);
@@ -92,7 +135,9 @@ function ChatRoom() {
       });
 
       setMessageText('');
-      loadMessages();
+      if (pollIntervalRef.current) {
+        loadMessages();
+      }
     } catch (err) {
       alert('Failed to send message');
     } finally {
@@ -0,0 +1,20 @@
+/*
+  # Keyset index for incremental chat message fetches
+
+  ## Overview
+  Chat clients fetch only messages newer than a `(created_at, id)` cursor:
+
+    WHERE chat_room_id = $1 AND (created_at, id) > ($2, $3)
+    ORDER BY created_at, id
+    LIMIT $4
+
+  ## Indexes
+    - `idx_chat_messages_room_created_id` on (chat_room_id, created_at, id) serves the
+      filter, the row comparison and the ordering from a single index range scan
+    - `idx_chat_messages_chat_room_id` is dropped; it is a prefix of the new index
+*/
+
+CREATE INDEX IF NOT EXISTS idx_chat_messages_room_created_id
+  ON chat_messages(chat_room_id, created_at, id);
+
+DROP INDEX IF EXISTS idx_chat_messages_chat_room_id;
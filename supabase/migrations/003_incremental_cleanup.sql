@@ -0,0 +1,59 @@
+/*
+  # Incremental cleanup
+
+  ## Overview
+  `cleanup_expired_content()` expires, deletes and cascades everything in one
+  statement per table, which holds locks for as long as the backlog takes.
+  The background cleanup scheduler instead calls the batched variant in a loop
+  until it reports no more work or its time budget runs out.
+
+  ## New Functions
+    - `cleanup_expired_content_batch(batch_limit integer)` does the same work as
+      `cleanup_expired_content()` but touches at most `batch_limit` rows per table
+      and returns how many rows it expired or deleted:
+        - `expired_shouts` - shouts marked inactive
+        - `deleted_hit_logs` - hit logs older than 7 days removed
+        - `deleted_chat_rooms` - chat rooms expired over an hour ago removed
+      Rows locked by a concurrent reader are skipped and picked up by a later batch.
+*/
+
+CREATE OR REPLACE FUNCTION cleanup_expired_content_batch(batch_limit integer DEFAULT 1000)
+RETURNS TABLE (expired_shouts integer, deleted_hit_logs integer, deleted_chat_rooms integer)
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+  -- Mark expired shouts as inactive
+  UPDATE shouts
+  SET is_active = false
+  WHERE id IN (
+    SELECT id FROM shouts
+    WHERE (expires_at <= now() OR current_hits >= max_hits)
+    AND is_active = true
+    LIMIT batch_limit
+    FOR UPDATE SKIP LOCKED
+  );
+  GET DIAGNOSTICS expired_shouts = ROW_COUNT;
+
+  -- Delete old hit logs (older than 7 days)
+  DELETE FROM hit_logs
+  WHERE id IN (
+    SELECT id FROM hit_logs
+    WHERE viewed_at < now() - interval '7 days'
+    LIMIT batch_limit
+  );
+  GET DIAGNOSTICS deleted_hit_logs = ROW_COUNT;
+
+  -- Delete expired chat rooms (and cascade to messages)
+  DELETE FROM chat_rooms
+  WHERE id IN (
+    SELECT id FROM chat_rooms
+    WHERE expires_at < now() - interval '1 hour'
+    LIMIT batch_limit
+    FOR UPDATE SKIP LOCKED
+  );
+  GET DIAGNOSTICS deleted_chat_rooms = ROW_COUNT;
+
+  RETURN NEXT;
+END;
+$$;
@@ -0,0 +1,100 @@
+/*
+  # Burn-on-read storage deletion
+
+  ## Overview
+  When a view uses up a shout's last hit, its media should leave storage within
+  seconds instead of waiting for the next cleanup sweep. `increment_shout_hit`
+  now records the burned storage key in an outbox table in the same transaction
+  as the hit. The backend deletes the object shortly after the view (off the
+  request path) and removes the outbox row; rows whose deletion failed or whose
+  process died before getting to them are retried by the cleanup scheduler.
+
+  ## New Tables
+
+  ### `storage_deletions` - Outbox of media objects to delete
+    - `storage_key` (text, primary key) - S3 key of the burned media
+    - `created_at` (timestamptz) - When the final view happened
+    - `next_attempt_at` (timestamptz) - Earliest time of the next retry
+    - `attempts` (integer) - Failed deletion attempts so far
+    - `last_error` (text, nullable) - Error of the last failed attempt
+
+  ## Changed Functions
+    - `increment_shout_hit` inserts into `storage_deletions` when the hit it
+      counts is the shout's last one and the shout has media
+
+  ## Security
+    - RLS enabled with no policies; only the backend (table owner) uses it
+*/
+
+CREATE TABLE IF NOT EXISTS storage_deletions (
+  storage_key text PRIMARY KEY,
+  created_at timestamptz NOT NULL DEFAULT now(),
+  next_attempt_at timestamptz NOT NULL DEFAULT now(),
+  attempts integer NOT NULL DEFAULT 0,
+  last_error text
+);
+
+CREATE INDEX IF NOT EXISTS idx_storage_deletions_next_attempt_at ON storage_deletions(next_attempt_at);
+
+ALTER TABLE storage_deletions ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION increment_shout_hit(shout_hash text, client_ip text, client_ua text)
+RETURNS json
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+  shout_record shouts;
+  result json;
+BEGIN
+  -- Get the shout with row lock
+  SELECT * INTO shout_record
+  FROM shouts
+  WHERE hash = shout_hash
+  FOR UPDATE;
+
+  -- Check if shout exists
+  IF NOT FOUND THEN
+    RETURN json_build_object('valid', false, 'reason', 'not_found');
+  END IF;
+
+  -- Check if expired by time
+  IF shout_record.expires_at <= now() THEN
+    UPDATE shouts SET is_active = false WHERE id = shout_record.id;
+    RETURN json_build_object('valid', false, 'reason', 'expired_time');
+  END IF;
+
+  -- Check if expired by hits
+  IF shout_record.current_hits >= shout_record.max_hits THEN
+    UPDATE shouts SET is_active = false WHERE id = shout_record.id;
+    RETURN json_build_object('valid', false, 'reason', 'expired_hits');
+  END IF;
+
+  -- Check if inactive
+  IF NOT shout_record.is_active THEN
+    RETURN json_build_object('valid', false, 'reason', 'inactive');
+  END IF;
+
+  -- Increment hit count
+  UPDATE shouts
+  SET current_hits = current_hits + 1
+  WHERE id = shout_record.id;
+
+  -- Log the hit
+  INSERT INTO hit_logs (shout_id, user_agent, ip_address)
+  VALUES (shout_record.id, client_ua, client_ip);
+
+  -- Last view: queue the media for deletion
+  IF shout_record.current_hits + 1 >= shout_record.max_hits AND shout_record.storage_key IS NOT NULL THEN
+    INSERT INTO storage_deletions (storage_key)
+    VALUES (shout_record.storage_key)
+    ON CONFLICT (storage_key) DO NOTHING;
+  END IF;
+
+  -- Return success with shout data
+  RETURN json_build_object(
+    'valid', true,
+    'shout', row_to_json(shout_record)
+  );
+END;
+$$;
@@ -0,0 +1,257 @@
+/*
+  # Partitioned hit logs
+
+  ## Overview
+  Every view used to insert its hit log row inside the row-locked
+  `increment_shout_hit` transaction, and cleanup deleted old rows one by one.
+  Hit logs are now written by the backend in batches (COPY) after the view has
+  been counted, and retention drops whole daily partitions.
+
+  ## Changed Tables
+
+  ### `hit_logs` - now range-partitioned by `viewed_at`, one partition per day
+    - Partitions are named `hit_logs_YYYYMMDD`; `hit_logs_default` catches rows
+      for days without a partition (they are moved when that day's partition is created)
+    - Primary key is now (`id`, `viewed_at`), as partition keys must be part of it
+    - The foreign key to `shouts` is dropped: rows arrive asynchronously and shouts
+      are never deleted, only deactivated
+    - Rows from the last 7 days are carried over from the old table
+
+  ## New Functions
+    - `ensure_hit_log_partitions(days_ahead)` creates partitions from today up to
+      `days_ahead` days ahead
+    - `drop_old_hit_log_partitions(retention)` drops partitions entirely older than
+      `retention` and returns how many it dropped
+
+  ## Changed Functions
+    - `increment_shout_hit` no longer writes hit logs; the parameters are kept
+      for compatibility
+    - `cleanup_expired_content` and `cleanup_expired_content_batch` maintain the
+      partitions instead of deleting rows; the batch variant now reports
+      `dropped_hit_log_partitions` instead of `deleted_hit_logs`
+*/
+
+ALTER TABLE hit_logs RENAME TO hit_logs_old;
+DROP POLICY IF EXISTS "System can insert hit logs" ON hit_logs_old;
+DROP POLICY IF EXISTS "No direct access to hit logs" ON hit_logs_old;
+ALTER INDEX IF EXISTS idx_hit_logs_shout_id RENAME TO idx_hit_logs_old_shout_id;
+ALTER INDEX IF EXISTS idx_hit_logs_viewed_at RENAME TO idx_hit_logs_old_viewed_at;
+
+CREATE TABLE hit_logs (
+  id uuid NOT NULL DEFAULT gen_random_uuid(),
+  shout_id uuid NOT NULL,
+  user_agent text,
+  ip_address text,
+  viewed_at timestamptz NOT NULL DEFAULT now(),
+  PRIMARY KEY (id, viewed_at)
+) PARTITION BY RANGE (viewed_at);
+
+CREATE TABLE hit_logs_default PARTITION OF hit_logs DEFAULT;
+
+CREATE INDEX IF NOT EXISTS idx_hit_logs_shout_id ON hit_logs(shout_id);
+
+-- Create (or adopt rows from the default partition into) daily partitions
+CREATE OR REPLACE FUNCTION ensure_hit_log_partitions(days_ahead integer DEFAULT 3, days_back integer DEFAULT 0)
+RETURNS integer
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+  day date;
+  partition_name text;
+  created integer := 0;
+BEGIN
+  FOR day IN
+    SELECT generate_series(current_date - days_back, current_date + days_ahead, interval '1 day')::date
+  LOOP
+    partition_name := 'hit_logs_' || to_char(day, 'YYYYMMDD');
+    CONTINUE WHEN to_regclass(partition_name) IS NOT NULL;
+
+    -- Attaching validates the default partition, so move that day's rows out first
+    EXECUTE format('CREATE TABLE %I (LIKE hit_logs INCLUDING DEFAULTS)', partition_name);
+    EXECUTE format(
+      'WITH moved AS (DELETE FROM hit_logs_default WHERE viewed_at >= %L AND viewed_at < %L RETURNING *)
+       INSERT INTO %I SELECT * FROM moved',
+      day, day + 1, partition_name
+    );
+    EXECUTE format(
+      'ALTER TABLE hit_logs ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+      partition_name, day, day + 1
+    );
+    created := created + 1;
+  END LOOP;
+
+  RETURN created;
+END;
+$$;
+
+-- Drop daily partitions whose whole day is older than the retention period
+CREATE OR REPLACE FUNCTION drop_old_hit_log_partitions(retention interval DEFAULT interval '7 days')
+RETURNS integer
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+  part record;
+  dropped integer := 0;
+BEGIN
+  FOR part IN
+    SELECT child.relname
+    FROM pg_inherits
+    JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE parent.relname = 'hit_logs'
+    AND child.relname ~ '^hit_logs_[0-9]{8}$'
+  LOOP
+    IF to_date(substring(part.relname from 10), 'YYYYMMDD') + 1 <= now() - retention THEN
+      EXECUTE format('DROP TABLE %I', part.relname);
+      dropped := dropped + 1;
+    END IF;
+  END LOOP;
+
+  -- Rows that landed in the default partition age out too
+  DELETE FROM hit_logs_default WHERE viewed_at < now() - retention;
+
+  RETURN dropped;
+END;
+$$;
+
+SELECT ensure_hit_log_partitions(3, 7);
+
+INSERT INTO hit_logs (id, shout_id, user_agent, ip_address, viewed_at)
+SELECT id, shout_id, user_agent, ip_address, viewed_at
+FROM hit_logs_old
+WHERE viewed_at >= current_date - 7;
+
+DROP TABLE hit_logs_old;
+
+-- Enable Row Level Security
+ALTER TABLE hit_logs ENABLE ROW LEVEL SECURITY;
+
+-- Only system can insert hit logs
+CREATE POLICY "System can insert hit logs"
+  ON hit_logs FOR INSERT
+  WITH CHECK (true);
+
+-- No one can read hit logs directly (use functions for analytics)
+CREATE POLICY "No direct access to hit logs"
+  ON hit_logs FOR SELECT
+  USING (false);
+
+CREATE OR REPLACE FUNCTION increment_shout_hit(shout_hash text, client_ip text, client_ua text)
+RETURNS json
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+  shout_record shouts;
+  result json;
+BEGIN
+  -- Get the shout with row lock
+  SELECT * INTO shout_record
+  FROM shouts
+  WHERE hash = shout_hash
+  FOR UPDATE;
+
+  -- Check if shout exists
+  IF NOT FOUND THEN
+    RETURN json_build_object('valid', false, 'reason', 'not_found');
+  END IF;
+
+  -- Check if expired by time
+  IF shout_record.expires_at <= now() THEN
+    UPDATE shouts SET is_active = false WHERE id = shout_record.id;
+    RETURN json_build_object('valid', false, 'reason', 'expired_time');
+  END IF;
+
+  -- Check if expired by hits
+  IF shout_record.current_hits >= shout_record.max_hits THEN
+    UPDATE shouts SET is_active = false WHERE id = shout_record.id;
+    RETURN json_build_object('valid', false, 'reason', 'expired_hits');
+  END IF;
+
+  -- Check if inactive
+  IF NOT shout_record.is_active THEN
+    RETURN json_build_object('valid', false, 'reason', 'inactive');
+  END IF;
+
+  -- Increment hit count (the hit log is written by the backend afterwards)
+  UPDATE shouts
+  SET current_hits = current_hits + 1
+  WHERE id = shout_record.id;
+
+  -- Last view: queue the media for deletion
+  IF shout_record.current_hits + 1 >= shout_record.max_hits AND shout_record.storage_key IS NOT NULL THEN
+    INSERT INTO storage_deletions (storage_key)
+    VALUES (shout_record.storage_key)
+    ON CONFLICT (storage_key) DO NOTHING;
+  END IF;
+
+  -- Return success with shout data
+  RETURN json_build_object(
+    'valid', true,
+    'shout', row_to_json(shout_record)
+  );
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION cleanup_expired_content()
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+  -- Mark expired shouts as inactive
+  UPDATE shouts
+  SET is_active = false
+  WHERE (expires_at <= now() OR current_hits >= max_hits)
+  AND is_active = true;
+
+  -- Hit log retention (7 days) by partition
+  PERFORM drop_old_hit_log_partitions(interval '7 days');
+  PERFORM ensure_hit_log_partitions(3);
+
+  -- Delete expired chat rooms (and cascade to messages)
+  DELETE FROM chat_rooms
+  WHERE expires_at < now() - interval '1 hour';
+END;
+$$;
+
+-- The result columns change, so the function has to be recreated
+DROP FUNCTION IF EXISTS cleanup_expired_content_batch(integer);
+
+CREATE FUNCTION cleanup_expired_content_batch(batch_limit integer DEFAULT 1000)
+RETURNS TABLE (expired_shouts integer, dropped_hit_log_partitions integer, deleted_chat_rooms integer)
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+  -- Mark expired shouts as inactive
+  UPDATE shouts
+  SET is_active = false
+  WHERE id IN (
+    SELECT id FROM shouts
+    WHERE (expires_at <= now() OR current_hits >= max_hits)
+    AND is_active = true
+    LIMIT batch_limit
+    FOR UPDATE SKIP LOCKED
+  );
+  GET DIAGNOSTICS expired_shouts = ROW_COUNT;
+
+  -- Hit log retention (7 days) by partition
+  dropped_hit_log_partitions := drop_old_hit_log_partitions(interval '7 days');
+  PERFORM ensure_hit_log_partitions(3);
+
+  -- Delete expired chat rooms (and cascade to messages)
+  DELETE FROM chat_rooms
+  WHERE id IN (
+    SELECT id FROM chat_rooms
+    WHERE expires_at < now() - interval '1 hour'
+    LIMIT batch_limit
+    FOR UPDATE SKIP LOCKED
+  );
+  GET DIAGNOSTICS deleted_chat_rooms = ROW_COUNT;
+
+  RETURN NEXT;
+END;
+$$;
@@ -0,0 +1,85 @@
+/*
+  # Lock-free hit counting
+
+  ## Overview
+  `increment_shout_hit` used to lock the shout row with `SELECT ... FOR UPDATE`,
+  check it, and then update it, so concurrent viewers of a popular multi-view
+  shout queued behind each other for the whole function. A view is now counted
+  by one conditional UPDATE that only succeeds while the shout is viewable:
+
+    UPDATE shouts SET current_hits = current_hits + 1
+    WHERE hash = $1 AND is_active AND expires_at > now() AND current_hits < max_hits
+    RETURNING *
+
+  The row lock is held only for that statement (plus the burn outbox insert on
+  the last view). Postgres re-checks the WHERE clause against the latest row
+  version, so `current_hits` can never pass `max_hits`.
+
+  ## Changed Functions
+    - `increment_shout_hit` counts the view with the conditional UPDATE. Only when
+      it matches nothing does a plain lookup run to classify the failure
+      (`not_found`, `expired_time`, `expired_hits`, `inactive`) and deactivate
+      expired shouts. The returned shout still shows `current_hits` as it was
+      before this view, as before.
+*/
+
+CREATE OR REPLACE FUNCTION increment_shout_hit(shout_hash text, client_ip text, client_ua text)
+RETURNS json
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+  shout_record shouts;
+BEGIN
+  -- Count the view if the shout is still viewable
+  UPDATE shouts
+  SET current_hits = current_hits + 1
+  WHERE hash = shout_hash
+  AND is_active
+  AND expires_at > now()
+  AND current_hits < max_hits
+  RETURNING * INTO shout_record;
+
+  IF FOUND THEN
+    -- Last view: queue the media for deletion
+    IF shout_record.current_hits >= shout_record.max_hits AND shout_record.storage_key IS NOT NULL THEN
+      INSERT INTO storage_deletions (storage_key)
+      VALUES (shout_record.storage_key)
+      ON CONFLICT (storage_key) DO NOTHING;
+    END IF;
+
+    -- Report the shout as it was before this view was counted
+    shout_record.current_hits := shout_record.current_hits - 1;
+
+    RETURN json_build_object(
+      'valid', true,
+      'shout', row_to_json(shout_record)
+    );
+  END IF;
+
+  -- Not counted: find out why
+  SELECT * INTO shout_record
+  FROM shouts
+  WHERE hash = shout_hash;
+
+  -- Check if shout exists
+  IF NOT FOUND THEN
+    RETURN json_build_object('valid', false, 'reason', 'not_found');
+  END IF;
+
+  -- Check if expired by time
+  IF shout_record.expires_at <= now() THEN
+    UPDATE shouts SET is_active = false WHERE id = shout_record.id AND is_active;
+    RETURN json_build_object('valid', false, 'reason', 'expired_time');
+  END IF;
+
+  -- Check if expired by hits
+  IF shout_record.current_hits >= shout_record.max_hits THEN
+    UPDATE shouts SET is_active = false WHERE id = shout_record.id AND is_active;
+    RETURN json_build_object('valid', false, 'reason', 'expired_hits');
+  END IF;
+
+  -- Inactive (or changed by a transaction that committed since the UPDATE)
+  RETURN json_build_object('valid', false, 'reason', 'inactive');
+END;
+$$;
@@ -0,0 +1,45 @@
+/*
+  # Partial indexes on shouts
+
+  ## Overview
+  Every shout insert maintained five indexes, some of which no query could use
+  well. The shouts indexes now match what actually runs against the table:
+
+    - view / existence checks:  WHERE hash = $1
+    - expiry sweep:             WHERE is_active AND (expires_at <= now() OR ...)
+    - storage cleanup scan:     WHERE is_active = false AND storage_key IS NOT NULL
+    - finalize / burn cleanup:  WHERE storage_key = $1 / = ANY($1)
+
+  ## Removed Indexes
+    - `idx_shouts_hash` duplicates the index behind the UNIQUE constraint on `hash`
+    - `idx_shouts_is_active` indexes a boolean; it is never selective enough to use
+    - `idx_shouts_expires_at` also covered burned and expired rows the sweep skips
+
+  ## New Indexes
+    - `idx_shouts_active_expires_at` on (expires_at) WHERE is_active - only shouts
+      that can still expire
+    - `idx_shouts_cleanup_storage_key` on (storage_key) WHERE NOT is_active AND
+      storage_key IS NOT NULL - exactly the media still waiting for cleanup; rows
+      leave it once their key is cleared
+    - `idx_shouts_storage_key` on (storage_key) WHERE storage_key IS NOT NULL -
+      key lookups for media shouts only (text shouts are not indexed)
+
+  ## Notes
+    - `current_hits` stays unindexed so hit counting remains a HOT update
+    - Indexes are built and dropped CONCURRENTLY so a live table keeps taking
+      writes; run this file outside a transaction block (plain psql does)
+    - `benchmarks/explain_cleanup.py` checks that the cleanup queries use these
+*/
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_shouts_active_expires_at
+  ON shouts(expires_at) WHERE is_active;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_shouts_cleanup_storage_key
+  ON shouts(storage_key) WHERE NOT is_active AND storage_key IS NOT NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_shouts_storage_key
+  ON shouts(storage_key) WHERE storage_key IS NOT NULL;
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_shouts_hash;
+DROP INDEX CONCURRENTLY IF EXISTS idx_shouts_is_active;
+DROP INDEX CONCURRENTLY IF EXISTS idx_shouts_expires_at;
@@ -0,0 +1,49 @@
+/*
+  # Shout creation notifications
+
+  ## Overview
+  Each backend process keeps a Bloom filter of live shout hashes so existence
+  checks (link previews, `/api/shouts/check/<hash>`) can reject unknown hashes
+  without a query. The filter is loaded from the table and then kept complete
+  by listening on the `shout_created` channel, which this trigger feeds for
+  every insert, whichever code path (API, chat, benchmarks) made it.
+
+  ## New Functions
+    - `notify_shouts_created()` - statement-level trigger function; sends the
+      new hashes comma-separated, or `*` when a statement inserted more than
+      100 rows (listeners then reload their filter from the table)
+
+  ## New Triggers
+    - `shouts_created_notify` AFTER INSERT ON shouts, once per statement
+
+  ## Notes
+    - Notifications are sent on commit, so listeners never see rolled-back shouts
+    - 100 hashes of 48 characters stay well below the 8000 byte payload limit
+*/
+
+CREATE OR REPLACE FUNCTION notify_shouts_created()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  created integer;
+BEGIN
+  SELECT count(*) INTO created FROM new_shouts;
+
+  IF created > 100 THEN
+    PERFORM pg_notify('shout_created', '*');
+  ELSIF created > 0 THEN
+    PERFORM pg_notify('shout_created', (SELECT string_agg(hash, ',') FROM new_shouts));
+  END IF;
+
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS shouts_created_notify ON shouts;
+
+CREATE TRIGGER shouts_created_notify
+  AFTER INSERT ON shouts
+  REFERENCING NEW TABLE AS new_shouts
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION notify_shouts_created();
@@ -0,0 +1,20 @@
+/*
+  # Hot-tier flag on shouts
+
+  ## Overview
+  Views of shouts copied to the Redis hot tier are counted in Redis and only
+  written back to Postgres in batches. If Redis is unreachable, counting such
+  a view in Postgres instead would let it serve a shout Postgres already
+  burned once Redis is back (Redis still holds its old allowance). The flag
+  records which shouts the hot tier counts, so the fallback can refuse them.
+
+  ## Modified Tables
+    - `shouts`
+      - `hot_tier` (boolean, default false) - views are counted in Redis
+
+  ## Notes
+    - Adding a column with a constant default does not rewrite the table
+    - The flag is set at creation and never changes
+*/
+
+ALTER TABLE shouts ADD COLUMN IF NOT EXISTS hot_tier boolean NOT NULL DEFAULT false;
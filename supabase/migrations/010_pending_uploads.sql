@@ -0,0 +1,51 @@
+/*
+  # Pending direct uploads
+
+  ## Overview
+  `/api/shouts/upload-url` hands the browser a presigned POST for a new storage
+  key, and `/api/shouts/finalize` later turns the uploaded object into a shout.
+  Two concurrent finalizes of one key could both pass the "already finalized"
+  check and create two shouts for one object (the first burn then deleted media
+  the second still pointed to), and uploads that were never finalized stayed
+  in storage forever.
+
+  Issued keys are now recorded in `pending_uploads`. Finalize claims the row
+  (DELETE ... RETURNING) in the same statement that inserts the shout, so a
+  key becomes at most one shout. The cleanup scheduler moves rows left
+  unclaimed past PENDING_UPLOAD_TTL into the `storage_deletions` outbox,
+  which deletes their objects.
+
+  ## New Tables
+    ### `pending_uploads` - Storage keys issued for direct upload, not yet finalized
+    - `storage_key` (text, primary key)
+    - `created_at` (timestamptz) - When the upload URL was issued
+
+  ## New Indexes
+    - `idx_shouts_storage_key_unique` UNIQUE on shouts(storage_key) WHERE
+      storage_key IS NOT NULL - a storage key belongs to at most one shout;
+      replaces the plain `idx_shouts_storage_key` from 007
+
+  ## Security
+    - RLS enabled with no policies; only the backend (table owner) uses it
+
+  ## Notes
+    - Indexes are built and dropped CONCURRENTLY; run this file outside a
+      transaction block (plain psql does)
+    - Building the unique index fails if shouts already share a key; list them with
+      SELECT storage_key FROM shouts WHERE storage_key IS NOT NULL
+      GROUP BY storage_key HAVING count(*) > 1
+*/
+
+CREATE TABLE IF NOT EXISTS pending_uploads (
+  storage_key text PRIMARY KEY,
+  created_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_pending_uploads_created_at ON pending_uploads(created_at);
+
+ALTER TABLE pending_uploads ENABLE ROW LEVEL SECURITY;
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_shouts_storage_key_unique
+  ON shouts(storage_key) WHERE storage_key IS NOT NULL;
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_shouts_storage_key;